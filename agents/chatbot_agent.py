@@ -1,5 +1,6 @@
 import os
 import re
+import math
 import datetime
 import pandas as pd
 from .technical_agent import TechnicalAnalyst
@@ -11,6 +12,7 @@ from .financial_agent import FinancialAgent
 from .peer_agent import PeerAgent
 from .supply_chain_agent import SupplyChainAgent
 from .insider_agent import InsiderAgent
+from utils.expressions import compile_expression, ExpressionError
 
 class ChatbotAgent:
     def __init__(self):
@@ -240,17 +242,43 @@ class ChatbotAgent:
         except Exception:
             return None
 
-    def _solve_math(self, query):
+    def _solve_math(self, query, technical_summary=None):
         """
-        Extracts and solves math expressions accurately.
+        Extracts and solves math expressions accurately (through the safe formula engine,
+        never eval). "calc <formula>" / "= <formula>" may also use the current ticker's
+        close, rsi, sma_20, sma_50 and sma_200.
         """
-        cleaned = re.sub(r'[^0-9\+\-\*\/\.\(\)\s]', '', query)
-        if not any(op in cleaned for op in ['+', '-', '*', '/']):
-            return None
+        formula = re.match(r'^\s*(?:calc(?:ulate)?\s+|=\s*)(.+)$', query)
+        if formula and isinstance(technical_summary, dict):
+            cleaned = formula.group(1)
+        else:
+            cleaned = re.sub(r'[^0-9\+\-\*\/\.\(\)\s]', '', query)
+            if not any(op in cleaned for op in ['+', '-', '*', '/']):
+                return None
+        values = {}
+        if isinstance(technical_summary, dict):
+            values = {
+                "close": technical_summary.get('current_price', 0),
+                "price": technical_summary.get('current_price', 0),
+                "rsi": technical_summary.get('rsi', 50),
+                "sma_20": technical_summary.get('sma_20', 0),
+                "sma_50": technical_summary.get('sma_50', 0),
+                "sma_200": technical_summary.get('sma_200', 0)
+            }
         try:
-            result = eval(cleaned)
+            result = compile_expression(cleaned.strip()).evaluate(values)
+            result = result.item() if hasattr(result, 'item') else result
+            # 1/0 and 0/0 come back as inf/nan from NumPy: not an answer
+            if not isinstance(result, (int, float)) or not math.isfinite(result):
+                return None
+            if isinstance(result, float) and result.is_integer():
+                result = int(result)
             return f"🧮 **Calculation:** {cleaned.strip()} = **{result}**"
-        except:
+        except ExpressionError:
+            return None
+        except Exception as e:
+            # Whatever the user typed, the chatbot answers instead of raising
+            print(f"Error solving math expression {cleaned.strip()!r}: {e}")
             return None
 
     def _explain_term(self, query):
@@ -331,7 +359,7 @@ class ChatbotAgent:
             return llm_response
 
         # --- 2. Math (Priority) ---
-        math_result = self._solve_math(query_lower)
+        math_result = self._solve_math(query_lower, technical_summary)
         if math_result: return math_result
 
         # --- 3. Definitions ---
@@ -1,6 +1,6 @@
-import yfinance as yf
 import pandas as pd
 import plotly.graph_objects as go
+from utils.market_data import get_market_data_service
 # Removed unused seaborn import
 
 class CorrelationAgent:
@@ -21,7 +21,7 @@ class CorrelationAgent:
         # 1. Download data (Last 1 year)
         tickers = [ticker] + list(self.benchmarks.keys())
         try:
-            data = yf.download(tickers, period="1y", interval="1d")['Close']
+            data = get_market_data_service().get_close(tickers, period="1y", interval="1d")
             
             # 2. Data cleaning
             data = data.dropna()
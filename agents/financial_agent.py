@@ -1,6 +1,6 @@
-import yfinance as yf
 import pandas as pd
 import plotly.graph_objects as go
+from utils.data_provider import get_provider
 
 class FinancialAgent:
     def __init__(self):
@@ -12,12 +12,8 @@ class FinancialAgent:
         Returns cleaned DataFrames.
         """
         try:
-            stock = yf.Ticker(ticker)
-            
             # Fetch Data
-            income = stock.financials
-            balance = stock.balance_sheet
-            cashflow = stock.cashflow
+            income, balance, cashflow = get_provider().financials(ticker)
             
             # Helper to clean data (Reverse columns to be chronological: Old -> New)
             def clean_df(df):
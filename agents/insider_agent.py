@@ -1,7 +1,7 @@
 import pandas as pd
 import plotly.graph_objects as go
-import yfinance as yf
 import numpy as np
+from utils.data_provider import get_provider
 
 class InsiderAgent:
     def __init__(self):
@@ -12,8 +12,7 @@ class InsiderAgent:
         내부자 거래 내역 가져오기 (데이터 없으면 데모 모드 작동)
         """
         try:
-            stock = yf.Ticker(ticker)
-            df = stock.insider_transactions
+            df = get_provider().insider_transactions(ticker)
             
             if df is None or df.empty:
                 return self._get_mock_data(ticker)
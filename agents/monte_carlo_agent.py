@@ -1,65 +1,371 @@
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-import pandas as pd
 import plotly.graph_objects as go
+from scipy import special, stats
+from scipy.stats import qmc
+from utils.sim_stats import PathSummary, ReplicateEstimates
+from utils.return_models import GBMModel, fit_model, simulate_paths
+
+# Paths simulated per block: ~2 MB of float32 for 30 days, whatever the total
+CHUNK_SIZE = 16384
+# Independent groups per block; their spread gives every standard error
+REPLICATES = 16
+# Runs of at least this many paths are spread over the process pool (QA_MC_WORKERS, 1 = off)
+POOL_MIN_PATHS = 200_000
+# Independent shock streams of those runs, whatever the worker count: the streams are
+# mapped onto the workers, so one seed gives the same paths on any machine
+STREAMS = 8
+
+logger = logging.getLogger(__name__)
+
+
+def gbm_paths(start_price, mu, sigma, days, simulations, rng=None, shocks=None):
+    """
+    (days + 1) x simulations GBM price paths as float32, row 0 being start_price.
+    The whole shock matrix is drawn in one call and each path is the cumulative sum of
+    its log returns, so 100k paths x 30 days take well under a second.
+    `rng` is a numpy Generator or a seed (None: fresh entropy); `shocks` (days x
+    simulations standard normals, e.g. from a ShockSampler) replaces the draws.
+    """
+    return simulate_paths(GBMModel(mu, sigma), start_price, days, simulations, rng, shocks)[0]
+
+
+def _child(seed, *key):
+    """Child stream of a SeedSequence by explicit key (spawn() would depend on call order)."""
+    return np.random.SeedSequence(seed.entropy, spawn_key=tuple(seed.spawn_key) + key)
+
+
+class ShockSampler:
+    """
+    Blocks of standard-normal shocks (days x n, float32) split into `replicates` equal
+    column groups:
+      plain       pseudo-random draws
+      antithetic  each group's second half is the first half negated (pairs j, j + n/2)
+      sobol       scrambled Sobol points (scipy.stats.qmc) through the normal inverse CDF,
+                  one independently scrambled sequence per group
+    A sampler for (seed, offset) continues the stream `offset` points per group in, so
+    consecutive blocks of one stream can be drawn in different processes.
+    """
+
+    METHODS = ("plain", "antithetic", "sobol")
+
+    def __init__(self, days, method="plain", seed=None, replicates=REPLICATES, offset=0):
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown sampling method: {method}")
+        self.days = days
+        self.method = method
+        self.replicates = replicates
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.rng = np.random.default_rng(_child(seed, replicates, offset))
+        if method == "sobol":
+            self._engines = [qmc.Sobol(days, scramble=True, rng=np.random.default_rng(_child(seed, g)))
+                             for g in range(replicates)]
+            if offset:
+                for engine in self._engines:
+                    engine.fast_forward(offset)
+
+    @staticmethod
+    def group_size(method, paths, replicates=REPLICATES):
+        """Paths per group for a block of at least `paths`: even for antithetic pairs,
+        a power of two for Sobol (its balance properties hold on 2^m points)."""
+        size = max(-(-paths // replicates), 1)
+        if method == "antithetic":
+            return size + size % 2
+        if method == "sobol":
+            return 1 << (size - 1).bit_length()
+        return size
+
+    def draw(self, size):
+        """One block: replicates x `size` columns, group g in columns [g * size, (g + 1) * size)."""
+        if self.method == "plain":
+            return self.rng.standard_normal((self.days, self.replicates * size), dtype=np.float32)
+        groups = []
+        for g in range(self.replicates):
+            if self.method == "antithetic":
+                half = self.rng.standard_normal((self.days, size // 2), dtype=np.float32)
+                groups += [half, -half]
+            else:
+                u = self._engines[g].random(size)
+                groups.append(special.ndtri(np.clip(u, 1e-12, 1 - 1e-12)).T.astype(np.float32))
+        return np.concatenate(groups, axis=1)
+
+
+def _simulate_block(task):
+    """
+    One block of REPLICATES x size paths of a stream, folded into (PathSummary,
+    ReplicateEstimates). Top-level so pool workers can run it.
+    """
+    model, start_price, days, size, method, seed, offset, control_mean = task
+    sampler = ShockSampler(days, method, seed, REPLICATES, offset)
+    shocks = sampler.draw(size) if model.uses_shocks else None
+    paths, summed = simulate_paths(model, start_price, days, REPLICATES * size, sampler.rng, shocks)
+    summary = PathSummary(days, seed=sampler.rng)
+    summary.add(paths)
+    estimates = ReplicateEstimates(REPLICATES, control_mean)
+    terminal = paths[-1].astype(np.float64)
+    for g in range(REPLICATES):
+        values, x = terminal[g * size:(g + 1) * size], summed[g * size:(g + 1) * size]
+        y = None
+        if method == "antithetic":
+            half = size // 2
+            y, x = (values[:half] + values[half:]) / 2, (x[:half] + x[half:]) / 2
+        estimates.update(g, values, y, x)
+    return summary, estimates
+
+
+def simulation_workers():
+    value = os.getenv("QA_MC_WORKERS")
+    return max(int(value), 1) if value else min(os.cpu_count() or 1, 8)
+
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def get_simulation_pool(workers=None):
+    """
+    Process pool shared by all large runs. "spawn" workers don't inherit the server's
+    threads and locks the way forked ones would; they start once and are reused
+    (a run asking for a different worker count replaces the pool).
+    """
+    global _pool, _pool_workers
+    workers = simulation_workers() if workers is None else workers
+    with _pool_lock:
+        if _pool is not None and _pool_workers != workers:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def _reset_simulation_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _run_blocks(tasks, workers):
+    """
+    (results in task order, processes that ran them). Results merge in task order either
+    way, so falling back to in-process changes the speed, not the numbers.
+    """
+    workers = min(workers, len(tasks))
+    if workers > 1:
+        try:
+            return list(get_simulation_pool(workers).map(_simulate_block, tasks)), workers
+        except Exception:
+            logger.warning("Simulation pool failed, running %d blocks in-process", len(tasks), exc_info=True)
+            _reset_simulation_pool()
+    return [_simulate_block(task) for task in tasks], 1
+
+
+def correlation_factor(cov):
+    """
+    (F, kind) with F @ F.T == cov, computed once per simulation: the Cholesky factor, or
+    for a covariance that isn't positive definite (pairwise estimates over mismatched
+    calendars, duplicate assets) eigenvectors scaled by the eigenvalues clipped at zero,
+    i.e. the nearest positive semidefinite matrix.
+    """
+    cov = np.asarray(cov, dtype=np.float64)
+    cov = (cov + cov.T) / 2
+    try:
+        return np.linalg.cholesky(cov), "cholesky"
+    except np.linalg.LinAlgError:
+        values, vectors = np.linalg.eigh(cov)
+        return vectors * np.sqrt(np.clip(values, 0.0, None)), "eigen"
+
 
 class MonteCarloAgent:
-    def __init__(self):
-        pass
+    # name -> label; every model sits behind utils.return_models.ReturnModel
+    MODELS = {
+        "gbm": "GBM (constant volatility)",
+        "bootstrap": "Block bootstrap (historical)",
+        "garch": "GARCH(1,1)",
+        "jump": "Student-t jump diffusion",
+    }
+
+    def __init__(self, seed=None):
+        self.seed = seed
+
+    @staticmethod
+    def estimate(df):
+        """Daily drift and volatility of simple returns."""
+        returns = df['Close'].pct_change().dropna()
+        return float(returns.mean()), float(returns.std())
 
-    def run_simulation(self, df, days=30, simulations=1000):
+    def run_simulation(self, df, days=30, simulations=1000, chunk_size=CHUNK_SIZE, method="plain",
+                       control_variate=False, target_precision=None, confidence=0.95, model="gbm",
+                       workers=None):
+        """
+        Simulates at least `simulations` paths of `model` ("gbm", "bootstrap", "garch",
+        "jump") in blocks of ~`chunk_size`, folding each block into a PathSummary (terminal
+        moments and quantiles, mean path, 50 display paths), so memory stays flat for
+        1M-path runs. Returns (summary, metrics).
+        method: "plain", "antithetic" or "sobol" shocks (see ShockSampler); models that
+            don't run on normal shocks (bootstrap) always sample plainly.
+        control_variate: corrects the expected price with each path's total log return,
+            whose mean the model knows; antithetic pairs already cancel that term.
+        target_precision: stop as soon as the `confidence` interval of both the Bull and
+            the Bear quantile is within this fraction of its value (e.g. 0.005 = 0.5%);
+            `simulations` is then the cap.
+        workers: runs of POOL_MIN_PATHS+ paths draw STREAMS independent streams, spread
+            over a process pool of this size (default QA_MC_WORKERS or the CPU count, at
+            most 8); the result doesn't depend on it. "Workers" in the metrics is the
+            number of processes that actually ran.
+        Metrics carry the standard error of each estimate, from REPLICATES independent groups.
+        """
         if df.empty or len(df) < 50:
             return None, None
 
-        returns = df['Close'].pct_change().dropna()
-        mu = returns.mean()
-        sigma = returns.std()
-        
-        start_price = df['Close'].iloc[-1]
-        
-        simulation_df = pd.DataFrame()
-        
-        for i in range(simulations):
-            prices = [start_price]
-            for d in range(days):
-                drift = mu - 0.5 * sigma**2
-                shock = sigma * np.random.normal()
-                price = prices[-1] * np.exp(drift + shock)
-                prices.append(price)
-            
-            simulation_df[f'Sim_{i}'] = prices
-
-        final_prices = simulation_df.iloc[-1]
-        mean_price = final_prices.mean()
-        upside = final_prices.quantile(0.95)
-        downside = final_prices.quantile(0.05)
-        
+        engine = fit_model(model, df['Close'])
+        sigma = self.estimate(df)[1]
+        start_price = float(df['Close'].iloc[-1])
+        if not engine.uses_shocks:
+            method = "plain"
+        control_mean = days * engine.mean_log_return if control_variate and method != "antithetic" else None
+        workers = simulation_workers() if workers is None else workers
+        streams = STREAMS if simulations >= POOL_MIN_PATHS else 1
+        used = 1
+
+        root = np.random.SeedSequence(self.seed)
+        stream_seeds = [_child(root, s) for s in range(streams)]
+        summary = PathSummary(days, seed=_child(root, streams))
+        estimates = ReplicateEstimates(REPLICATES, control_mean)
+        t = stats.t.ppf(0.5 + confidence / 2, REPLICATES - 1)
+        offset = 0
+        while summary.count < simulations:
+            per_stream = min(chunk_size, -(-(simulations - summary.count) // streams))
+            size = ShockSampler.group_size(method, per_stream)
+            tasks = [(engine, start_price, days, size, method, seed, offset, control_mean) for seed in stream_seeds]
+            blocks, ran = _run_blocks(tasks, workers)
+            used = max(used, ran)
+            for block_summary, block_estimates in blocks:
+                summary.merge(block_summary)
+                estimates.merge(block_estimates)
+            offset += size
+            if target_precision and all(
+                    t * estimates.quantile_error(q) <= target_precision * summary.quantile(q) for q in (0.95, 0.05)):
+                break
+
+        expected, expected_se = estimates.mean()
+        upside, downside = summary.quantile([0.95, 0.05])
         metrics = {
-            "Expected Price": f"${mean_price:.2f}",
+            "Expected Price": f"${expected:.2f}",
             "Bull Case (95%)": f"${upside:.2f}",
             "Bear Case (5%)": f"${downside:.2f}",
-            "Volatility": f"{sigma*100:.2f}%"
+            "Volatility": f"{sigma*100:.2f}%",
+            "Model": self.MODELS.get(model, model),
+            "Paths": f"{summary.count:,}",
+            "Workers": used,
+            "Expected Price SE": f"${expected_se:.2f}",
+            "Bull Case SE": f"${estimates.quantile_error(0.95):.2f}",
+            "Bear Case SE": f"${estimates.quantile_error(0.05):.2f}",
         }
 
-        return simulation_df, metrics
+        return summary, metrics
 
-    def plot_simulation(self, sim_df):
+    def run_portfolio_simulation(self, returns, weights, days=30, simulations=100000, initial_value=10000.0,
+                                 chunk_size=CHUNK_SIZE):
+        """
+        Buy-and-hold value of a portfolio (`weights`: dict by column or array, normalized)
+        over correlated GBM paths of all its assets. `returns` is the daily simple-return
+        panel of PortfolioAgent.return_panel; the log-return covariance is factorized once
+        and each day of a block is one (paths x assets) normal draw times the factor, with
+        the portfolio value one matrix-vector product (asset growth @ weights).
+        Blocks of at most `chunk_size` paths (exactly `simulations` in total) keep memory
+        at a few arrays of chunk_size x assets.
+        Returns (summary of value paths, metrics) like run_simulation.
+        """
+        returns = returns.dropna(how="all")
+        if returns.empty or len(returns) < 50:
+            return None, None
+
+        if isinstance(weights, dict):
+            weights = [weights.get(col, 0.0) for col in returns.columns]
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.sum() <= 0:
+            return None, None
+        weights = (weights / weights.sum()).astype(np.float32)
+
+        log_returns = np.log1p(returns)
+        drift = log_returns.mean().fillna(0.0).to_numpy(dtype=np.float32)
+        factor, kind = correlation_factor(log_returns.cov().fillna(0.0).to_numpy())
+        factor_t = factor.T.astype(np.float32)
+        assets = len(weights)
+
+        root = np.random.SeedSequence(self.seed)
+        rng = np.random.default_rng(_child(root, 0))
+        summary = PathSummary(days, seed=_child(root, 1))
+        estimates = ReplicateEstimates(REPLICATES)
+        losses = 0
+        while summary.count < simulations:
+            # The last block is cut to exactly the paths still missing
+            n = min(chunk_size, simulations - summary.count)
+            shocks = np.empty((n, assets), dtype=np.float32)
+            step = np.empty((n, assets), dtype=np.float32)
+            growth = np.empty((n, assets), dtype=np.float32)
+            cumulative = np.zeros((n, assets), dtype=np.float32)
+            values = np.empty((days + 1, n), dtype=np.float32)
+            values[0] = initial_value
+            for t in range(1, days + 1):
+                rng.standard_normal(dtype=np.float32, out=shocks)
+                np.matmul(shocks, factor_t, out=step)
+                step += drift
+                cumulative += step
+                np.exp(cumulative, out=growth)
+                np.matmul(growth, weights, out=values[t])
+                values[t] *= initial_value
+            summary.add(values)
+            terminal = values[-1].astype(np.float64)
+            losses += int((terminal < initial_value).sum())
+            for g, group in enumerate(np.array_split(terminal, REPLICATES)):
+                if len(group):
+                    estimates.update(g, group)
+
+        expected, expected_se = estimates.mean()
+        upside, downside = summary.quantile([0.95, 0.05])
+        metrics = {
+            "Expected Value": f"${expected:,.2f}",
+            "Bull Case (95%)": f"${upside:,.2f}",
+            "Bear Case (5%)": f"${downside:,.2f}",
+            "Value at Risk (95%)": f"${max(initial_value - downside, 0.0):,.2f}",
+            "Probability of Loss": f"{losses / summary.count:.1%}",
+            "Assets": assets,
+            "Covariance": "Cholesky" if kind == "cholesky" else "Eigen (PSD-repaired)",
+            "Paths": f"{summary.count:,}",
+            "Expected Value SE": f"${expected_se:,.2f}",
+            "Bull Case SE": f"${estimates.quantile_error(0.95):,.2f}",
+            "Bear Case SE": f"${estimates.quantile_error(0.05):,.2f}",
+        }
+
+        return summary, metrics
+
+    def plot_simulation(self, summary, value_label="Projected Price ($)"):
         """
         스파게티 차트 그리기 (제목 및 축 글자색 흰색 강제 적용)
         """
         fig = go.Figure()
         
-        sample_cols = sim_df.columns[:50] 
-        
-        for col in sample_cols:
+        for path in summary.display.T:
             fig.add_trace(go.Scatter(
-                y=sim_df[col],
+                y=path,
                 mode='lines',
                 line=dict(width=1, color='rgba(0, 204, 150, 0.3)'),
                 showlegend=False,
                 hoverinfo='none'
             ))
 
-        mean_line = sim_df.mean(axis=1)
+        mean_line = summary.mean_path
         fig.add_trace(go.Scatter(
             y=mean_line,
             mode='lines',
@@ -70,7 +376,7 @@ class MonteCarloAgent:
         fig.update_layout(
             # [수정] 제목 흰색 강제
             title=dict(
-                text="🔮 1,000 Possible Futures (Next 30 Days)",
+                text=f"🔮 {summary.count:,} Possible Futures (Next {summary.days} Days)",
                 font=dict(color="white")
             ),
             template='plotly_dark',
@@ -83,7 +389,7 @@ class MonteCarloAgent:
                 gridcolor='#444'
             ),
             yaxis=dict(
-                title=dict(text="Projected Price ($)", font=dict(color="white")),
+                title=dict(text=value_label, font=dict(color="white")),
                 tickfont=dict(color="white"),
                 gridcolor='#444'
             ),
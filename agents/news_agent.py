@@ -1,5 +1,5 @@
-import yfinance as yf
 import datetime
+from utils.data_provider import get_provider
 
 class NewsAgent:
     def __init__(self):
@@ -34,8 +34,7 @@ class NewsAgent:
         Fetches news with strict URL cleaning (No Dictionaries, No Images).
         """
         try:
-            stock = yf.Ticker(ticker)
-            news_list = stock.news
+            news_list = get_provider().news(ticker)
             
             processed_news = []
             total_sentiment = 0
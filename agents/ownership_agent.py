@@ -1,6 +1,7 @@
-import yfinance as yf
 import pandas as pd
 import plotly.graph_objects as go
+from utils.data_provider import get_provider
+from utils.fundamentals import get_fundamentals_snapshot
 
 class OwnershipAgent:
     def __init__(self):
@@ -11,12 +12,12 @@ class OwnershipAgent:
         Fetches Major Holders and Institutional Holders.
         """
         try:
-            stock = yf.Ticker(ticker)
+            provider = get_provider()
             
             # 1. Major Holders (Inside vs Inst)
-            major = stock.major_holders
+            major = provider.major_holders(ticker)
             # 2. Institutional Holders (Specific Funds)
-            inst = stock.institutional_holders
+            inst = provider.institutional_holders(ticker)
             
             return major, inst
         except Exception as e:
@@ -28,21 +29,21 @@ class OwnershipAgent:
         Fetches Analyst Recommendations and Price Targets.
         """
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            provider = get_provider()
+            snap = get_fundamentals_snapshot(ticker)
             
             # Target Prices
             targets = {
-                "current": info.get('currentPrice', 0),
-                "target_mean": info.get('targetMeanPrice', 0),
-                "target_high": info.get('targetHighPrice', 0),
-                "target_low": info.get('targetLowPrice', 0),
-                "recommendation": info.get('recommendationKey', 'none').upper(),
-                "num_analysts": info.get('numberOfAnalystOpinions', 0)
+                "current": snap.get('current_price'),
+                "target_mean": snap.get('target_mean'),
+                "target_high": snap.get('target_high'),
+                "target_low": snap.get('target_low'),
+                "recommendation": (snap.recommendation or 'none').upper(),
+                "num_analysts": int(snap.get('num_analysts'))
             }
             
             # Rec trends (Strong Buy, Buy, Hold, etc.)
-            recs = stock.recommendations
+            recs = provider.recommendations(ticker)
             if recs is not None and not recs.empty:
                 # Keep latest period only
                 recs = recs.iloc[-1:] # Usually contains the summary of 'period' 0m
@@ -1,10 +1,17 @@
-import yfinance as yf
+import time
 import pandas as pd
 import plotly.graph_objects as go
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from utils.market_data import get_market_data_service
+from utils.fundamentals import get_fundamentals_snapshot
 # [FIX] Removed sklearn dependency to avoid installation errors
 
 class PeerAgent:
-    def __init__(self):
+    def __init__(self, max_workers=6, timeout=8.0):
+        # Concurrent fetch settings: bounded pool, per-symbol timeout (seconds)
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.last_latency = {}   # ticker -> seconds (None = timed out / failed)
         # Define Competitor Groups (Simple Database)
         self.peers_db = {
             "NVDA": ["AMD", "INTC", "TSM", "AVGO", "QCOM"],
@@ -25,35 +32,75 @@ class PeerAgent:
         """Returns a list of peers. Defaults to Big Tech if unknown."""
         return self.peers_db.get(ticker, ["AAPL", "MSFT", "GOOGL", "AMZN"])
 
-    def fetch_peer_data(self, main_ticker):
+    def _fetch_metrics(self, t):
+        started = time.perf_counter()
+        snap = get_fundamentals_snapshot(t)
+        
+        # Extract Key Metrics (Safe extraction)
+        metrics = {
+            "Ticker": t,
+            "Price": snap.get('current_price'),
+            "Market Cap (B)": snap.get('market_cap') / 1e9,
+            "P/E Ratio": snap.get('trailing_pe'),
+            "Forward P/E": snap.get('forward_pe'),
+            "PEG Ratio": snap.get('peg_ratio'),
+            "ROE (%)": snap.get('roe') * 100,
+            "Profit Margin (%)": snap.get('profit_margin') * 100,
+            "Rev Growth (%)": snap.get('revenue_growth') * 100
+        }
+        return metrics, time.perf_counter() - started
+
+    def fetch_peer_data(self, main_ticker, concurrent=True):
         """
         Fetches comparison data for the target ticker and its peers.
+        Concurrent mode gives every symbol `timeout` seconds from when its fetch starts,
+        returns whatever finished in time (partial results) and records per-symbol
+        latency in self.last_latency and df.attrs['latency'].
         """
         tickers = [main_ticker] + self.get_peers(main_ticker)
-        data = []
+        self.last_latency = {t: None for t in tickers}
+        results = {}
 
-        for t in tickers:
-            try:
-                stock = yf.Ticker(t)
-                info = stock.info
-                
-                # Extract Key Metrics (Safe extraction)
-                metrics = {
-                    "Ticker": t,
-                    "Price": info.get('currentPrice', 0),
-                    "Market Cap (B)": info.get('marketCap', 0) / 1e9,
-                    "P/E Ratio": info.get('trailingPE', 0),
-                    "Forward P/E": info.get('forwardPE', 0),
-                    "PEG Ratio": info.get('pegRatio', 0),
-                    "ROE (%)": info.get('returnOnEquity', 0) * 100,
-                    "Profit Margin (%)": info.get('profitMargins', 0) * 100,
-                    "Rev Growth (%)": info.get('revenueGrowth', 0) * 100
-                }
-                data.append(metrics)
-            except:
-                continue
-        
-        return pd.DataFrame(data)
+        if not concurrent:
+            for t in tickers:
+                try:
+                    results[t], self.last_latency[t] = self._fetch_metrics(t)
+                except Exception:
+                    continue
+        else:
+            workers = max(1, min(self.max_workers, len(tickers)))
+            # At most `workers` fetches are live; a timed-out one is abandoned but keeps its
+            # thread, so the pool has one per symbol and the queue never waits behind it
+            pool = ThreadPoolExecutor(max_workers=len(tickers))
+            queue = list(tickers)
+            running = {}    # future -> (ticker, deadline)
+            dropped = []
+            while queue or running:
+                while queue and len(running) < workers:
+                    t = queue.pop(0)
+                    running[pool.submit(self._fetch_metrics, t)] = (t, time.monotonic() + self.timeout)
+                next_deadline = min(deadline for _, deadline in running.values())
+                done, _ = wait(running, timeout=max(0.0, next_deadline - time.monotonic()),
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    t, _ = running.pop(future)
+                    try:
+                        results[t], self.last_latency[t] = future.result()
+                    except Exception as e:
+                        print(f"Peer fetch failed for {t}: {e}")
+                now = time.monotonic()
+                for future, (t, deadline) in list(running.items()):
+                    if deadline <= now and not future.done():
+                        del running[future]
+                        dropped.append(t)
+            # Don't block the render on stragglers
+            pool.shutdown(wait=False, cancel_futures=True)
+            if dropped:
+                print(f"Peer fetch timed out after {self.timeout:.1f}s, dropped: {', '.join(dropped)}")
+
+        df = pd.DataFrame([results[t] for t in tickers if t in results])
+        df.attrs['latency'] = dict(self.last_latency)
+        return df
 
     def fetch_price_history(self, main_ticker):
         """
@@ -61,13 +108,8 @@ class PeerAgent:
         """
         tickers = [main_ticker] + self.get_peers(main_ticker)
         try:
-            # Fetch data
-            df = yf.download(tickers, period="6mo")['Close']
-            
-            # Formatting check for MultiIndex columns (common in new yfinance)
-            if isinstance(df.columns, pd.MultiIndex):
-                # Try to flatten if possible, or just proceed if simple
-                pass 
+            # Fetch data (one batched download, Close column per ticker)
+            df = get_market_data_service().get_close(tickers, period="6mo")
 
             # Fill missing
             df = df.fillna(method='ffill').fillna(method='bfill')
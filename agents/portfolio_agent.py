@@ -1,7 +1,7 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
+from utils.market_data import get_market_data_service
 
 class PortfolioAgent:
     def __init__(self):
@@ -12,12 +12,18 @@ class PortfolioAgent:
         Download historical data for multiple tickers.
         """
         try:
-            data = yf.download(tickers, period=period)['Close']
+            data = get_market_data_service().get_close(tickers, period=period)
             return data
         except Exception as e:
             print(f"Error fetching portfolio data: {e}")
             return pd.DataFrame()
 
+    def return_panel(self, df):
+        """
+        Daily returns, one column per ticker (the optimizer's and the portfolio Monte Carlo's input).
+        """
+        return df.pct_change()
+
     def optimize_portfolio(self, df, num_portfolios=2000):
         """
         Run Monte Carlo Simulation to find the Efficient Frontier.
@@ -26,7 +32,7 @@ class PortfolioAgent:
             return None, None
 
         # Calculate daily returns
-        returns = df.pct_change()
+        returns = self.return_panel(df)
         mean_returns = returns.mean()
         cov_matrix = returns.cov()
         num_assets = len(df.columns)
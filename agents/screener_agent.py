@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+from utils.market_data import get_market_data_service
+from utils.panel_indicators import (panel_from_frames, compute_panel_indicators, latest_values,
+                                    trailing_returns, pack_panel, last_rows, PANEL_FIELDS)
+from utils.expressions import compile_expression
+from utils.ticker_data import ASSET_DATABASE
+
+
+class ScreenerUniverse:
+    """
+    Everything a screen reads: the one-row-per-symbol snapshot for display, and the packed
+    dates x symbols panel (OHLCV + indicators) formulas are evaluated over.
+    Read-only once built, so one instance can be shared between sessions.
+    """
+
+    def __init__(self, snapshot, packed, counts):
+        self.snapshot = snapshot
+        self.packed = packed
+        self.counts = counts
+        self.symbols = list(snapshot.index)
+        # Snapshot-only fields (returns, distances) broadcast over the panel as one row
+        self.env = dict(packed)
+        for col in snapshot.columns:
+            if col not in self.env and pd.api.types.is_numeric_dtype(snapshot[col]):
+                self.env[col] = snapshot[col].to_numpy(dtype=float)[None, :]
+
+    def fields(self):
+        return list(self.env)
+
+    def evaluate(self, source):
+        """Latest value of a formula for every symbol, as a Series."""
+        values = np.asarray(compile_expression(source).evaluate(self.env, self.counts), dtype=float)
+        shape = (max(len(v) for v in self.packed.values()), len(self.symbols))
+        return pd.Series(last_rows(np.broadcast_to(values, shape), self.counts), index=self.symbols)
+
+
+class ScreenerAgent:
+    """
+    Multi-criteria scan over the whole universe. The indicator panel is computed for every
+    symbol in one vectorized pass (load_universe); screen() then evaluates a filter formula
+    and an optional ranking formula over all symbols at once.
+    """
+
+    # name -> (filter formula, ranking formula, ascending)
+    PRESETS = {
+        "Oversold in uptrend": ("rsi < 30 & close > sma_200", "rsi", True),
+        "Momentum leaders": ("close > sma_50 & sma_50 > sma_200", "change(close, 21)", False),
+        "Volume surge": ("volume > 2 * avg(volume, 20)", "volume / avg(volume, 20)", False),
+        "Overbought": ("rsi > 70", "rsi", False),
+        "Below 200-day": ("close < sma_200", "close / sma_200 - 1", True),
+    }
+
+    def __init__(self, symbols=None, period="1y"):
+        if symbols is None:
+            symbols = ASSET_DATABASE.values()
+        self.symbols = list(dict.fromkeys(symbols))
+        self.period = period
+        self.names = {}
+        for name, symbol in ASSET_DATABASE.items():
+            self.names.setdefault(symbol, name)
+
+    def build_universe(self, frames):
+        panel = panel_from_frames(frames)
+        if not panel:
+            return None
+        indicators = compute_panel_indicators(panel)
+        snapshot = latest_values(indicators, panel)
+        for col, series in trailing_returns(panel['Close']).items():
+            snapshot[col] = series
+        for n in (50, 200):
+            snapshot[f'Dist_SMA_{n}'] = (snapshot['Close'] / snapshot[f'SMA_{n}'] - 1) * 100
+        snapshot.insert(0, 'Name', [self.names.get(s, s) for s in snapshot.index])
+        snapshot.index.name = 'Symbol'
+
+        columns = {field: panel[field] for field in PANEL_FIELDS}
+        columns.update(indicators)
+        packed, counts = pack_panel(columns, panel['Close'].notna().to_numpy())
+        return ScreenerUniverse(snapshot, packed, counts)
+
+    def load_universe(self):
+        """
+        One batched download for the universe, then indicators for every symbol at once.
+        Returns None if nothing could be loaded.
+        """
+        try:
+            service = get_market_data_service()
+            service.request(self.symbols, period=self.period)
+            service.flush()
+            frames = {s: service.get_ohlcv(s, period=self.period) for s in self.symbols}
+            return self.build_universe(frames)
+        except Exception as e:
+            print(f"Error building screener universe: {e}")
+            return None
+
+    def screen(self, universe, filter_formula, rank_formula=None, ascending=False, limit=None):
+        """
+        Symbols whose latest filter value is true, ranked by the latest ranking value
+        (added as a 'Score' column). Raises ExpressionError for invalid formulas.
+        """
+        snapshot = universe.snapshot
+        mask = universe.evaluate(filter_formula).fillna(0).astype(bool).to_numpy()
+        result = snapshot[mask].copy()
+        if rank_formula:
+            result.insert(1, 'Score', universe.evaluate(rank_formula)[mask].to_numpy())
+            result = result.sort_values('Score', ascending=ascending, na_position='last')
+        if limit:
+            result = result.head(limit)
+        return result
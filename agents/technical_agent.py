@@ -1,85 +1,119 @@
-import yfinance as yf
+import threading
 import pandas as pd
-import pandas_ta as ta
+from utils.market_data import get_market_data_service
+from utils.indicator_registry import get_indicator_registry
+from utils.bars import data_version
+
+
+class AnalysisContext:
+    """
+    Bars + indicator columns + summary for one ticker, built once per data version.
+    The summary cards, Research, Chatbot, Strategy and the PDF all read from the same object.
+    """
+
+    def __init__(self, ticker, df, summary, version=None):
+        self.ticker = ticker
+        self.df = df
+        self.summary = summary
+        self.version = version
+
+    def snapshot(self):
+        """
+        A copy for one caller that costs nothing up front: with pandas copy-on-write,
+        writes to the shallow frame copy never reach the shared one.
+        """
+        summary = dict(self.summary) if isinstance(self.summary, dict) else self.summary
+        return AnalysisContext(self.ticker, self.df.copy(deep=False), summary, self.version)
+
+    @property
+    def bars(self):
+        return self.df[['Open', 'High', 'Low', 'Close', 'Volume']]
+
+    @property
+    def is_empty(self):
+        return self.df.empty
+
+
+_contexts = {}
+_contexts_lock = threading.Lock()
+
 
 class TechnicalAnalyst:
+    # What the summary cards, Strategy, Chatbot and the PDF read
+    SUMMARY_COLUMNS = ['SMA_20', 'SMA_50', 'SMA_200', 'RSI']
+
     def __init__(self, ticker):
         self.ticker = ticker
 
-    def fetch_data(self, period="1y"):
+    def fetch_data(self, period="1y", interval="1d"):
         try:
-            df = yf.download(self.ticker, period=period)
-            if isinstance(df.columns, pd.MultiIndex):
-                df.columns = df.columns.get_level_values(0)
+            df = get_market_data_service().get_ohlcv(self.ticker, period=period, interval=interval)
             df = df[['Open', 'High', 'Low', 'Close', 'Volume']]
             return df
         except Exception as e:
             print(f"Error fetching data: {e}")
             return pd.DataFrame()
 
-    def calculate_indicators(self, df=None):
+    def calculate_indicators(self, df=None, columns=None, interval="1d"):
+        """
+        Adds indicator columns to df. `columns` limits the work to what the caller shows
+        (default: all of them); results are memoized per data version and timeframe.
+        """
         if df is None:
-            df = self.fetch_data()
+            df = self.fetch_data(interval=interval)
         
         if df.empty:
             return df
 
-        # 1. SMA (Simple Moving Average)
-        df['SMA_20'] = ta.sma(df['Close'], length=20)
-        df['SMA_50'] = ta.sma(df['Close'], length=50)
-        df['SMA_200'] = ta.sma(df['Close'], length=200)
-
-        # 2. EMA (Exponential Moving Average)
-        df['EMA_20'] = ta.ema(df['Close'], length=20)
-        df['EMA_50'] = ta.ema(df['Close'], length=50)   # [NEW]
-        df['EMA_200'] = ta.ema(df['Close'], length=200) # [NEW]
-
-        # 3. Bollinger Bands
-        bbands = ta.bbands(df['Close'], length=20, std=2.0)
-        if bbands is not None and not bbands.empty:
-            bbu = [c for c in bbands.columns if c.startswith('BBU')][0]
-            bbl = [c for c in bbands.columns if c.startswith('BBL')][0]
-            bbm = [c for c in bbands.columns if c.startswith('BBM')][0]
-            df['BB_Upper'] = bbands[bbu]
-            df['BB_Lower'] = bbands[bbl]
-            df['BB_Mid']   = bbands[bbm]
-
-        # 4. Parabolic SAR [NEW]
-        # (psar returns 'PSARl' and 'PSARs' sometimes, need dynamic check)
-        psar = ta.psar(df['High'], df['Low'], df['Close'])
-        if psar is not None and not psar.empty:
-            # Combine long and short columns into one for plotting
-            psar_cols = [c for c in psar.columns if c.startswith('PSAR')]
-            df['PSAR'] = psar[psar_cols].fillna(0).sum(axis=1)
-            # Fix zeros if overlap (rare)
-            df['PSAR'] = df['PSAR'].replace(0, pd.NA)
-
-        # 5. Donchian Channels [NEW]
-        donchian = ta.donchian(df['High'], df['Low'], lower_length=20, upper_length=20)
-        if donchian is not None and not donchian.empty:
-            dcu = [c for c in donchian.columns if c.startswith('DCU')][0]
-            dcl = [c for c in donchian.columns if c.startswith('DCL')][0]
-            df['DC_Upper'] = donchian[dcu]
-            df['DC_Lower'] = donchian[dcl]
-
-        # 6. VWAP (Volume Weighted Average Price) [NEW]
-        df['VWAP'] = ta.vwap(df['High'], df['Low'], df['Close'], df['Volume'])
-
-        # 7. RSI
-        df['RSI'] = ta.rsi(df['Close'], length=14)
+        # SMA 20/50/200, EMA 20/50/200, Bollinger(20, 2), PSAR, Donchian(20), VWAP, RSI(14).
+        # Same formulas as pandas_ta, but kept as per-symbol running state: only bars
+        # that arrived since the last call are processed.
+        indicators = get_indicator_registry().compute(self.ticker, df, columns, interval=interval)
+        for col in indicators.columns:
+            df[col] = indicators[col]
 
         return df
 
-    def get_summary(self):
+    def get_context(self, period="1y", interval="1d"):
         """
-        Returns a dictionary summary.
+        One fetch + one indicator pass per data version; later calls with unchanged bars
+        return the same AnalysisContext.
         """
-        df = self.calculate_indicators()
+        bars = self.fetch_data(period=period, interval=interval)
+        if bars.empty:
+            return AnalysisContext(self.ticker, bars, "No Data")
+
+        version = data_version(bars)
+        key = (self.ticker, period, interval)
+        with _contexts_lock:
+            cached = _contexts.get(key)
+        if cached is not None and cached.version == version:
+            return cached
+
+        df = self.calculate_indicators(bars.copy(), columns=self.SUMMARY_COLUMNS, interval=interval)
+        context = AnalysisContext(self.ticker, df, self.summarize(df), version)
+        with _contexts_lock:
+            _contexts[key] = context
+        return context
+
+    def get_summary(self, df=None):
+        """
+        Returns a dictionary summary. Without df it reads the cached analysis context
+        instead of fetching and computing again.
+        """
+        if df is None:
+            return self.get_context().summary
+        return self.summarize(self.calculate_indicators(df, columns=self.SUMMARY_COLUMNS))
+
+    @staticmethod
+    def summarize(df):
         if df.empty:
             return "No Data"
+        return TechnicalAnalyst.summarize_row(df.iloc[-1])
 
-        latest = df.iloc[-1]
-        
+    @staticmethod
+    def summarize_row(latest):
+        """Summary dict from one row (a frame row or a live quote snapshot)."""
         sentiment = "NEUTRAL"
         sma_50 = latest.get('SMA_50', 0)
         current_price = latest['Close']
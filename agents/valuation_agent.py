@@ -1,6 +1,6 @@
-import yfinance as yf
 import pandas as pd
 import plotly.graph_objects as go
+from utils.fundamentals import get_fundamentals_snapshot
 
 class ValuationAgent:
     def __init__(self):
@@ -11,22 +11,21 @@ class ValuationAgent:
         Fetch key fundamental metrics from Yahoo Finance.
         """
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            snap = get_fundamentals_snapshot(ticker)
             
             # Safe extraction with default values
             metrics = {
-                "Market Cap": info.get("marketCap", 0),
-                "Trailing P/E": info.get("trailingPE", 0),
-                "Forward P/E": info.get("forwardPE", 0),
-                "PEG Ratio": info.get("pegRatio", 0),
-                "Price/Book": info.get("priceToBook", 0),
-                "ROE": info.get("returnOnEquity", 0),
-                "Profit Margin": info.get("profitMargins", 0),
-                "Target Price (Analyst)": info.get("targetMeanPrice", 0),
-                "Current Price": info.get("currentPrice", 0),
-                "EPS": info.get("trailingEps", 0),
-                "Growth Rate": info.get("revenueGrowth", 0.10) # Default 10%
+                "Market Cap": snap.get("market_cap"),
+                "Trailing P/E": snap.get("trailing_pe"),
+                "Forward P/E": snap.get("forward_pe"),
+                "PEG Ratio": snap.get("peg_ratio"),
+                "Price/Book": snap.get("price_to_book"),
+                "ROE": snap.get("roe"),
+                "Profit Margin": snap.get("profit_margin"),
+                "Target Price (Analyst)": snap.get("target_mean"),
+                "Current Price": snap.get("current_price"),
+                "EPS": snap.get("eps"),
+                "Growth Rate": snap.get("revenue_growth", 0.10) # Default 10%
             }
             return metrics
         except Exception as e:
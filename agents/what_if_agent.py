@@ -1,6 +1,6 @@
 import numpy as np
 import pandas as pd
-import yfinance as yf
+from utils.market_data import get_market_data_service
 
 
 class WhatIfAgent:
@@ -13,11 +13,9 @@ class WhatIfAgent:
         }
 
     def _download(self, ticker, period="1y"):
-        data = yf.download(ticker, period=period)
+        data = get_market_data_service().get_ohlcv(ticker, period=period)
         if data is None or data.empty:
             return pd.DataFrame()
-        if isinstance(data.columns, pd.MultiIndex):
-            data.columns = data.columns.get_level_values(0)
         return data
 
     def _prepare_series(self, ticker, period="1y"):
@@ -27,6 +25,8 @@ class WhatIfAgent:
         return df["Close"].astype(float)
 
     def build_regression(self, ticker, period="1y"):
+        # Queue the stock and all factors so they arrive in one batched download
+        get_market_data_service().request([ticker] + list(self.factor_tickers.values()), period)
         stock = self._prepare_series(ticker, period)
         if stock.empty:
             return None
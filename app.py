@@ -3,10 +3,8 @@ import datetime
 import pandas as pd
 import plotly.graph_objects as go
 import re
-import time
-import yfinance as yf
 from plotly.subplots import make_subplots
-from agents.technical_agent import TechnicalAnalyst
+from agents.technical_agent import TechnicalAnalyst, AnalysisContext
 from agents.research_agent import ResearchAgent
 from agents.strategy_agent import StrategyAgent
 from agents.supply_chain_agent import SupplyChainAgent
@@ -23,8 +21,18 @@ from agents.financial_agent import FinancialAgent
 from agents.ownership_agent import OwnershipAgent
 from agents.chatbot_agent import ChatbotAgent
 from agents.what_if_agent import WhatIfAgent
+from agents.screener_agent import ScreenerAgent
 from utils.pdf_generator import create_pdf
 from utils.ticker_data import ASSET_DATABASE
+from utils.market_data import get_market_data_service
+from utils.data_provider import get_provider, get_rate_limiter
+from utils.single_flight import get_single_flight
+from utils.swr_cache import swr_cached, format_age, get_swr_cache
+from utils.warmup import get_warmup_scheduler, warmup_enabled
+from utils.fundamentals import get_fundamentals_snapshot, get_fundamentals_cache
+from utils.indicator_registry import column_name
+from utils.bars import data_version
+from utils.streaming import get_quote_stream, quote_streaming_enabled
 
 
 # 1. Page Config (기본 설정)
@@ -489,7 +497,12 @@ if "auto_refresh" not in st.session_state:
 if "refresh_interval" not in st.session_state:
     st.session_state.refresh_interval = 20
 
-if st.session_state.auto_refresh:
+# With streaming quotes only the ticker bar and Market Pulse rerun (st.fragment); the full
+# page reload below is the fallback for live Yahoo data and older Streamlit versions
+live_quotes = quote_streaming_enabled() and hasattr(st, "fragment")
+LIVE_QUOTE_SECONDS = 2
+
+if st.session_state.auto_refresh and not live_quotes:
     st.markdown(
         f"""
         <script>
@@ -599,15 +612,16 @@ with st.sidebar:
         index=[15, 20, 30].index(st.session_state.refresh_interval),
     )
     st.markdown("---")
-    selected_asset_name = st.selectbox("Search Symbol", options=list(ASSET_DATABASE.keys()), index=0)
+    # Keyed so the Screener can jump to a symbol by setting session state
+    selected_asset_name = st.selectbox("Search Symbol", options=list(ASSET_DATABASE.keys()), index=0, key="symbol_select")
     ticker = ASSET_DATABASE[selected_asset_name]
     module = st.radio("Select Analysis Mode:", [
         "💬 AI Assistant", "📊 Pro Charting", "📑 Deep Research", "🎯 Wall St. Insights", 
         "📊 Financial Health", "👥 Peer Comparison", "📰 Smart News", "🤖 AI Strategy", 
         "🕸️ Supply Chain", "⚖️ Fundamental Valuation", "🔮 Monte Carlo", "💼 Portfolio Optimizer", 
         "🕵️ Insider Tracker", "🧊 3D Volatility", "🔗 Correlation", "🏛️ Macro Analysis",
-        "🏛️ What-If Simulator"
-    ], index=0)
+        "🏛️ What-If Simulator", "🔎 Screener"
+    ], index=0, key="module_select")
     if module == "💼 Portfolio Optimizer": st.info("Configuring Portfolio...")
     else: st.success(f"Target: {ticker}")
 
@@ -616,15 +630,41 @@ with st.sidebar:
 
 
 # 4. Data Logic (cached + skeleton)
-@st.cache_data(ttl=600)
+spark_tickers = [
+    ("AAPL", "Apple"),
+    ("MSFT", "Microsoft"),
+    ("NVDA", "NVIDIA"),
+    ("TSLA", "Tesla"),
+    ("SPY", "S&P 500"),
+    ("BTC-USD", "Bitcoin"),
+]
+
+# Queue every price series this render needs, then download them in one batch per (period, interval)
+market_data = get_market_data_service()
+market_data.request([ticker], period="1y")
+market_data.request([sym for sym, _ in spark_tickers], period="1mo")
+if module == "🔗 Correlation":
+    market_data.request(list(CorrelationAgent().benchmarks.keys()), period="1y")
+elif module == "🏛️ What-If Simulator":
+    market_data.request(list(WhatIfAgent().factor_tickers.values()), period="1y")
+elif module == "👥 Peer Comparison":
+    market_data.request([ticker] + PeerAgent().get_peers(ticker), period="6mo")
+elif module == "🔎 Screener":
+    market_data.request(ScreenerAgent().symbols, period="1y")
+try:
+    market_data.flush()
+except Exception:
+    pass
+
+def _build_market_data(ticker_symbol):
+    # One fetch + one indicator pass (summary columns only; Pro Charting asks for its overlays itself)
+    return TechnicalAnalyst(ticker_symbol).get_context()
+
+# Each rerun gets a shallow snapshot of the shared context instead of a deep copy of its frame
+@swr_cached(ttl=600, max_stale=3600, snapshot=AnalysisContext.snapshot)
 def _load_market_data(ticker_symbol):
-    analyst = TechnicalAnalyst(ticker_symbol)
-    price_df = analyst.fetch_data()
-    summary_data = "No Data"
-    if not price_df.empty and 'Close' in price_df.columns:
-        price_df = analyst.calculate_indicators(price_df)
-        summary_data = analyst.get_summary()
-    return price_df, summary_data
+    # Sessions that miss the cache together share one fetch + indicator pass
+    return get_single_flight().do(("market_data", ticker_symbol, "1y"), _build_market_data, ticker_symbol)
 
 data_placeholder = st.empty()
 data_placeholder.markdown(
@@ -634,15 +674,23 @@ data_placeholder.markdown(
     unsafe_allow_html=True
 )
 try:
-    df, summary = _load_market_data(ticker)
+    context = _load_market_data(ticker)
 except Exception:
     _load_market_data.clear()
     try:
-        df, summary = _load_market_data(ticker)
+        context = _load_market_data(ticker)
     except Exception:
-        df = pd.DataFrame()
-        summary = "No Data"
+        context = AnalysisContext(ticker, pd.DataFrame(), "No Data")
+# Every module below reads the same context: bars + indicators (df) and the summary cards
+df, summary = context.df, context.summary
 data_placeholder.empty()
+flight_stats = get_single_flight().stats()
+limiter_stats = get_rate_limiter().stats()
+st.sidebar.caption(
+    f"Upstream fetches: {flight_stats['executed']} • Coalesced: {flight_stats['coalesced']} • "
+    f"Throttled: {limiter_stats['throttled']} • Rate: {limiter_stats['rate']}/s"
+)
+st.sidebar.caption(f"Market data: {format_age(*_load_market_data.age(ticker))}")
 
 # --- Multi-ticker sparkline snapshot ---
 @st.cache_data(ttl=900)
@@ -677,10 +725,13 @@ def _spark_fig(series, color):
     )
     return fig
 
-def _render_chat_chart(df, ticker):
-    if df is None or df.empty:
-        st.info("차트 데이터를 불러오지 못했습니다.")
-        return
+# Figures built from a price frame are cached on its content version (the frame itself is
+# passed as an unhashed `_build` closure), so reruns and chat history don't rebuild them
+@st.cache_data(ttl=600, max_entries=64)
+def _cache_figure(key, _build):
+    return _build()
+
+def _chat_chart_figure(df):
     required_cols = {"Open", "High", "Low", "Close"}
     has_ohlc = required_cols.issubset(set(df.columns))
     fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.05, row_width=[0.2, 0.7])
@@ -724,6 +775,13 @@ def _render_chat_chart(df, ticker):
         yaxis=dict(title="Price", gridcolor="#333", tickfont=dict(color="white"), title_font=dict(color="white")),
         yaxis2=dict(title="RSI", gridcolor="#333", tickfont=dict(color="white"), title_font=dict(color="white"))
     )
+    return fig
+
+def _render_chat_chart(df, ticker):
+    if df is None or df.empty:
+        st.info("차트 데이터를 불러오지 못했습니다.")
+        return
+    fig = _cache_figure(("chat_chart", data_version(df)), lambda: _chat_chart_figure(df))
     st.plotly_chart(fig, use_container_width=True)
     st.caption(f"{ticker} • Pro Charting (Auto)")
 
@@ -748,18 +806,13 @@ def _infer_features_from_text(text):
         inferred.append("insider")
     return inferred
 
-def _fetch_peer_data_safe(ticker, retries=2, delay=0.6):
-    peer_agent = PeerAgent()
-    last_df = pd.DataFrame()
-    for _ in range(retries + 1):
-        try:
-            last_df = _cache_peer_data(ticker)
-            if last_df is not None and not last_df.empty:
-                return last_df
-        except Exception:
-            pass
-        time.sleep(delay)
-    return last_df
+def _fetch_peer_data_safe(ticker):
+    # PeerAgent fetches concurrently with per-symbol timeouts and returns partial results
+    try:
+        peer_df = _cache_peer_data(ticker)
+    except Exception:
+        return pd.DataFrame()
+    return peer_df if peer_df is not None else pd.DataFrame()
 
 def _soft_fallback_message(module_name, detail=None):
     st.info(f"{module_name} 데이터를 불러오는 중 일시적인 지연이 발생했습니다. 잠시 후 다시 시도해 주세요.")
@@ -776,12 +829,12 @@ def _cache_peer_history(ticker):
     agent = PeerAgent()
     return agent.fetch_price_history(ticker)
 
-@st.cache_data(ttl=600)
+@swr_cached(ttl=600, max_stale=3600)
 def _cache_news(ticker):
     agent = NewsAgent()
     return agent.get_news(ticker)
 
-@st.cache_data(ttl=600)
+@swr_cached(ttl=600, max_stale=6 * 3600)
 def _cache_financials(ticker):
     agent = FinancialAgent()
     return agent.get_financials(ticker)
@@ -789,22 +842,63 @@ def _cache_financials(ticker):
 @st.cache_data(ttl=600)
 def _cache_valuation_metrics(ticker):
     agent = ValuationAgent()
-    return agent.get_fundamentals(ticker)
+    return get_single_flight().do(("valuation", ticker, None), agent.get_fundamentals, ticker)
 
 @st.cache_data(ttl=600)
 def _cache_insider(ticker):
     agent = InsiderAgent()
     return agent.get_insider_trades(ticker)
 
+# The universe (snapshot + packed panel) is read-only and large, so sessions share the
+# cached object instead of getting deep copies from swr_cached
+_screener_cache = get_swr_cache("screener_universe", ttl=600, max_stale=3600)
+
+def _load_screener_universe():
+    # Indicators for the whole universe in one panel pass; queries only evaluate formulas on it
+    return _screener_cache.get(("screener_universe",), ScreenerAgent().load_universe)
+
 @st.cache_data(ttl=600)
 def _cache_macro():
     agent = MacroAgent()
     return agent.analyze_minutes()
 
-@st.cache_data(ttl=600)
-def _cache_monte_carlo_fast(df):
+# Keyed on the frame's content version; Streamlit doesn't hash `_df` itself
+@st.cache_data(ttl=600, max_entries=64)
+def _cache_monte_carlo(_df, version, days=30, simulations=1000, method="plain", control_variate=False,
+                       target_precision=None, model="gbm"):
     agent = MonteCarloAgent()
-    return agent.run_simulation(df, days=20, simulations=300)
+    return agent.run_simulation(_df, days=days, simulations=simulations, method=method,
+                                control_variate=control_variate, target_precision=target_precision, model=model)
+
+@st.cache_data(ttl=600, max_entries=16)
+def _cache_portfolio_monte_carlo(_returns, version, weights, days=30, simulations=100000):
+    # `weights` is a tuple of (column, weight) pairs so it can be part of the key
+    agent = MonteCarloAgent()
+    return agent.run_portfolio_simulation(_returns, dict(weights), days=days, simulations=simulations)
+
+@st.cache_data(ttl=600, max_entries=64)
+def _cache_backtest(_df, version):
+    strategist = StrategyAgent()
+    return strategist.run_backtest(_df)
+
+# --- Background warm-up of the sidebar universe (one scheduler per server process) ---
+warmup = get_warmup_scheduler()
+# Only an explicit selection counts as a view; auto-refresh reruns of the same symbol don't
+if st.session_state.get("warmup_viewed") != ticker:
+    st.session_state.warmup_viewed = ticker
+    warmup.record_access(ticker)
+if warmup_enabled():
+    warmup.register("indicators", _load_market_data, ttl=_load_market_data.cache.ttl)
+    warmup.register("fundamentals", get_fundamentals_snapshot, ttl=get_fundamentals_cache().ttl)
+    warmup.register("news", _cache_news, ttl=_cache_news.cache.ttl)
+    warmup.start()
+    with st.sidebar.expander("Warm-up", expanded=False):
+        wp = warmup.progress()
+        st.progress(wp["done"] / wp["total"] if wp["total"] else 0.0,
+                    text=f"{wp['done']}/{wp['total']} symbols • pass {wp['passes'] + (1 if wp['running'] else 0)}")
+        fresh = warmup.symbol_freshness(ticker)
+        for stage in ["prices"] + list(warmup.loaders):
+            st.caption(f"{ticker} {stage}: {format_age(fresh.get(stage))}")
 
 def _render_chat_feature(feature_id, ticker, df, summary):
     try:
@@ -902,14 +996,15 @@ def _render_chat_feature(feature_id, ticker, df, summary):
         if feature_id == "strategy":
             st.markdown("### 🤖 AI Strategy")
             strategist = StrategyAgent()
-            backtest_data, metrics = strategist.run_backtest(df)
+            version = data_version(df)
+            backtest_data, metrics = _cache_backtest(df, version)
             if backtest_data is not None:
                 c1, c2, c3, c4 = st.columns(4)
                 c1.metric("Total Return", metrics["Total Return"], metrics["Alpha"])
                 c2.metric("Win Rate", metrics["Win Rate"])
                 c3.metric("Market Return", metrics["Market Return"])
                 c4.metric("Alpha", metrics["Alpha"])
-                fig_strategy = strategist.plot_performance(backtest_data)
+                fig_strategy = _cache_figure(("strategy", version), lambda: strategist.plot_performance(backtest_data))
                 fig_strategy.update_layout(font=dict(color="white"), legend=dict(font=dict(color="white")))
                 st.plotly_chart(fig_strategy, use_container_width=True)
             else:
@@ -940,13 +1035,14 @@ def _render_chat_feature(feature_id, ticker, df, summary):
         if feature_id == "monte_carlo":
             st.markdown("### 🔮 Monte Carlo Forecast")
             mc_agent = MonteCarloAgent()
-            sim_df, metrics = _cache_monte_carlo_fast(df)
-            if sim_df is not None:
+            version = data_version(df)
+            mc_summary, metrics = _cache_monte_carlo(df, version, days=20, simulations=300)
+            if mc_summary is not None:
                 c1, c2, c3 = st.columns(3)
                 c1.metric("Expected Price", metrics["Expected Price"])
                 c2.metric("Bull Case", metrics["Bull Case (95%)"])
                 c3.metric("Bear Case", metrics["Bear Case (5%)"])
-                fig_mc = mc_agent.plot_simulation(sim_df)
+                fig_mc = _cache_figure(("monte_carlo", version, 20, 300), lambda: mc_agent.plot_simulation(mc_summary))
                 st.plotly_chart(fig_mc, use_container_width=True)
             else:
                 st.warning("Insufficient data.")
@@ -1026,50 +1122,69 @@ prev_price = df["Close"].iloc[-2] if not df.empty and len(df) > 1 else last_pric
 chg = last_price - prev_price
 chg_pct = (chg / prev_price * 100) if prev_price else 0
 chg_class = "qa-ticker-up" if chg >= 0 else "qa-ticker-down"
-prev_session_price = st.session_state.get("last_price")
-if prev_session_price is None:
-    price_flash_class = ""
-elif last_price > prev_session_price:
-    price_flash_class = "qa-flash-up"
-elif last_price < prev_session_price:
-    price_flash_class = "qa-flash-down"
-else:
-    price_flash_class = ""
-st.session_state.last_price = last_price
-market_status = "OPEN" if 9 <= datetime.datetime.now().hour <= 16 else "CLOSED"
-st.markdown(
-    f"""
-    <div class="qa-topbar">
-        <div>
-            <div class="qa-topbar-title">Quant AI Terminal</div>
-            <div class="qa-topbar-sub">Retail Pro Edition • {datetime.date.today().strftime('%Y-%m-%d')}</div>
+
+# Streaming quotes build today's forming bar; indicators are peeked from it in O(1) per quote
+live_stream = None
+if live_quotes and isinstance(summary, dict) and not df.empty:
+    live_stream = get_quote_stream(ticker, context.bars, context.version, columns=TechnicalAnalyst.SUMMARY_COLUMNS)
+    st.sidebar.caption(f"Live quotes (simulated): {live_stream.ticks} ticks • {live_stream.closed_bars} bars closed")
+
+def _live_quote(flash_key):
+    """(summary, price, previous close, flash class) from the forming bar, else from the loaded context."""
+    if live_stream is not None:
+        row = live_stream.pump()
+        quote_summary, quote_prev = TechnicalAnalyst.summarize_row(row), row["prev_close"]
+    else:
+        quote_summary, quote_prev = summary, prev_price
+    price = quote_summary.get("current_price", 0) if isinstance(quote_summary, dict) else 0
+    previous = st.session_state.get(flash_key)
+    if previous is None or price == previous:
+        flash = ""
+    else:
+        flash = "qa-flash-up" if price > previous else "qa-flash-down"
+    st.session_state[flash_key] = price
+    return quote_summary, price, quote_prev, flash
+
+def _live_fragment(fn):
+    # Only the decorated block reruns while quotes stream; the rest of the page stays put
+    if live_stream is not None:
+        return st.fragment(run_every=LIVE_QUOTE_SECONDS if st.session_state.auto_refresh else None)(fn)
+    return fn
+
+@_live_fragment
+def _render_ticker_bar():
+    _, quote_price, quote_prev, price_flash_class = _live_quote("last_price")
+    quote_chg = quote_price - quote_prev
+    quote_chg_pct = (quote_chg / quote_prev * 100) if quote_prev else 0
+    quote_chg_class = "qa-ticker-up" if quote_chg >= 0 else "qa-ticker-down"
+    market_status = "OPEN" if 9 <= datetime.datetime.now().hour <= 16 else "CLOSED"
+    st.markdown(
+        f"""
+        <div class="qa-topbar">
+            <div>
+                <div class="qa-topbar-title">Quant AI Terminal</div>
+                <div class="qa-topbar-sub">Retail Pro Edition • {datetime.date.today().strftime('%Y-%m-%d')}</div>
+            </div>
+            <div class="qa-badge">Market {market_status}</div>
         </div>
-        <div class="qa-badge">Market {market_status}</div>
-    </div>
-    <div class="qa-tickerbar">
-        <div class="qa-ticker-track">
-            <span class="qa-ticker-item"><b>{ticker}</b> <span class="{chg_class} {price_flash_class}">{last_price:.2f} ({chg:+.2f}, {chg_pct:+.2f}%)</span></span>
-            <span class="qa-ticker-item"><b>S&P 500</b> <span class="qa-ticker-up">+0.42%</span></span>
-            <span class="qa-ticker-item"><b>NASDAQ</b> <span class="qa-ticker-down">-0.18%</span></span>
-            <span class="qa-ticker-item"><b>VIX</b> <span class="qa-ticker-up">+1.02%</span></span>
-            <span class="qa-ticker-item"><b>USD/KRW</b> <span class="qa-ticker-down">-0.12%</span></span>
-            <span class="qa-ticker-item"><b>BTC</b> <span class="qa-ticker-up">+0.87%</span></span>
+        <div class="qa-tickerbar">
+            <div class="qa-ticker-track">
+                <span class="qa-ticker-item"><b>{ticker}</b> <span class="{quote_chg_class} {price_flash_class}">{quote_price:.2f} ({quote_chg:+.2f}, {quote_chg_pct:+.2f}%)</span></span>
+                <span class="qa-ticker-item"><b>S&P 500</b> <span class="qa-ticker-up">+0.42%</span></span>
+                <span class="qa-ticker-item"><b>NASDAQ</b> <span class="qa-ticker-down">-0.18%</span></span>
+                <span class="qa-ticker-item"><b>VIX</b> <span class="qa-ticker-up">+1.02%</span></span>
+                <span class="qa-ticker-item"><b>USD/KRW</b> <span class="qa-ticker-down">-0.12%</span></span>
+                <span class="qa-ticker-item"><b>BTC</b> <span class="qa-ticker-up">+0.87%</span></span>
+            </div>
         </div>
-    </div>
-    """,
-    unsafe_allow_html=True,
-)
+        """,
+        unsafe_allow_html=True,
+    )
+
+_render_ticker_bar()
 
 # --- Sparkline Cards Row ---
 st.markdown("### 📌 Multi-Ticker Snapshot")
-spark_tickers = [
-    ("AAPL", "Apple"),
-    ("MSFT", "Microsoft"),
-    ("NVDA", "NVIDIA"),
-    ("TSLA", "Tesla"),
-    ("SPY", "S&P 500"),
-    ("BTC-USD", "Bitcoin"),
-]
 cols = st.columns(3)
 for i, (sym, name) in enumerate(spark_tickers):
     series = _fetch_sparkline(sym)
@@ -1195,19 +1310,24 @@ with col2:
 
 
 # --- Content ---
-if module != "💼 Portfolio Optimizer" and isinstance(summary, dict) and summary != "No Data":
+@_live_fragment
+def _render_market_pulse():
+    pulse, _, _, price_flash_class = _live_quote("pulse_price")
     st.markdown("### ⚡ Market Pulse")
     m1, m2, m3, m4 = st.columns(4)
     def metric_card(label, value, delta, value_class=""):
         delta_color = '#00CC96' if '+' in str(delta) or 'BULLISH' in str(delta) else '#EF553B'
         if 'NEUTRAL' in str(delta): delta_color = '#FECB52'
         return f"""<div class="metric-card"><p style="font-size: 0.85rem; margin-bottom: 8px;">{label}</p><h2 class="{value_class}" style="margin: 0; font-size: 2rem; color: #FFFFFF;">{value}</h2><p style="color: {delta_color}; font-weight: 600;">{delta}</p></div>"""
-    with m1: st.markdown(metric_card("Price", f"${summary.get('current_price',0):.2f}", "Live", price_flash_class), unsafe_allow_html=True)
-    with m2: st.markdown(metric_card("RSI (14)", f"{summary.get('rsi',0):.2f}", summary.get('sentiment','N/A')), unsafe_allow_html=True)
-    with m3: st.markdown(metric_card("200 SMA", f"${summary.get('sma_200',0):.2f}", "Trend"), unsafe_allow_html=True)
-    with m4: st.markdown(metric_card("AI Signal", summary.get('sentiment','N/A'), "Action"), unsafe_allow_html=True)
+    with m1: st.markdown(metric_card("Price", f"${pulse.get('current_price',0):.2f}", "Live", price_flash_class), unsafe_allow_html=True)
+    with m2: st.markdown(metric_card("RSI (14)", f"{pulse.get('rsi',0):.2f}", pulse.get('sentiment','N/A')), unsafe_allow_html=True)
+    with m3: st.markdown(metric_card("200 SMA", f"${pulse.get('sma_200',0):.2f}", "Trend"), unsafe_allow_html=True)
+    with m4: st.markdown(metric_card("AI Signal", pulse.get('sentiment','N/A'), "Action"), unsafe_allow_html=True)
     st.markdown("---")
 
+if module != "💼 Portfolio Optimizer" and isinstance(summary, dict) and summary != "No Data":
+    _render_market_pulse()
+
 
 # --- Modules Logic ---
 if module == "💬 AI Assistant":
@@ -1326,15 +1446,12 @@ elif module == "📑 Deep Research":
 elif module == "🎯 Wall St. Insights":
     st.subheader("🎯 Analyst Consensus & Institutional Holdings")
     owner_agent = OwnershipAgent()
+    # Throttling is retried with backoff inside the provider's rate limiter
     targets, _ = None, None
-    for _attempt in range(3):
-        try:
-            targets, _ = owner_agent.get_analyst_consensus(ticker)
-            if targets:
-                break
-        except Exception:
-            pass
-        time.sleep(0.5)
+    try:
+        targets, _ = owner_agent.get_analyst_consensus(ticker)
+    except Exception:
+        pass
     major, inst = None, None
     try:
         major, inst = owner_agent.get_ownership_data(ticker)
@@ -1369,6 +1486,7 @@ elif module == "📊 Financial Health":
     st.subheader("📊 Financial Health & Statements")
     fin_agent = FinancialAgent()
     income, balance, cash = _cache_financials(ticker)
+    st.caption(f"Statements fetched {format_age(*_cache_financials.age(ticker))}")
     if income is not None:
         st.markdown("#### 📈 Revenue vs Net Income Growth")
         st.plotly_chart(fin_agent.plot_revenue_vs_income(income), use_container_width=True)
@@ -1390,6 +1508,11 @@ elif module == "👥 Peer Comparison":
         peer_df = _fetch_peer_data_safe(ticker)
         if not peer_df.empty:
             st.markdown("#### 🔢 Valuation & Growth Matrix")
+            latency = peer_df.attrs.get('latency', {})
+            if latency:
+                timings = [v for v in latency.values() if v is not None]
+                slowest = f" • slowest {max(timings) * 1000:.0f} ms" if timings else ""
+                st.caption(f"Fetched {len(timings)}/{len(latency)} symbols{slowest}")
             display_df = peer_df.copy()
             for col in ['Market Cap (B)']: display_df[col] = display_df[col].map('${:,.1f}B'.format)
             for col in ['P/E Ratio', 'Forward P/E']: display_df[col] = display_df[col].map('{:.1f}x'.format)
@@ -1434,12 +1557,12 @@ elif module == "📰 Smart News":
     st.subheader("📰 AI News Sentiment Analysis")
     news_agent = NewsAgent()
     news_items, sentiment_score = _cache_news(ticker)
+    st.caption(f"Headlines fetched {format_age(*_cache_news.age(ticker))}")
     # --- Events & Summary Cards ---
-    stock = None
+    provider = get_provider()
     cal = None
     try:
-        stock = yf.Ticker(ticker)
-        cal = stock.calendar
+        cal = provider.calendar(ticker)
     except Exception:
         cal = None
     next_earnings = "N/A"
@@ -1453,7 +1576,7 @@ elif module == "📰 Smart News":
             next_earnings = "N/A"
     last_dividend = "N/A"
     try:
-        divs = stock.dividends if stock else None
+        divs = provider.dividends(ticker)
         if divs is not None and not divs.empty:
             last_dividend = f"{divs.index[-1].date()} / ${divs.iloc[-1]:.2f}"
     except Exception:
@@ -1503,8 +1626,15 @@ elif module == "📊 Pro Charting":
         "Institutional": ["SMA 20", "SMA 50", "VWAP", "Bollinger Bands"],
         "Custom": []
     }
-    preset = st.selectbox("🎛️ Indicator Preset", list(preset_map.keys()), index=3)
-    indicator_options = ["SMA 20", "SMA 50", "SMA 200", "EMA 20", "EMA 50", "EMA 200", "Bollinger Bands", "Parabolic SAR", "Donchian Channels", "VWAP"]
+    # Timeframe -> history shown; intraday bars come from the price store (coarser ones are
+    # resampled from the finest series already held, so switching doesn't refetch)
+    timeframe_periods = {"1D": ("1d", "1y"), "4H": ("4h", "6mo"), "1H": ("1h", "3mo"),
+                         "15M": ("15m", "1mo"), "5M": ("5m", "5d"), "1M": ("1m", "1d")}
+    tf_col, preset_col = st.columns([1, 3])
+    timeframe = tf_col.selectbox("⏱️ Timeframe", list(timeframe_periods.keys()), index=0, key="pc_timeframe")
+    chart_interval, chart_period = timeframe_periods[timeframe]
+    preset = preset_col.selectbox("🎛️ Indicator Preset", list(preset_map.keys()), index=3)
+    indicator_options = ["SMA 20", "SMA 50", "SMA 200", "EMA 20", "EMA 50", "EMA 200", "Bollinger Bands", "Parabolic SAR", "Donchian Channels", "VWAP", "Custom SMA", "Custom EMA"]
     default_indicators = preset_map[preset] if preset != "Custom" else ["SMA 20", "SMA 50", "Bollinger Bands"]
     default_indicators = [x for x in default_indicators if x in indicator_options]
     indicators = st.multiselect(
@@ -1512,24 +1642,57 @@ elif module == "📊 Pro Charting":
         indicator_options,
         default=default_indicators,
     )
+    with st.expander("⚙️ Indicator Parameters", expanded=False):
+        p1, p2, p3, p4 = st.columns(4)
+        custom_len = p1.slider("Custom MA length", 2, 250, 100, key="pc_custom_len")
+        bb_len = p2.slider("Bollinger length", 5, 100, 20, key="pc_bb_len")
+        bb_std = p3.slider("Bollinger std", 1.0, 4.0, 2.0, 0.5, key="pc_bb_std")
+        dc_len = p4.slider("Donchian length", 5, 100, 20, key="pc_dc_len")
+    bb_params = {"length": bb_len, "std": bb_std}
+    # Display name -> catalog column; each (indicator, params) result is cached on its own,
+    # so moving one slider computes one new series
+    overlay_columns = {
+        "SMA 20": {"SMA_20": "SMA_20"}, "SMA 50": {"SMA_50": "SMA_50"}, "SMA 200": {"SMA_200": "SMA_200"},
+        "EMA 20": {"EMA_20": "EMA_20"}, "EMA 50": {"EMA_50": "EMA_50"}, "EMA 200": {"EMA_200": "EMA_200"},
+        "Bollinger Bands": {column_name("BBANDS", bb_params, "upper"): "BB_Upper",
+                            column_name("BBANDS", bb_params, "lower"): "BB_Lower"},
+        "Parabolic SAR": {"PSAR": "PSAR"},
+        "Donchian Channels": {column_name("DONCHIAN", {"length": dc_len}, "upper"): "DC_Upper",
+                              column_name("DONCHIAN", {"length": dc_len}, "lower"): "DC_Lower"},
+        "VWAP": {"VWAP": "VWAP"},
+        "Custom SMA": {f"SMA_{custom_len}": "SMA_Custom"},
+        "Custom EMA": {f"EMA_{custom_len}": "EMA_Custom"},
+    }
+    selected_columns = {}
+    for label in indicators:
+        selected_columns.update(overlay_columns.get(label, {}))
+    chart_analyst = TechnicalAnalyst(ticker)
+    bars = df if chart_interval == "1d" else chart_analyst.fetch_data(period=chart_period, interval=chart_interval)
+    chart_df = bars
+    if not bars.empty:
+        chart_df = chart_analyst.calculate_indicators(
+            bars[['Open', 'High', 'Low', 'Close', 'Volume']].copy(), columns=list(selected_columns), interval=chart_interval
+        ).rename(columns=selected_columns)
     try:
         fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.05, row_width=[0.2, 0.7])
-        fig.add_trace(go.Candlestick(x=df.index, open=df['Open'], high=df['High'], low=df['Low'], close=df['Close'], name='OHLC', increasing_line_color='#00CC96', decreasing_line_color='#EF553B'), row=1, col=1)
-        if "SMA 20" in indicators and 'SMA_20' in df.columns: fig.add_trace(go.Scatter(x=df.index, y=df['SMA_20'], line=dict(color='#FFA15A', width=1), name='SMA 20'), row=1, col=1)
-        if "SMA 50" in indicators and 'SMA_50' in df.columns: fig.add_trace(go.Scatter(x=df.index, y=df['SMA_50'], line=dict(color='#00B5F8', width=1), name='SMA 50'), row=1, col=1)
-        if "SMA 200" in indicators and 'SMA_200' in df.columns: fig.add_trace(go.Scatter(x=df.index, y=df['SMA_200'], line=dict(color='#AB63FA', width=1), name='SMA 200'), row=1, col=1)
-        if "EMA 20" in indicators and 'EMA_20' in df.columns: fig.add_trace(go.Scatter(x=df.index, y=df['EMA_20'], line=dict(color='#FF6692', width=1, dash='dot'), name='EMA 20'), row=1, col=1)
-        if "EMA 50" in indicators and 'EMA_50' in df.columns: fig.add_trace(go.Scatter(x=df.index, y=df['EMA_50'], line=dict(color='#19D3F3', width=1, dash='dot'), name='EMA 50'), row=1, col=1)
-        if "EMA 200" in indicators and 'EMA_200' in df.columns: fig.add_trace(go.Scatter(x=df.index, y=df['EMA_200'], line=dict(color='#FFFFFF', width=1, dash='dot'), name='EMA 200'), row=1, col=1)
-        if "Bollinger Bands" in indicators and 'BB_Upper' in df.columns:
-            fig.add_trace(go.Scatter(x=df.index, y=df['BB_Upper'], line=dict(color='rgba(255, 255, 255, 0.3)', width=1), name='BB Upper', showlegend=False), row=1, col=1)
-            fig.add_trace(go.Scatter(x=df.index, y=df['BB_Lower'], line=dict(color='rgba(255, 255, 255, 0.3)', width=1), fill='tonexty', fillcolor='rgba(255, 255, 255, 0.05)', name='Bollinger Bands'), row=1, col=1)
-        if "Parabolic SAR" in indicators and 'PSAR' in df.columns: fig.add_trace(go.Scatter(x=df.index, y=df['PSAR'], mode='markers', marker=dict(color='white', size=4), name='Parabolic SAR'), row=1, col=1)
-        if "Donchian Channels" in indicators and 'DC_Upper' in df.columns:
-            fig.add_trace(go.Scatter(x=df.index, y=df['DC_Upper'], line=dict(color='rgba(0, 204, 150, 0.5)', width=1, dash='dash'), name='Donchian High'), row=1, col=1)
-            fig.add_trace(go.Scatter(x=df.index, y=df['DC_Lower'], line=dict(color='rgba(239, 85, 59, 0.5)', width=1, dash='dash'), name='Donchian Low'), row=1, col=1)
-        if "VWAP" in indicators and 'VWAP' in df.columns: fig.add_trace(go.Scatter(x=df.index, y=df['VWAP'], line=dict(color='#FECB52', width=2), name='VWAP'), row=1, col=1)
-        fig.add_trace(go.Bar(x=df.index, y=df['Volume'], name='Volume', marker_color='#2E3440'), row=2, col=1)
+        fig.add_trace(go.Candlestick(x=chart_df.index, open=chart_df['Open'], high=chart_df['High'], low=chart_df['Low'], close=chart_df['Close'], name='OHLC', increasing_line_color='#00CC96', decreasing_line_color='#EF553B'), row=1, col=1)
+        if "SMA 20" in indicators and 'SMA_20' in chart_df.columns: fig.add_trace(go.Scatter(x=chart_df.index, y=chart_df['SMA_20'], line=dict(color='#FFA15A', width=1), name='SMA 20'), row=1, col=1)
+        if "SMA 50" in indicators and 'SMA_50' in chart_df.columns: fig.add_trace(go.Scatter(x=chart_df.index, y=chart_df['SMA_50'], line=dict(color='#00B5F8', width=1), name='SMA 50'), row=1, col=1)
+        if "SMA 200" in indicators and 'SMA_200' in chart_df.columns: fig.add_trace(go.Scatter(x=chart_df.index, y=chart_df['SMA_200'], line=dict(color='#AB63FA', width=1), name='SMA 200'), row=1, col=1)
+        if "EMA 20" in indicators and 'EMA_20' in chart_df.columns: fig.add_trace(go.Scatter(x=chart_df.index, y=chart_df['EMA_20'], line=dict(color='#FF6692', width=1, dash='dot'), name='EMA 20'), row=1, col=1)
+        if "EMA 50" in indicators and 'EMA_50' in chart_df.columns: fig.add_trace(go.Scatter(x=chart_df.index, y=chart_df['EMA_50'], line=dict(color='#19D3F3', width=1, dash='dot'), name='EMA 50'), row=1, col=1)
+        if "EMA 200" in indicators and 'EMA_200' in chart_df.columns: fig.add_trace(go.Scatter(x=chart_df.index, y=chart_df['EMA_200'], line=dict(color='#FFFFFF', width=1, dash='dot'), name='EMA 200'), row=1, col=1)
+        if "Bollinger Bands" in indicators and 'BB_Upper' in chart_df.columns:
+            fig.add_trace(go.Scatter(x=chart_df.index, y=chart_df['BB_Upper'], line=dict(color='rgba(255, 255, 255, 0.3)', width=1), name='BB Upper', showlegend=False), row=1, col=1)
+            fig.add_trace(go.Scatter(x=chart_df.index, y=chart_df['BB_Lower'], line=dict(color='rgba(255, 255, 255, 0.3)', width=1), fill='tonexty', fillcolor='rgba(255, 255, 255, 0.05)', name='Bollinger Bands'), row=1, col=1)
+        if "Parabolic SAR" in indicators and 'PSAR' in chart_df.columns: fig.add_trace(go.Scatter(x=chart_df.index, y=chart_df['PSAR'], mode='markers', marker=dict(color='white', size=4), name='Parabolic SAR'), row=1, col=1)
+        if "Donchian Channels" in indicators and 'DC_Upper' in chart_df.columns:
+            fig.add_trace(go.Scatter(x=chart_df.index, y=chart_df['DC_Upper'], line=dict(color='rgba(0, 204, 150, 0.5)', width=1, dash='dash'), name='Donchian High'), row=1, col=1)
+            fig.add_trace(go.Scatter(x=chart_df.index, y=chart_df['DC_Lower'], line=dict(color='rgba(239, 85, 59, 0.5)', width=1, dash='dash'), name='Donchian Low'), row=1, col=1)
+        if "VWAP" in indicators and 'VWAP' in chart_df.columns: fig.add_trace(go.Scatter(x=chart_df.index, y=chart_df['VWAP'], line=dict(color='#FECB52', width=2), name='VWAP'), row=1, col=1)
+        if "Custom SMA" in indicators and 'SMA_Custom' in chart_df.columns: fig.add_trace(go.Scatter(x=chart_df.index, y=chart_df['SMA_Custom'], line=dict(color='#B6E880', width=1), name=f'SMA {custom_len}'), row=1, col=1)
+        if "Custom EMA" in indicators and 'EMA_Custom' in chart_df.columns: fig.add_trace(go.Scatter(x=chart_df.index, y=chart_df['EMA_Custom'], line=dict(color='#FF97FF', width=1, dash='dot'), name=f'EMA {custom_len}'), row=1, col=1)
+        fig.add_trace(go.Bar(x=chart_df.index, y=chart_df['Volume'], name='Volume', marker_color='#2E3440'), row=2, col=1)
         fig.update_layout(
             template='plotly_dark',
             paper_bgcolor='rgba(0,0,0,0)',
@@ -1543,7 +1706,7 @@ elif module == "📊 Pro Charting":
         fig.update_xaxes(showgrid=False, linecolor='#2E3440', tickfont=dict(color='white'))
         fig.update_yaxes(showgrid=True, gridcolor='rgba(46,52,64,0.4)', linecolor='#2E3440', tickfont=dict(color='white'))
         st.plotly_chart(fig, use_container_width=True)
-        st.caption(f"Wall St. Style Theme • Preset: {preset} • {ticker} {datetime.date.today().strftime('%Y-%m-%d')}")
+        st.caption(f"Wall St. Style Theme • Preset: {preset} • {timeframe} • {ticker} {datetime.date.today().strftime('%Y-%m-%d')}")
     except Exception as e: st.warning(f"Chart loading... {e}")
 
 
@@ -1581,20 +1744,35 @@ elif module == "💼 Portfolio Optimizer":
                         st.markdown("---")
                         fig_ef = p_agent.plot_efficient_frontier(sim_data, best_port)
                         st.plotly_chart(fig_ef, use_container_width=True)
+                        st.markdown("---")
+                        st.subheader("🔮 Optimal Portfolio: 30-Day Monte Carlo")
+                        p_returns = p_agent.return_panel(p_data)
+                        pmc_summary, pmc_metrics = _cache_portfolio_monte_carlo(
+                            p_returns, data_version(p_returns), tuple(sorted((k, float(w)) for k, w in best_port['Weights'].items())),
+                            days=30, simulations=100000)
+                        if pmc_summary is not None:
+                            m1, m2, m3, m4 = st.columns(4)
+                            m1.metric("Expected Value", pmc_metrics["Expected Value"], f"± {pmc_metrics['Expected Value SE']} SE", delta_color="off")
+                            m2.metric("Bull Case (95%)", pmc_metrics["Bull Case (95%)"])
+                            m3.metric("Bear Case (5%)", pmc_metrics["Bear Case (5%)"])
+                            m4.metric("Probability of Loss", pmc_metrics["Probability of Loss"], f"VaR {pmc_metrics['Value at Risk (95%)']}", delta_color="off")
+                            st.caption(f"{pmc_metrics['Paths']} correlated paths of {pmc_metrics['Assets']} assets, $10,000 invested · covariance: {pmc_metrics['Covariance']}")
+                            st.plotly_chart(MonteCarloAgent().plot_simulation(pmc_summary, value_label="Portfolio Value ($)"), use_container_width=True)
                 else: st.error("Failed to download data for selected assets.")
 
 
 elif module == "🤖 AI Strategy":
     st.subheader("🤖 Algorithmic Backtesting")
     strategist = StrategyAgent()
-    backtest_data, metrics = strategist.run_backtest(df)
+    version = data_version(df)
+    backtest_data, metrics = _cache_backtest(df, version)
     if backtest_data is not None:
         c1, c2, c3, c4 = st.columns(4)
         c1.metric("Total Return", metrics["Total Return"], metrics["Alpha"])
         c2.metric("Win Rate", metrics["Win Rate"])
         c3.metric("Market Return", metrics["Market Return"])
         c4.metric("Alpha", metrics["Alpha"])
-        fig_strategy = strategist.plot_performance(backtest_data)
+        fig_strategy = _cache_figure(("strategy", version), lambda: strategist.plot_performance(backtest_data))
         fig_strategy.update_layout(font=dict(color="white"), legend=dict(font=dict(color="white"))) 
         st.plotly_chart(fig_strategy, use_container_width=True)
     else:
@@ -1614,9 +1792,8 @@ elif module == "⚖️ Fundamental Valuation":
     val_agent = ValuationAgent()
     metrics = _cache_valuation_metrics(ticker)
     if not metrics:
-        time.sleep(1)
+        # Don't pin an empty (throttled) answer for the whole TTL; the next rerun refetches
         _cache_valuation_metrics.clear()
-        metrics = _cache_valuation_metrics(ticker)
     if metrics:
         c1, c2, c3, c4 = st.columns(4)
         c1.metric("P/E Ratio", f"{metrics.get('Trailing P/E', 'N/A')}")
@@ -1635,15 +1812,36 @@ elif module == "⚖️ Fundamental Valuation":
         _soft_fallback_message("Fundamental Valuation")
 elif module == "🔮 Monte Carlo":
     st.subheader("🔮 Monte Carlo Forecasting")
+    mc_methods = {"Pseudo-random": "plain", "Antithetic": "antithetic", "Sobol (quasi-random)": "sobol"}
+    o1, o2, o3 = st.columns(3)
+    with o1:
+        mc_model = st.selectbox("Return model", list(MonteCarloAgent.MODELS), format_func=MonteCarloAgent.MODELS.get,
+                                help="Bootstrap resamples historical returns; GARCH adds volatility clustering; "
+                                     "the jump model adds fat tails and sudden gaps.")
+        mc_method = mc_methods[st.selectbox("Sampling", list(mc_methods), index=2, disabled=mc_model == "bootstrap")]
+        mc_control = st.toggle("Control variate", value=True, help="Corrects the expected price with each path's total log return, whose mean the model knows.")
+    with o2:
+        mc_target = st.toggle("Stop at target precision", value=True)
+        mc_precision = st.number_input("Bull/Bear 95% CI (± % of price)", min_value=0.05, max_value=5.0, value=0.25,
+                                       step=0.05, disabled=not mc_target) / 100
+    with o3:
+        mc_paths = st.select_slider("Simulated paths" if not mc_target else "Max paths",
+                                    options=[1000, 10000, 100000, 1000000], value=100000 if mc_target else 10000,
+                                    format_func=lambda n: f"{n:,}")
+    mc_options = dict(days=30, simulations=mc_paths, method=mc_method, control_variate=mc_control,
+                      target_precision=mc_precision if mc_target else None, model=mc_model)
     mc_agent = MonteCarloAgent()
-    sim_df, metrics = mc_agent.run_simulation(df, days=30, simulations=1000)
-    if sim_df is not None:
+    version = data_version(df)
+    mc_summary, metrics = _cache_monte_carlo(df, version, **mc_options)
+    if mc_summary is not None:
         c1, c2, c3, c4 = st.columns(4)
-        c1.metric("Expected Price", metrics["Expected Price"])
-        c2.metric("Bull Case", metrics["Bull Case (95%)"])
-        c3.metric("Bear Case", metrics["Bear Case (5%)"])
+        c1.metric("Expected Price", metrics["Expected Price"], f"± {metrics['Expected Price SE']} SE", delta_color="off")
+        c2.metric("Bull Case", metrics["Bull Case (95%)"], f"± {metrics['Bull Case SE']} SE", delta_color="off")
+        c3.metric("Bear Case", metrics["Bear Case (5%)"], f"± {metrics['Bear Case SE']} SE", delta_color="off")
         c4.metric("Volatility", metrics["Volatility"])
-        fig_mc = mc_agent.plot_simulation(sim_df)
+        st.caption(f"{metrics['Paths']} paths simulated · {metrics['Model']}")
+        fig_mc = _cache_figure(("monte_carlo", version, tuple(sorted(mc_options.items()))),
+                               lambda: mc_agent.plot_simulation(mc_summary))
         st.plotly_chart(fig_mc, use_container_width=True)
     else:
         _soft_fallback_message("Monte Carlo")
@@ -1705,12 +1903,14 @@ elif module == "🏛️ What-If Simulator":
     st.subheader("🏛️ What-If Simulator (Multivariate Regression)")
     st.markdown("Simulate macro shocks using 1Y historical sensitivities.")
 
+    # Keyed on the version of the ticker's bars the page already loaded (a new bar refits);
+    # the factors move on the same days, and the TTL bounds how stale they can get
     @st.cache_data(ttl=900)
-    def _load_what_if_model(ticker_symbol):
+    def _load_what_if_model(ticker_symbol, version):
         agent = WhatIfAgent()
         return agent.build_regression(ticker_symbol, period="1y")
 
-    model = _load_what_if_model(ticker)
+    model = _load_what_if_model(ticker, context.version)
     if not model:
         _soft_fallback_message("What-If Simulator")
     else:
@@ -1742,6 +1942,49 @@ elif module == "🏛️ What-If Simulator":
         st.markdown("### 🧬 Sensitivity (Beta)")
         beta_df = pd.DataFrame.from_dict(model["coeffs"], orient="index", columns=["Beta"])
         st.dataframe(beta_df.style.format("{:.3f}"), use_container_width=True)
+elif module == "🔎 Screener":
+    st.subheader("🔎 Universe Screener")
+    screener = ScreenerAgent()
+    with st.spinner("Scanning universe..."):
+        universe = _load_screener_universe()
+    if universe is None or universe.snapshot.empty:
+        _screener_cache.clear("screener_universe")
+        _soft_fallback_message("Screener")
+    else:
+        snapshot = universe.snapshot
+        preset = st.selectbox("🎛️ Preset", ["Custom"] + list(screener.PRESETS.keys()), index=1, key="scr_preset")
+        formula, rank_formula, ascending = screener.PRESETS.get(preset, ("rsi < 30", "rsi", True))
+        f1, f2 = st.columns([3, 2])
+        formula = f1.text_input("Filter formula", value=formula, key=f"scr_formula_{preset}")
+        rank_formula = f2.text_input("Rank by", value=rank_formula, key=f"scr_rank_{preset}")
+        s1, s2 = st.columns([1, 1])
+        ascending = s1.toggle("Ascending", value=ascending, key=f"scr_asc_{preset}")
+        limit = s2.number_input("Top N", min_value=5, max_value=500, value=50, step=5, key="scr_limit")
+        with st.expander("ℹ️ Formula syntax"):
+            st.markdown(
+                "Series: " + ", ".join(f"`{f.lower()}`" for f in universe.fields()) + "  \n"
+                "Operators: `+ - * / **`, `< <= > >= == !=`, `&` (and), `|` (or), `~` (not)  \n"
+                "Functions: `avg/sma(x, n)`, `ema(x, n)`, `std(x, n)`, `highest/lowest(x, n)`, `rsi(x, n)`, "
+                "`shift(x, n)`, `change(x, n)` (%), `rank(x)` (0-100 across symbols), `abs`, `log`, `sqrt`, `max(a, b)`, `min(a, b)`  \n"
+                "Example: `rsi < 30 & volume > 2*avg(volume, 20)`"
+            )
+        try:
+            results = screener.screen(universe, formula, rank_formula or None, ascending=ascending, limit=int(limit))
+        except Exception as e:
+            st.error(f"Formula error: {e}")
+            results = snapshot.iloc[0:0]
+        st.caption(f"{len(results)} of {len(snapshot)} symbols • Data: {format_age(*_screener_cache.age(('screener_universe',)))}")
+        shown = [c for c in ["Name", "Score", "Close", "Return_1D", "Return_21D", "RSI", "SMA_50", "SMA_200", "Dist_SMA_200"]
+                 if c in results.columns]
+        st.dataframe(results[shown].style.format({c: "{:.2f}" for c in shown if c != "Name"}), use_container_width=True)
+
+        if not results.empty:
+            def _open_in_dashboard(symbol):
+                st.session_state.symbol_select = screener.names.get(symbol, st.session_state.symbol_select)
+                st.session_state.module_select = "📊 Pro Charting"
+            o1, o2 = st.columns([3, 1])
+            pick = o1.selectbox("Open symbol", list(results.index), format_func=lambda s: f"{s} — {screener.names.get(s, s)}", key="scr_pick")
+            o2.button("📊 Open in Dashboard", on_click=_open_in_dashboard, args=(pick,), use_container_width=True)
 else:
     if module != "💼 Portfolio Optimizer":
         st.info(f"⏳ Waiting for data... (Ticker: {ticker})")
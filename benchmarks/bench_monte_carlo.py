@@ -0,0 +1,107 @@
+"""
+Monte Carlo path generation: the vectorized float32 GBM engine for 1k-100k paths vs. the
+previous per-draw Python loop (timed on a small run and scaled), then chunked runs folded
+into a PathSummary (time, peak memory, size of the cached result), and the paths each
+sampling method needs to pin the Bull/Bear quantiles to --precision. Finally a 1M-path
+run of every return model, in-process and over the process pool, and correlated portfolio
+runs of 10-100 assets x 100k paths. Runs offline.
+
+    python benchmarks/bench_monte_carlo.py [--days 30] [--workers 4]
+"""
+import os
+import sys
+import time
+import pickle
+import argparse
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.market_data import LocalPriceSource, split_by_ticker  # noqa: E402
+from agents.monte_carlo_agent import (MonteCarloAgent, ShockSampler, gbm_paths, simulation_workers,  # noqa: E402
+                                      CHUNK_SIZE)
+from agents.portfolio_agent import PortfolioAgent  # noqa: E402
+from utils.sim_stats import PathSummary  # noqa: E402
+
+
+def loop_paths(start_price, mu, sigma, days, simulations):
+    paths = []
+    for _ in range(simulations):
+        prices = [start_price]
+        for _ in range(days):
+            prices.append(prices[-1] * np.exp(mu - 0.5 * sigma**2 + sigma * np.random.normal()))
+        paths.append(prices)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--precision", type=float, default=0.001)
+    parser.add_argument("--workers", type=int, default=simulation_workers())
+    args = parser.parse_args()
+    mu, sigma = 0.0005, 0.02
+
+    started = time.perf_counter()
+    loop_paths(100.0, mu, sigma, args.days, 200)
+    per_path = (time.perf_counter() - started) / 200
+    for sims in (1_000, 10_000, 100_000):
+        started = time.perf_counter()
+        paths = gbm_paths(100.0, mu, sigma, args.days, sims, rng=np.random.default_rng(0))
+        elapsed = time.perf_counter() - started
+        print(f"{sims:>7} paths: vectorized {elapsed * 1000:8.1f} ms ({paths.nbytes / 1e6:5.1f} MB float32)"
+              f" | python loop ~{per_path * sims:7.2f} s")
+
+    for sims in (100_000, 1_000_000):
+        rng = np.random.default_rng(0)
+        tracemalloc.start()
+        started = time.perf_counter()
+        summary = PathSummary(args.days, seed=1)
+        for done in range(0, sims, CHUNK_SIZE):
+            summary.add(gbm_paths(100.0, mu, sigma, args.days, min(CHUNK_SIZE, sims - done), rng))
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{sims:>7} paths chunked: {elapsed * 1000:8.1f} ms, peak {peak / 1e6:5.1f} MB,"
+              f" summary {len(pickle.dumps(summary)) / 1e3:5.1f} KB")
+
+    df = split_by_ticker(LocalPriceSource().download(["AAPL"], period="1y"), ["AAPL"])["AAPL"]
+    for method in ShockSampler.METHODS:
+        started = time.perf_counter()
+        _, metrics = MonteCarloAgent(seed=0).run_simulation(
+            df, args.days, simulations=4_000_000, chunk_size=4096, method=method,
+            control_variate=True, target_precision=args.precision)
+        elapsed = time.perf_counter() - started
+        print(f"{method:>10}: {metrics['Paths']:>9} paths for +-{args.precision:.2%} in {elapsed * 1000:7.1f} ms"
+              f" | expected {metrics['Expected Price']} (SE {metrics['Expected Price SE']})")
+
+    for model in MonteCarloAgent.MODELS:
+        timings = []
+        for workers in dict.fromkeys((1, args.workers)):
+            # The first pooled run pays for starting the workers; time the second
+            for _ in range(2 if workers > 1 else 1):
+                started = time.perf_counter()
+                _, metrics = MonteCarloAgent(seed=0).run_simulation(
+                    df, args.days, simulations=1_000_000, model=model, workers=workers)
+                elapsed = time.perf_counter() - started
+            # Workers that actually ran (1 if the pool failed and the run fell back in-process)
+            timings.append(f"{metrics['Workers']} worker(s) {elapsed:6.2f} s")
+        print(f"{model:>10}: 1M paths {' | '.join(timings)} | bull {metrics['Bull Case (95%)']}"
+              f" bear {metrics['Bear Case (5%)']}")
+
+    symbols = [f"SYM{i:03d}" for i in range(100)]
+    closes = split_by_ticker(LocalPriceSource().download(symbols, period="1y"), symbols)
+    returns = PortfolioAgent().return_panel(pd.DataFrame({s: frame['Close'] for s, frame in closes.items()}))
+    for assets in (10, 50, 100):
+        panel = returns.iloc[:, :assets]
+        started = time.perf_counter()
+        _, metrics = MonteCarloAgent(seed=0).run_portfolio_simulation(
+            panel, np.ones(assets), args.days, simulations=100_000)
+        elapsed = time.perf_counter() - started
+        print(f"{assets:>4} assets x 100k paths: {elapsed:6.2f} s | expected {metrics['Expected Value']}"
+              f" (SE {metrics['Expected Value SE']}) | VaR {metrics['Value at Risk (95%)']}")
+
+
+if __name__ == "__main__":
+    main()
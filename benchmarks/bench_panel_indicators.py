@@ -0,0 +1,84 @@
+"""
+Indicators for the whole ASSET_DATABASE universe: one vectorized panel pass vs. one
+IndicatorEngine run per ticker (and pandas_ta per ticker, when it is installed).
+Runs offline on LocalPriceSource data.
+
+    python benchmarks/bench_panel_indicators.py [--period 1y] [--repeat 3]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.market_data import LocalPriceSource, split_by_ticker  # noqa: E402
+from utils.indicators import IndicatorEngine  # noqa: E402
+from utils.panel_indicators import panel_from_frames, compute_panel_indicators  # noqa: E402
+from utils.ticker_data import ASSET_DATABASE  # noqa: E402
+
+
+def best_of(fn, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def pandas_ta_per_ticker(frames):
+    import pandas_ta as ta
+    for df in frames.values():
+        c = df['Close']
+        for n in (20, 50, 200):
+            ta.sma(c, length=n)
+            ta.ema(c, length=n)
+        ta.bbands(c, length=20, std=2.0)
+        ta.psar(df['High'], df['Low'], c)
+        ta.donchian(df['High'], df['Low'], lower_length=20, upper_length=20)
+        ta.vwap(df['High'], df['Low'], c, df['Volume'])
+        ta.rsi(c, length=14)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--period", default="1y")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    symbols = list(dict.fromkeys(ASSET_DATABASE.values()))
+    frames = split_by_ticker(LocalPriceSource().download(symbols, period=args.period), symbols)
+    print(f"{len(frames)} symbols x {max(len(f) for f in frames.values())} bars ({args.period})")
+
+    engine_time, per_ticker = best_of(lambda: {t: IndicatorEngine().run(f) for t, f in frames.items()}, args.repeat)
+    panel = panel_from_frames(frames)
+    panel_time, panel_out = best_of(lambda: compute_panel_indicators(panel), args.repeat)
+
+    print(f"per-ticker engine : {engine_time * 1000:8.1f} ms")
+    try:
+        ta_time, _ = best_of(lambda: pandas_ta_per_ticker(frames), args.repeat)
+        print(f"per-ticker pandas_ta: {ta_time * 1000:6.1f} ms")
+    except ImportError:
+        print("per-ticker pandas_ta: (not installed)")
+    print(f"panel             : {panel_time * 1000:8.1f} ms  ({engine_time / panel_time:.0f}x vs engine)")
+
+    worst = {}
+    for col, wide in panel_out.items():
+        for t, ref in per_ticker.items():
+            a = wide[t].reindex(ref.index).to_numpy()
+            b = ref[col].to_numpy()
+            both = ~np.isnan(a) & ~np.isnan(b)
+            if (np.isnan(a) != np.isnan(b)).any():
+                worst[col] = float("inf")
+            elif both.any():
+                rel = np.max(np.abs(a[both] - b[both]) / np.maximum(np.abs(b[both]), 1e-12))
+                worst[col] = max(worst.get(col, 0.0), rel)
+    print("max relative difference vs per-ticker:")
+    for col, rel in worst.items():
+        print(f"  {col:<9} {rel:.2e}")
+
+
+if __name__ == "__main__":
+    main()
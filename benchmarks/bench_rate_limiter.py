@@ -0,0 +1,107 @@
+"""
+Throughput / tail latency of the old fixed-sleep retries vs. the adaptive RateLimiter
+against a local stand-in that throttles like Yahoo (429 above a request rate).
+
+    python benchmarks/bench_rate_limiter.py [--threads 16] [--calls 200] [--upstream-rate 20]
+"""
+import os
+import sys
+import time
+import threading
+import argparse
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.rate_limiter import RateLimiter  # noqa: E402
+
+
+class TooManyRequests(Exception):
+    pass
+
+
+class ThrottlingUpstream:
+    """
+    Sliding one-second window: more than `rate` requests in the window -> 429.
+    Each accepted request takes `latency` seconds.
+    """
+
+    def __init__(self, rate=20, latency=0.02):
+        self.rate = rate
+        self.latency = latency
+        self._stamps = []
+        self._lock = threading.Lock()
+        self.accepted = 0
+        self.rejected = 0
+
+    def fetch(self, ticker):
+        now = time.monotonic()
+        with self._lock:
+            self._stamps = [t for t in self._stamps if now - t < 1.0]
+            if len(self._stamps) >= self.rate:
+                self.rejected += 1
+                raise TooManyRequests("429 Too Many Requests")
+            self._stamps.append(now)
+            self.accepted += 1
+        time.sleep(self.latency)
+        return {"symbol": ticker}
+
+
+def naive_call(upstream, ticker, attempts=3, pause=0.5):
+    # What app.py used to do: a few fixed sleeps, then give up
+    for _ in range(attempts):
+        try:
+            return upstream.fetch(ticker)
+        except TooManyRequests:
+            time.sleep(pause)
+    return None
+
+
+def run(name, fn, threads, calls):
+    latencies, ok = [], 0
+    lock = threading.Lock()
+
+    def one(i):
+        nonlocal ok
+        start = time.perf_counter()
+        try:
+            result = fn(f"SYM{i}")
+        except Exception:
+            result = None
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            ok += result is not None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(calls)))
+    wall = time.perf_counter() - start
+    lat = np.array(latencies) * 1000
+    print(f"{name:<10} ok {ok:>4}/{calls}  throughput {ok / wall:6.1f}/s  "
+          f"p50 {np.percentile(lat, 50):7.1f} ms  p99 {np.percentile(lat, 99):7.1f} ms  wall {wall:5.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--upstream-rate", type=int, default=20)
+    args = parser.parse_args()
+
+    upstream = ThrottlingUpstream(rate=args.upstream_rate)
+    run("naive", lambda t: naive_call(upstream, t), args.threads, args.calls)
+    print(f"{'':<10} upstream accepted {upstream.accepted}, rejected {upstream.rejected}")
+
+    time.sleep(1.0)
+    upstream = ThrottlingUpstream(rate=args.upstream_rate)
+    # Bursts count against the same one-second window, so rate + capacity stays under it
+    rate = args.upstream_rate * 0.9
+    limiter = RateLimiter(rate=rate, capacity=max(1, int(args.upstream_rate - rate)),
+                          max_retries=6, acquire_timeout=60.0)
+    run("limiter", lambda t: limiter.call("info", upstream.fetch, t), args.threads, args.calls)
+    print(f"{'':<10} upstream accepted {upstream.accepted}, rejected {upstream.rejected}, {limiter.stats()}")
+
+
+if __name__ == "__main__":
+    main()
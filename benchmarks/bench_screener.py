@@ -0,0 +1,44 @@
+"""
+Screener scaling: universe build (panel indicators for every symbol) and formula query
+time for a synthetic universe of N symbols. Runs offline on LocalPriceSource data.
+
+    python benchmarks/bench_screener.py [--symbols 2000] [--period 1y]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.market_data import LocalPriceSource, split_by_ticker  # noqa: E402
+from agents.screener_agent import ScreenerAgent  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=2000)
+    parser.add_argument("--period", default="1y")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i:05d}" for i in range(args.symbols)]
+    started = time.perf_counter()
+    frames = split_by_ticker(LocalPriceSource().download(symbols, period=args.period), symbols)
+    print(f"{len(frames)} symbols generated in {time.perf_counter() - started:.1f}s")
+
+    agent = ScreenerAgent(symbols=symbols)
+    started = time.perf_counter()
+    universe = agent.build_universe(frames)
+    build = time.perf_counter() - started
+    print(f"universe build: {build * 1000:8.1f} ms ({len(universe.fields())} fields)")
+
+    for name, (formula, rank, ascending) in agent.PRESETS.items():
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            result = agent.screen(universe, formula, rank, ascending)
+        elapsed = (time.perf_counter() - started) / args.repeat
+        print(f"  {name:<20} {elapsed * 1000:7.2f} ms  -> {len(result)} matches   [{formula}]")
+
+
+if __name__ == "__main__":
+    main()
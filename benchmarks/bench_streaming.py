@@ -0,0 +1,61 @@
+"""
+Cost per quote of the streaming pipeline (tick -> forming bar -> indicator peek) for
+histories of different lengths, vs. recomputing the indicator frame on every quote.
+Runs offline on LocalPriceSource data.
+
+    python benchmarks/bench_streaming.py [--ticks 20000]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.market_data import LocalPriceSource, split_by_ticker  # noqa: E402
+from utils.indicator_registry import IndicatorRegistry  # noqa: E402
+from utils.streaming import QuoteStream, SimulatedTickSource, LIVE_COLUMNS  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ticks", type=int, default=20000)
+    parser.add_argument("--ticker", default="AAPL")
+    args = parser.parse_args()
+
+    full = split_by_ticker(LocalPriceSource().download([args.ticker], period="max"), [args.ticker])[args.ticker]
+    clock = [0.0]
+    for bars in (250, 2500, len(full)):
+        history = full.iloc[-bars:]
+        clock[0] = history.index[-1].value // 1_000_000_000
+        # One quote every 10 simulated minutes, so the run rolls over into new daily bars
+        source = SimulatedTickSource(args.ticker, history['Close'].iloc[-1], rate=1 / 600, seed=7,
+                                     clock=lambda: clock[0])
+        stream = QuoteStream(args.ticker, history, source, columns=LIVE_COLUMNS)
+        clock[0] += args.ticks / source.rate
+        ticks = []
+        while len(ticks) < args.ticks:
+            batch = source.poll()
+            if not batch:
+                break
+            ticks.extend(batch)
+
+        started = time.perf_counter()
+        for tick in ticks:
+            stream.on_tick(*tick)
+        per_tick = (time.perf_counter() - started) / max(len(ticks), 1)
+
+        registry = IndicatorRegistry()
+        started = time.perf_counter()
+        for i in range(20):
+            frame = history.copy()
+            frame.iloc[-1, frame.columns.get_loc('Close')] *= 1 + i * 1e-4
+            registry.forget()
+            registry.compute(args.ticker, frame, LIVE_COLUMNS)
+        recompute = (time.perf_counter() - started) / 20
+
+        print(f"{bars:>6} bars: stream {per_tick * 1e6:7.1f} us/quote ({stream.closed_bars} bars closed)"
+              f" | full recompute {recompute * 1e3:7.2f} ms/quote")
+
+
+if __name__ == "__main__":
+    main()
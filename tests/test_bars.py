@@ -0,0 +1,80 @@
+"""
+Timeframe helpers (utils.bars): the reduceat resampler, which interval to fetch for a
+timeframe, intraday lookback clamping, and the content versions caches are keyed on.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.bars import data_version, fetch_interval, finer_intervals, lookback_days, resample_bars
+from utils.market_data import OHLCV_COLUMNS, LocalPriceSource, clamp_period, split_by_ticker
+
+
+@pytest.fixture(scope="module")
+def minutes():
+    raw = LocalPriceSource(end="2024-06-28").download(["AAA"], period="5d", interval="1m")
+    return split_by_ticker(raw, ["AAA"])["AAA"]
+
+
+def _pandas_resample(df, rule):
+    # Session-anchored buckets: each day resampled on its own, starting at its first bar
+    parts = [day.resample(rule, origin="start").agg(
+                 {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}).dropna()
+             for _, day in df.groupby(df.index.date)]
+    return pd.concat(parts)
+
+
+@pytest.mark.parametrize("interval, rule", [("5m", "5min"), ("15m", "15min"), ("1h", "1h")])
+def test_resample_matches_pandas_per_session(minutes, interval, rule):
+    bars = resample_bars(minutes, interval)
+    expected = _pandas_resample(minutes, rule)
+    pd.testing.assert_frame_equal(bars, expected, check_freq=False, check_index_type=False)
+    # A 09:30 open gives 09:30-10:30 hourly bars, and the last one is the 15:30 half hour
+    if interval == "1h":
+        assert [t.strftime("%H:%M") for t in bars.index[:7]] == [
+            "09:30", "10:30", "11:30", "12:30", "13:30", "14:30", "15:30"]
+
+
+def test_daily_resample_agrees_with_daily_bars(minutes):
+    raw = LocalPriceSource(end="2024-06-28").download(["AAA"], period="5d")
+    daily = split_by_ticker(raw, ["AAA"])["AAA"]
+    days = resample_bars(minutes, "1d")
+    np.testing.assert_allclose(days["Open"], daily["Open"], rtol=1e-12)
+    np.testing.assert_allclose(days["Close"], daily["Close"], rtol=1e-12)
+
+
+def test_fetch_interval_and_lookback():
+    assert finer_intervals("1h") == ["1m", "5m", "15m", "30m"]
+    assert finer_intervals("4h") == ["1m", "5m", "15m", "30m", "1h"]
+    assert fetch_interval("15m", 30) == "15m"
+    # 4h is never served upstream: fetch hourly bars and resample
+    assert fetch_interval("4h", 366) == "1h"
+    assert lookback_days("1m") == 7 and lookback_days("4h") == 730 and lookback_days("1d") is None
+    assert clamp_period("1y", "1m") == "5d"
+    assert clamp_period("1y", "5m") == "1mo"
+    assert clamp_period("1y", "1h") == "1y"
+    assert clamp_period("10y", "1d") == "10y"
+
+
+def test_data_version_follows_content(minutes):
+    df = minutes.iloc[:500]
+    version = data_version(df)
+    assert data_version(df.copy()) == version
+    assert version[:2] == (500, df.index[-1])
+
+    edited = df.copy()
+    edited.iloc[100, edited.columns.get_loc("Close")] += 0.01
+    assert data_version(edited) != version
+    # Derived frames never share their source's key
+    assert data_version(df.pct_change()) != version
+    assert data_version(df.round(2)) != version
+    assert data_version(df.assign(Extra=1.0)) != version
+    assert data_version(df.assign(Extra=1.0), OHLCV_COLUMNS) == data_version(df, OHLCV_COLUMNS)
+    assert data_version(df["Close"]) == data_version(df[["Close"]])
+    assert data_version(df.iloc[:0]) == (0, None, 0)
+
+
+def test_data_version_sees_renamed_and_reordered_columns(minutes):
+    df = minutes.iloc[:50]
+    assert data_version(df.rename(columns={"Close": "Adj Close"})) != data_version(df)
+    assert data_version(df[df.columns[::-1]]) != data_version(df)
@@ -0,0 +1,98 @@
+"""
+Record/replay (utils.data_provider.RecordReplayProvider) as the PriceStore drives it:
+a replay session must reproduce the recorded bars exactly, delta refreshes included.
+Also the provider and return-model interfaces.
+"""
+import pandas as pd
+import pytest
+
+from utils.data_provider import DataProvider, LocalProvider, RecordReplayProvider
+from utils.market_data import LocalPriceSource, split_by_ticker
+from utils.price_store import PriceStore
+from utils.return_models import MODELS, ReturnModel
+
+TICKERS = ["AAA", "BBB"]
+
+
+class FixedDayProvider(LocalProvider):
+    """Stands in for the live upstream on the day the session was recorded."""
+
+    def __init__(self, end):
+        self.prices = LocalPriceSource(end=end)
+
+
+class CountingFallback(LocalProvider):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def download(self, tickers, period="1y", interval="1d", start=None):
+        self.calls += 1
+        return super().download(tickers, period=period, interval=interval, start=start)
+
+
+@pytest.fixture
+def recording(tmp_path):
+    root = str(tmp_path / "replay")
+    recorder = RecordReplayProvider(root, mode="record", inner=FixedDayProvider("2024-06-28"))
+    raw = recorder.download(TICKERS, period="1y")
+    return root, split_by_ticker(raw, TICKERS)
+
+
+def _replay_session(root, store_dir):
+    fallback = CountingFallback()
+    provider = RecordReplayProvider(root, mode="replay", fallback=fallback)
+    store = PriceStore(provider, root=store_dir, ttl=0)
+    store.refresh(TICKERS, period="1y")
+    # ttl=0: the second refresh is a delta download with start=<last stored date>
+    store.refresh(TICKERS, period="1y")
+    assert store.full_downloads == 1 and store.delta_downloads == 1
+    assert fallback.calls == 0
+    return {t: store.load(t) for t in TICKERS}
+
+
+def test_replay_answers_start_requests_from_the_recording(recording):
+    root, recorded = recording
+    provider = RecordReplayProvider(root, mode="replay", fallback=CountingFallback())
+    frames = split_by_ticker(provider.download(TICKERS, start="2024-06-01"), TICKERS)
+
+    for t in TICKERS:
+        expected = recorded[t][recorded[t].index >= "2024-06-01"]
+        pd.testing.assert_frame_equal(frames[t], expected)
+    assert provider.fallback.calls == 0
+
+
+def test_replay_sessions_are_byte_identical(recording, tmp_path):
+    root, recorded = recording
+    first = _replay_session(root, str(tmp_path / "store1"))
+    second = _replay_session(root, str(tmp_path / "store2"))
+
+    for t in TICKERS:
+        # No synthetic bars stitched after the recorded day
+        assert first[t].index[-1] == recorded[t].index[-1]
+        assert len(first[t]) == len(recorded[t])
+        pd.testing.assert_frame_equal(first[t], second[t])
+        assert (pd.util.hash_pandas_object(first[t]).values
+                == pd.util.hash_pandas_object(second[t]).values).all()
+
+
+def test_unrecorded_tickers_still_fall_back(recording):
+    root, _ = recording
+    provider = RecordReplayProvider(root, mode="replay", fallback=CountingFallback())
+    frames = split_by_ticker(provider.download(["ZZZ"], start="2024-06-01"), ["ZZZ"])
+    assert "ZZZ" in frames and not frames["ZZZ"].empty
+    assert provider.fallback.calls == 1
+
+
+def test_providers_and_return_models_must_implement_the_interface():
+    class PricesOnly(DataProvider):
+        def download(self, tickers, period="1y", interval="1d", start=None):
+            return pd.DataFrame()
+
+    with pytest.raises(TypeError):
+        PricesOnly()
+    with pytest.raises(TypeError):
+        ReturnModel()
+    for model in MODELS.values():
+        model()
+    LocalProvider()
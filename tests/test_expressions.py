@@ -0,0 +1,61 @@
+"""
+The formula engine (utils.expressions) and the screener evaluating it over a packed
+universe panel.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.screener_agent import ScreenerAgent
+from utils.expressions import ExpressionError, compile_expression, evaluate
+
+
+def _frame(index, last_close):
+    close = np.linspace(last_close * 0.8, last_close, len(index))
+    return pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+                         'Volume': np.full(len(index), 1e6)}, index=index)
+
+
+@pytest.fixture(scope="module")
+def mixed_universe():
+    # Equities on business days, crypto every day: different history lengths
+    business = pd.bdate_range(end="2025-06-30", periods=252)
+    calendar = pd.date_range(end="2025-06-29", periods=365)
+    frames = {"AAA": _frame(business, 110.0), "BBB": _frame(business, 55.0), "CRY": _frame(calendar, 82.5)}
+    return ScreenerAgent(symbols=list(frames)).build_universe(frames)
+
+
+def test_arithmetic_logic_and_functions():
+    data = {"close": np.array([1.0, 2.0, 3.0, 4.0]), "Volume": np.array([10.0, 10.0, 10.0, 40.0])}
+    np.testing.assert_allclose(evaluate("avg(close, 2)", data), [np.nan, 1.5, 2.5, 3.5])
+    np.testing.assert_array_equal(evaluate("close > 2 & volume > avg(volume, 2)", data),
+                                  [False, False, False, True])
+    assert evaluate("2 + 3 * 4", {}) == 14
+    assert compile_expression("close + 1") is compile_expression("close + 1")
+
+
+@pytest.mark.parametrize("source", [
+    "__import__('os')", "close.__class__", "[1, 2]", "lambda: 1", "avg(close)", "avg(close, 0)",
+    "avg(close, n=3)", "nope(close)", "", "1" * 400 + "0" * 200, "9" * 400,
+])
+def test_rejected_formulas(source):
+    with pytest.raises(ExpressionError):
+        compile_expression(source).evaluate({"close": np.ones(5)})
+
+
+def test_window_functions_need_a_series():
+    with pytest.raises(ExpressionError, match="needs a series"):
+        evaluate("avg(close, 20)", {"close": 100.0})
+    with pytest.raises(ExpressionError, match="unknown series"):
+        evaluate("rsi", {"close": 1.0})
+
+
+def test_rank_compares_latest_values_across_history_lengths(mixed_universe):
+    rank = mixed_universe.evaluate("rank(close)")
+    assert rank.to_dict() == {"AAA": 100.0, "BBB": 0.0, "CRY": 50.0}
+
+
+def test_screen_filters_and_ranks(mixed_universe):
+    result = ScreenerAgent(symbols=mixed_universe.symbols).screen(mixed_universe, "close > 60", "close", ascending=True)
+    assert list(result.index) == ["CRY", "AAA"]
+    assert result['Score'].tolist() == [82.5, 110.0]
@@ -0,0 +1,81 @@
+"""
+Shared fundamentals snapshots (utils.fundamentals): one info fetch per symbol per TTL.
+"""
+import pytest
+
+from utils import fundamentals
+from utils.data_provider import LocalProvider
+from utils.fundamentals import FundamentalsCache, FundamentalsSnapshot
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+class InfoUpstream(LocalProvider):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+        self.empty = False
+
+    def info(self, ticker):
+        self.calls.append(ticker)
+        return {} if self.empty else {"currentPrice": "101.5", "trailingPE": 20, "pegRatio": "n/a",
+                                      "recommendationKey": "buy"}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    fake = InfoUpstream()
+    monkeypatch.setattr(fundamentals, "get_provider", lambda: fake)
+    return fake
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = Clock()
+    monkeypatch.setattr(fundamentals, "time", fake)
+    return fake
+
+
+def test_snapshot_types_fields_and_keeps_gaps():
+    snap = FundamentalsSnapshot("AAA", {"currentPrice": "101.5", "pegRatio": "n/a", "recommendationKey": "buy"})
+    assert snap.current_price == 101.5
+    assert snap.peg_ratio is None and snap.get("peg_ratio", 1.0) == 1.0
+    assert snap.recommendation == "buy" and not snap.is_empty
+    assert FundamentalsSnapshot("AAA", None).is_empty
+
+
+def test_every_consumer_shares_one_fetch_per_ttl(upstream, clock):
+    cache = FundamentalsCache(ttl=600)
+    first = cache.get("AAA")
+    clock.now += 599
+    assert cache.get("AAA") is first
+    assert upstream.calls == ["AAA"] and cache.hits == 1
+
+    clock.now += 1
+    assert cache.get("AAA") is not first
+    assert upstream.calls == ["AAA", "AAA"]
+
+
+def test_empty_answers_are_not_pinned(upstream, clock):
+    cache = FundamentalsCache(ttl=600)
+    upstream.empty = True
+    assert cache.get("AAA").is_empty
+    upstream.empty = False
+    assert cache.get("AAA").current_price == 101.5
+    assert len(upstream.calls) == 2
+
+
+def test_invalidate_forces_a_refetch(upstream, clock):
+    cache = FundamentalsCache(ttl=600)
+    cache.get("AAA")
+    cache.get("BBB")
+    cache.invalidate("AAA")
+    cache.get("AAA")
+    cache.get("BBB")
+    assert upstream.calls == ["AAA", "BBB", "AAA"]
@@ -0,0 +1,129 @@
+"""
+IndicatorRegistry (utils.indicator_registry): memoized per-symbol nodes, incremental
+updates as bars arrive, and the LRU memory cap.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.indicator_registry import IndicatorRegistry, column_name, column_spec
+from utils.indicators import IndicatorEngine
+from utils.market_data import LocalPriceSource, slice_period, split_by_ticker
+
+COLUMNS = ["SMA_20", "EMA_50", "RSI", "BB_Upper", "DC_Lower", "PSAR", "VWAP"]
+
+
+@pytest.fixture(scope="module")
+def history():
+    raw = LocalPriceSource(end="2024-06-28").download(["AAA"], period="2y")
+    return split_by_ticker(raw, ["AAA"])["AAA"]
+
+
+def test_rolling_window_updates_instead_of_reseeding(history):
+    registry = IndicatorRegistry()
+    before = slice_period(history.iloc[:-5], "1y")
+    after = slice_period(history.iloc[:-3], "1y")
+    assert after.index[0] > before.index[0]
+
+    registry.compute("AAA", before, COLUMNS)
+    seeds = registry.stats["seed"]
+    rolled = registry.compute("AAA", after, COLUMNS)
+    assert registry.stats["seed"] == seeds
+    assert registry.stats["update"] > 0
+
+    # Same values as one pass over the whole span the node has seen, cut to the new window
+    span = history.loc[before.index[0]:after.index[-1]]
+    expected = IndicatorRegistry().compute("AAA", span, COLUMNS).loc[after.index]
+    pd.testing.assert_frame_equal(rolled, expected)
+
+
+def test_shorter_window_on_unchanged_bars_reseeds(history):
+    registry = IndicatorRegistry()
+    year = slice_period(history, "1y")
+    registry.compute("AAA", year, ["SMA_20"])
+    half = slice_period(history, "6mo")
+    out = registry.compute("AAA", half, ["SMA_20"])
+    assert registry.stats["seed"] == 2
+    assert out["SMA_20"].iloc[:19].isna().all()
+
+
+def test_concurrent_composite_evaluations_compute_once(history):
+    registry = IndicatorRegistry()
+    frame = slice_period(history, "1y")
+    start = threading.Barrier(8)
+    results = []
+
+    def run():
+        start.wait()
+        results.append(registry.compute("AAA", frame, ["BB_Upper", "BB_Lower"]))
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+
+    assert len(results) == 8
+    for r in results[1:]:
+        pd.testing.assert_frame_equal(r, results[0])
+    # SMA and STDEV seeded once, BBANDS combined once; everything else was a hit
+    assert registry.stats["seed"] == 2 and registry.stats["update"] == 1
+    assert registry.stats["hit"] == 8 * 2 - 1
+    memory = registry.memory()
+    assert memory["nodes"] == 3
+    assert memory["bytes"] == sum(n.nbytes() for n in registry._nodes.values())
+
+
+def test_only_the_requested_columns_are_computed(history):
+    registry = IndicatorRegistry()
+    frame = slice_period(history, "1y")
+    out = registry.compute("AAA", frame, ["SMA_50", "RSI"])
+    assert list(out.columns) == ["SMA_50", "RSI"]
+    assert sorted(k[2] for k in registry._nodes) == ["RSI", "SMA"]
+    engine = IndicatorEngine().run(frame)
+    for column in out.columns:
+        np.testing.assert_array_equal(out[column].to_numpy(), engine[column].to_numpy())
+
+
+def test_parameterized_columns_follow_the_catalog(history):
+    frame = slice_period(history, "1y")
+    out = IndicatorRegistry().compute("AAA", frame, ["SMA_30", "BB_Upper_30_2.5", "DC_Lower_10"])
+    close = frame["Close"]
+    mid = close.rolling(30).mean()
+    np.testing.assert_allclose(out["SMA_30"], mid, rtol=1e-12)
+    np.testing.assert_allclose(out["BB_Upper_30_2.5"], mid + 2.5 * close.rolling(30).std(ddof=0), rtol=1e-9)
+    np.testing.assert_array_equal(out["DC_Lower_10"], frame["Low"].rolling(10).min())
+
+    assert column_spec("BB_Upper_30_2.5") == ("BBANDS", {"length": 30, "std": 2.5}, "upper")
+    assert column_name("BBANDS", {"length": 30, "std": 2.5}, "upper") == "BB_Upper_30_2.5"
+    assert column_name("BBANDS", {}, "lower") == "BB_Lower"
+    with pytest.raises(ValueError):
+        IndicatorRegistry().compute("AAA", frame, ["SMA_5000"])
+    with pytest.raises(KeyError):
+        column_spec("MACD")
+
+
+def test_least_recently_used_nodes_are_evicted_past_the_cap(history):
+    frame = slice_period(history, "1y")
+    registry = IndicatorRegistry()
+    registry.compute("AAA", frame, ["SMA_20"])
+    size = registry.memory()["bytes"]
+    registry = IndicatorRegistry(max_bytes=int(size * 2.5))
+
+    registry.compute("AAA", frame, ["SMA_20"])
+    registry.compute("AAA", frame, ["SMA_30"])
+    registry.compute("AAA", frame, ["SMA_20"])    # hit: SMA_20 becomes most recent
+    registry.compute("AAA", frame, ["SMA_40"])
+    lengths = [dict(k[3])["length"] for k in registry._nodes]
+    assert lengths == [20, 40]
+    assert registry.stats["evicted"] == 1
+    assert registry.memory()["bytes"] <= registry.max_bytes
+
+    # A node bigger than the whole cap is still kept until something else is computed
+    tiny = IndicatorRegistry(max_bytes=1)
+    tiny.compute("AAA", frame, ["SMA_20"])
+    assert tiny.memory()["nodes"] == 1
+    tiny.forget("AAA")
+    assert tiny.memory() == {"nodes": 0, "bytes": 0, "max_bytes": 1}
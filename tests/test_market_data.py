@@ -0,0 +1,102 @@
+"""
+MarketDataService (utils.market_data): batched downloads, one canonical history per
+symbol, and intraday timeframes. Runs on LocalPriceSource, which records every download.
+"""
+import pandas as pd
+import pytest
+
+from utils.bars import resample_bars
+from utils.market_data import LocalPriceSource, MarketDataService
+
+
+@pytest.fixture
+def source():
+    return LocalPriceSource(end="2024-06-28")
+
+
+@pytest.fixture
+def service(source):
+    return MarketDataService(source=source, canonical_period="1y")
+
+
+def test_one_render_is_one_batched_download(service, source):
+    service.request(["AAA"], period="1y")
+    service.request(["BBB", "CCC"], period="1mo")
+    service.request(["AAA", "DDD"], period="6mo")
+    service.flush()
+    # Every daily request is raised to the canonical period, so they merge into one batch
+    assert [(set(t), p, i) for t, p, i in source.calls] == [({"AAA", "BBB", "CCC", "DDD"}, "1y", "1d")]
+    assert service.download_count == 1
+
+
+def test_fresh_symbols_are_not_downloaded_again(service, source):
+    service.get_close(["AAA", "BBB"], period="1y")
+    service.get_close(["BBB", "AAA"], period="6mo")
+    service.get_ohlcv("AAA", period="1mo")
+    assert len(source.calls) == 1
+
+
+def test_longest_period_wins_within_a_batch(service, source):
+    service.request(["AAA"], period="2y")
+    service.request(["AAA", "BBB"], period="1y")
+    service.flush()
+    assert sorted((t, p) for t, p, _ in source.calls) == [(("AAA",), "2y"), (("BBB",), "1y")]
+
+
+def test_get_close_keeps_the_requested_order(service):
+    closes = service.get_close(["CCC", "AAA", "BBB"], period="1y")
+    assert list(closes.columns) == ["CCC", "AAA", "BBB"]
+    assert isinstance(closes.index, pd.DatetimeIndex) and not closes.empty
+
+
+def test_failed_download_leaves_symbols_missing(service, monkeypatch):
+    def fail(*args, **kwargs):
+        raise ConnectionError("offline")
+
+    monkeypatch.setattr(service.source, "download", fail)
+    assert service.get_ohlcv("AAA").empty
+    assert service.get_close(["AAA"]).empty
+
+
+def test_every_period_is_a_slice_of_the_canonical_history(service, source):
+    year = service.get_ohlcv("AAA", period="1y")
+    month = service.get_ohlcv("AAA", period="1mo")
+    half = service.get_ohlcv("AAA", period="6mo")
+    assert len(source.calls) == 1
+    assert month.index[-1] == year.index[-1] and len(month) < len(half) < len(year)
+    pd.testing.assert_frame_equal(month, year.loc[month.index[0]:])
+    pd.testing.assert_frame_equal(half, year.loc[half.index[0]:])
+
+
+def test_a_short_first_request_still_fetches_the_canonical_period(service, source):
+    service.get_close(["AAA"], period="1mo")
+    service.get_close(["AAA"], period="1y")
+    assert [p for _, p, _ in source.calls] == ["1y"]
+
+
+def test_a_longer_period_than_held_is_refetched(service, source):
+    service.get_ohlcv("AAA", period="1y")
+    two_years = service.get_ohlcv("AAA", period="2y")
+    assert [p for _, p, _ in source.calls] == ["1y", "2y"]
+    assert (two_years.index[-1] - two_years.index[0]).days > 366
+    service.get_ohlcv("AAA", period="1y")
+    assert len(source.calls) == 2
+
+
+def test_coarser_timeframes_are_resampled_from_held_bars(service, source):
+    five = service.get_ohlcv("AAA", period="1mo", interval="5m")
+    fifteen = service.get_ohlcv("AAA", period="1mo", interval="15m")
+    assert [(p, i) for _, p, i in source.calls] == [("1mo", "5m")]
+    pd.testing.assert_frame_equal(fifteen, resample_bars(five, "15m"))
+
+
+def test_four_hour_bars_come_from_hourly_downloads(service, source):
+    bars = service.get_ohlcv("AAA", period="1y", interval="4h")
+    assert [(p, i) for _, p, i in source.calls] == [("1y", "1h")]
+    assert not bars.empty and (bars.index.hour.isin([9, 13])).all()
+
+
+def test_intraday_periods_are_clamped_to_the_lookback(service, source):
+    bars = service.get_ohlcv("AAA", period="1y", interval="1m")
+    assert [(p, i) for _, p, i in source.calls] == [("5d", "1m")]
+    assert (bars.index[-1] - bars.index[0]).days < 7
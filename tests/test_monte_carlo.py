@@ -0,0 +1,138 @@
+"""
+MonteCarloAgent (agents.monte_carlo_agent): vectorized GBM paths, path counts, seed
+reproducibility, variance reduction and the process pool.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from agents import monte_carlo_agent
+from agents.monte_carlo_agent import REPLICATES, MonteCarloAgent, ShockSampler, gbm_paths
+from utils.market_data import LocalPriceSource, split_by_ticker
+
+TICKERS = ["AAA", "BBB", "CCC"]
+
+
+@pytest.fixture(scope="module")
+def frames():
+    raw = LocalPriceSource(end="2024-06-28").download(TICKERS, period="1y")
+    return split_by_ticker(raw, TICKERS)
+
+
+@pytest.fixture(scope="module")
+def returns(frames):
+    return pd.DataFrame({t: f["Close"] for t, f in frames.items()}).pct_change()
+
+
+@pytest.mark.parametrize("simulations", [1000, 5000, 40001])
+def test_portfolio_paths_match_the_request(returns, simulations):
+    summary, metrics = MonteCarloAgent(seed=1).run_portfolio_simulation(
+        returns, {"AAA": 0.5, "BBB": 0.3, "CCC": 0.2}, days=10, simulations=simulations, chunk_size=16384)
+    assert summary.count == simulations
+    assert metrics["Paths"] == f"{simulations:,}"
+
+
+def test_portfolio_simulation_is_reproducible_for_a_seed(returns):
+    weights = {"AAA": 0.5, "BBB": 0.5}
+    first = MonteCarloAgent(seed=3).run_portfolio_simulation(returns, weights, days=10, simulations=2000)[1]
+    second = MonteCarloAgent(seed=3).run_portfolio_simulation(returns, weights, days=10, simulations=2000)[1]
+    other = MonteCarloAgent(seed=4).run_portfolio_simulation(returns, weights, days=10, simulations=2000)[1]
+    assert first == second
+    assert first != other
+
+
+@pytest.fixture
+def small_pool_runs(monkeypatch):
+    # Pool-sized runs without simulating 200k paths
+    monkeypatch.setattr(monte_carlo_agent, "POOL_MIN_PATHS", 2000)
+    yield
+    monte_carlo_agent._reset_simulation_pool()
+
+
+def test_same_seed_same_result_for_any_worker_count(frames, small_pool_runs):
+    df = frames["AAA"]
+    results = [MonteCarloAgent(seed=5).run_simulation(df, days=10, simulations=4000, workers=w)[1]
+               for w in (1, 2)]
+    assert results[0]["Workers"] == 1 and results[1]["Workers"] == 2
+    for key in ("Expected Price", "Bull Case (95%)", "Bear Case (5%)", "Paths", "Expected Price SE"):
+        assert results[0][key] == results[1][key]
+
+
+def test_pool_failure_falls_back_in_process_and_says_so(frames, small_pool_runs, monkeypatch, caplog):
+    def broken(workers=None):
+        raise OSError("no processes")
+
+    monkeypatch.setattr(monte_carlo_agent, "get_simulation_pool", broken)
+    expected = MonteCarloAgent(seed=5).run_simulation(frames["AAA"], days=10, simulations=4000, workers=1)[1]
+    with caplog.at_level("WARNING", logger=monte_carlo_agent.__name__):
+        metrics = MonteCarloAgent(seed=5).run_simulation(frames["AAA"], days=10, simulations=4000, workers=4)[1]
+    assert metrics["Workers"] == 1
+    assert "Simulation pool failed" in caplog.text
+    assert metrics["Expected Price"] == expected["Expected Price"]
+
+
+def test_gbm_paths_shape_and_distribution():
+    mu, sigma, days = 0.0005, 0.02, 30
+    paths = gbm_paths(100.0, mu, sigma, days, 50_000, rng=7)
+    assert paths.shape == (days + 1, 50_000) and paths.dtype == np.float32
+    assert (paths[0] == 100.0).all()
+    np.testing.assert_array_equal(paths, gbm_paths(100.0, mu, sigma, days, 50_000, rng=7))
+
+    log_terminal = np.log(paths[-1].astype(np.float64) / 100.0)
+    assert log_terminal.mean() == pytest.approx(days * (mu - sigma**2 / 2), abs=4 * sigma * np.sqrt(days / 50_000))
+    assert log_terminal.std() == pytest.approx(sigma * np.sqrt(days), rel=0.02)
+
+
+def test_gbm_paths_take_given_shocks():
+    shocks = np.ones((5, 3), dtype=np.float32)
+    paths = gbm_paths(10.0, 0.0, 0.1, 5, 3, shocks=shocks)
+    step = np.exp(0.1 - 0.005)
+    np.testing.assert_allclose(paths[:, 0], 10.0 * step ** np.arange(6), rtol=1e-5)
+
+
+def test_group_sizes_suit_each_sampling_method():
+    assert ShockSampler.group_size("plain", 1000) == 63
+    assert ShockSampler.group_size("antithetic", 1000) == 64
+    assert ShockSampler.group_size("sobol", 1000) == 64
+    assert ShockSampler.group_size("sobol", 16 * 65) == 128
+
+
+def test_sobol_blocks_continue_each_groups_sequence():
+    whole = ShockSampler(5, "sobol", seed=9).draw(64)
+    first = ShockSampler(5, "sobol", seed=9, offset=0).draw(32)
+    second = ShockSampler(5, "sobol", seed=9, offset=32).draw(32)
+    assert whole.shape == (5, REPLICATES * 64)
+    for g in range(REPLICATES):
+        np.testing.assert_array_equal(whole[:, g * 64:g * 64 + 32], first[:, g * 32:(g + 1) * 32])
+        np.testing.assert_array_equal(whole[:, g * 64 + 32:(g + 1) * 64], second[:, g * 32:(g + 1) * 32])
+
+
+def test_antithetic_groups_hold_negated_pairs():
+    shocks = ShockSampler(5, "antithetic", seed=9).draw(64)
+    for g in range(REPLICATES):
+        group = shocks[:, g * 64:(g + 1) * 64]
+        np.testing.assert_array_equal(group[:, :32], -group[:, 32:])
+
+
+def _standard_error(frames, **kwargs):
+    # Metrics are rounded to cents: scale the prices up so the errors have digits to compare
+    df = frames["AAA"] * 1000
+    metrics = MonteCarloAgent(seed=2).run_simulation(df, days=30, simulations=20_000, **kwargs)[1]
+    return float(metrics["Expected Price SE"].strip("$"))
+
+
+def test_variance_reduction_shrinks_the_standard_error(frames):
+    plain = _standard_error(frames)
+    assert _standard_error(frames, method="antithetic") < plain / 2
+    assert _standard_error(frames, control_variate=True) < plain / 2
+    assert _standard_error(frames, method="sobol") < plain / 2
+
+
+def test_target_precision_stops_early(frames):
+    summary, metrics = MonteCarloAgent(seed=2).run_simulation(
+        frames["AAA"], days=30, simulations=1_000_000, chunk_size=4096, target_precision=0.01)
+    assert summary.count < 1_000_000
+    se = float(metrics["Bull Case SE"].strip("$"))
+    bull = float(metrics["Bull Case (95%)"].strip("$"))
+    assert stats.t.ppf(0.975, REPLICATES - 1) * se <= 0.01 * bull
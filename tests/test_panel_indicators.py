@@ -0,0 +1,59 @@
+"""
+Universe-wide indicators (utils.panel_indicators) against the per-symbol IndicatorEngine:
+each symbol's panel column, on its own trading days, must match the engine on its frame.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.indicators import IndicatorEngine
+from utils.market_data import LocalPriceSource, split_by_ticker
+from utils.panel_indicators import (compute_panel_indicators, latest_values, panel_from_frames,
+                                    trailing_returns)
+
+
+@pytest.fixture(scope="module")
+def frames():
+    tickers = ["AAA", "BBB", "CCC"]
+    raw = LocalPriceSource(end="2024-06-28").download(tickers, period="2y")
+    frames = split_by_ticker(raw, tickers)
+    # Different histories and gaps: a late listing and a symbol with missing sessions
+    frames["BBB"] = frames["BBB"].iloc[300:]
+    frames["CCC"] = frames["CCC"].drop(frames["CCC"].index[100:110])
+    return frames
+
+
+@pytest.fixture(scope="module")
+def panel(frames):
+    return panel_from_frames(frames)
+
+
+def test_panel_matches_the_engine_per_symbol(frames, panel):
+    indicators = compute_panel_indicators(panel)
+    for t, frame in frames.items():
+        engine = IndicatorEngine().run(frame)
+        for column in IndicatorEngine.COLUMNS:
+            got = indicators[column][t].reindex(frame.index).to_numpy()
+            np.testing.assert_allclose(got, engine[column].to_numpy(), rtol=1e-9, equal_nan=True,
+                                       err_msg=f"{t} {column}")
+
+
+def test_days_a_symbol_does_not_trade_stay_empty(frames, panel):
+    indicators = compute_panel_indicators(panel)
+    off = panel["Close"].index.difference(frames["CCC"].index)
+    assert len(off) == 10
+    assert indicators["SMA_20"].loc[off, "CCC"].isna().all()
+
+
+def test_latest_values_and_returns_use_each_symbols_last_bar(frames, panel):
+    # AAA misses the last session
+    panel = {field: df.copy() for field, df in panel.items()}
+    for df in panel.values():
+        df.loc[df.index[-1], "AAA"] = np.nan
+    latest = latest_values(compute_panel_indicators(panel), panel)
+    returns = trailing_returns(panel["Close"])
+    aaa = frames["AAA"]["Close"]
+    assert latest.loc["AAA", "Close"] == aaa.iloc[-2]
+    assert returns["Return_5D"]["AAA"] == pytest.approx((aaa.iloc[-2] / aaa.iloc[-7] - 1) * 100)
+    assert returns["Return_1D"]["BBB"] == pytest.approx(
+        (frames["BBB"]["Close"].iloc[-1] / frames["BBB"]["Close"].iloc[-2] - 1) * 100)
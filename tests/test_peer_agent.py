@@ -0,0 +1,72 @@
+"""
+PeerAgent.fetch_peer_data (agents.peer_agent): concurrent peer metrics with a per-symbol
+deadline and partial results.
+"""
+import time
+
+import pytest
+
+from agents import peer_agent
+from agents.peer_agent import PeerAgent
+from utils.fundamentals import FundamentalsSnapshot
+
+INFO = {"currentPrice": 100, "marketCap": 2e9, "trailingPE": 20, "returnOnEquity": 0.1,
+        "profitMargins": 0.2, "revenueGrowth": 0.05}
+
+
+class Snapshots:
+    """Fake get_fundamentals_snapshot with a per-symbol delay or failure."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.slow = {}
+        self.failing = set()
+
+    def __call__(self, ticker):
+        time.sleep(self.slow.get(ticker, self.delay))
+        if ticker in self.failing:
+            raise ConnectionError("offline")
+        return FundamentalsSnapshot(ticker, INFO)
+
+
+@pytest.fixture
+def snapshots(monkeypatch):
+    fake = Snapshots()
+    monkeypatch.setattr(peer_agent, "get_fundamentals_snapshot", fake)
+    return fake
+
+
+def test_concurrent_and_sequential_fetches_agree(snapshots):
+    agent = PeerAgent()
+    concurrent = agent.fetch_peer_data("NVDA")
+    sequential = agent.fetch_peer_data("NVDA", concurrent=False)
+    assert list(concurrent["Ticker"]) == ["NVDA"] + agent.get_peers("NVDA")
+    assert concurrent.equals(sequential)
+    assert concurrent["Market Cap (B)"].iloc[0] == 2.0
+    assert all(v is not None for v in concurrent.attrs["latency"].values())
+
+
+def test_a_slow_symbol_is_dropped_without_holding_the_rest(snapshots, capsys):
+    snapshots.slow["AMD"] = 2.0
+    agent = PeerAgent(timeout=0.3)
+    started = time.monotonic()
+    df = agent.fetch_peer_data("NVDA")
+    assert time.monotonic() - started < 1.0
+    assert "AMD" not in set(df["Ticker"]) and len(df) == 5
+    assert agent.last_latency["AMD"] is None
+    assert "dropped: AMD" in capsys.readouterr().out
+
+
+def test_the_deadline_runs_from_each_symbols_own_start(snapshots):
+    # One fetch at a time: the batch takes ~0.6s, longer than any single symbol's 0.3s budget
+    snapshots.delay = 0.1
+    agent = PeerAgent(max_workers=1, timeout=0.3)
+    df = agent.fetch_peer_data("NVDA")
+    assert len(df) == 6
+
+
+def test_failed_symbols_are_skipped(snapshots, capsys):
+    snapshots.failing.add("INTC")
+    df = PeerAgent().fetch_peer_data("NVDA")
+    assert "INTC" not in set(df["Ticker"]) and len(df) == 5
+    assert "Peer fetch failed for INTC" in capsys.readouterr().out
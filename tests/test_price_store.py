@@ -0,0 +1,68 @@
+"""
+PriceStore (utils.price_store): Parquet history per symbol, refreshed by delta downloads.
+"""
+import pandas as pd
+import pytest
+
+from utils.market_data import LocalPriceSource, split_by_ticker
+from utils.price_store import PriceStore
+
+
+class Upstream:
+    """LocalPriceSource whose last day can be moved forward, like the calendar."""
+
+    def __init__(self, end):
+        self.source = LocalPriceSource(end=end)
+        self.calls = self.source.calls
+
+    def advance(self, end):
+        self.source = LocalPriceSource(end=end)
+        self.source.calls = self.calls
+
+    def download(self, tickers, period="1y", interval="1d", start=None):
+        return self.source.download(tickers, period=period, interval=interval, start=start)
+
+
+@pytest.fixture
+def upstream():
+    return Upstream("2024-06-21")
+
+
+def _expected(end, symbol, first):
+    raw = LocalPriceSource(end=end).download([symbol], period="2y")
+    frame = split_by_ticker(raw, [symbol])[symbol]
+    return frame[frame.index >= first]
+
+
+def test_refresh_fetches_only_the_delta(upstream, tmp_path):
+    store = PriceStore(upstream, root=str(tmp_path), ttl=0)
+    store.refresh(["AAA", "BBB"], period="1y")
+    first = store.load("AAA").index[0]
+    upstream.advance("2024-06-28")
+    store.refresh(["AAA", "BBB"], period="1y")
+
+    assert store.full_downloads == 1 and store.delta_downloads == 1
+    # The delta asks from the last stored bar, which may have been forming
+    assert upstream.calls[-1] == (("AAA", "BBB"), "2024-06-21", "1d")
+    pd.testing.assert_frame_equal(store.load("AAA"), _expected("2024-06-28", "AAA", first), check_freq=False)
+
+
+def test_appending_the_same_delta_twice_changes_nothing(upstream, tmp_path):
+    store = PriceStore(upstream, root=str(tmp_path), ttl=0)
+    store.refresh(["AAA"], period="1y")
+    upstream.advance("2024-06-28")
+    store.refresh(["AAA"], period="1y")
+    once = store.load("AAA")
+    store.refresh(["AAA"], period="1y")
+    store.refresh(["AAA"], period="1y")
+    pd.testing.assert_frame_equal(store.load("AAA"), once)
+    assert not store.load("AAA").index.duplicated().any()
+
+
+def test_history_survives_a_restart(upstream, tmp_path):
+    PriceStore(upstream, root=str(tmp_path)).refresh(["AAA"], period="1y")
+    calls = len(upstream.calls)
+    reopened = PriceStore(upstream, root=str(tmp_path), ttl=600)
+    assert reopened.covers("AAA", "1y")
+    assert not reopened.get("AAA", "1mo").empty
+    assert len(upstream.calls) == calls
@@ -0,0 +1,126 @@
+"""
+The shared upstream limiter (utils.rate_limiter) and the provider wrapper that puts
+price downloads behind it.
+"""
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from utils.data_provider import LocalProvider, RateLimitedProvider
+from utils.market_data import split_by_ticker
+from utils.rate_limiter import CircuitBreaker, CircuitOpenError, RateLimiter, TokenBucket
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_bucket_serves_waiters_in_arrival_order():
+    bucket = TokenBucket(rate=50.0, capacity=1)
+    assert bucket.acquire()
+    order = []
+
+    def take(i):
+        bucket.acquire()
+        order.append(i)
+
+    threads = []
+    for i in range(8):
+        t = threading.Thread(target=take, args=(i,))
+        t.start()
+        threads.append(t)
+        _wait_for(lambda: len(bucket._queue) == i + 1 or len(order) > 0)
+    for t in threads:
+        t.join(5)
+    assert order == list(range(8))
+
+
+def test_bucket_gives_up_early_when_the_queue_cannot_clear():
+    bucket = TokenBucket(rate=1.0, capacity=1)
+    assert bucket.acquire()
+    start = time.monotonic()
+    assert not bucket.acquire(timeout=0.2)
+    assert time.monotonic() - start < 0.1
+    assert not bucket._queue
+
+
+def test_slow_down_halves_the_rate_once_per_cooldown():
+    bucket = TokenBucket(rate=10.0, capacity=5)
+    bucket.slow_down()
+    bucket.slow_down()
+    assert bucket.rate == 5.0
+    assert bucket._tokens <= 0
+
+
+def test_breaker_opens_half_opens_and_closes(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30.0)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    now[0] += 30.0
+    assert breaker.allow() and breaker.state == "half-open"
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    now[0] += 30.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_application_errors_do_not_trip_the_breaker():
+    limiter = RateLimiter(rate=1000.0, capacity=100, failure_threshold=1)
+
+    def unknown_symbol():
+        raise KeyError("no such symbol")
+
+    for _ in range(3):
+        with pytest.raises(KeyError):
+            limiter.call("info", unknown_symbol)
+    assert limiter.breaker("info").state == "closed"
+
+    with pytest.raises(ConnectionError):
+        limiter.call("info", lambda: (_ for _ in ()).throw(ConnectionError("reset")))
+    with pytest.raises(CircuitOpenError):
+        limiter.call("info", lambda: "ok")
+
+
+class DroppingUpstream(LocalProvider):
+    """Behaves like yf.download under throttling: some symbols silently come back empty."""
+
+    def __init__(self, drop):
+        super().__init__()
+        self.drop = set(drop)
+        self.requests = []
+
+    def download(self, tickers, period="1y", interval="1d", start=None):
+        tickers = list(tickers)
+        self.requests.append(tickers)
+        served = [t for t in tickers if t not in self.drop]
+        self.drop = set()
+        if not served:
+            return pd.DataFrame()
+        return super().download(served, period=period, interval=interval, start=start)
+
+
+def test_partial_batch_download_slows_down_and_retries_the_missing_symbols(monkeypatch):
+    monkeypatch.setattr(time, "sleep", lambda s: None)
+    limiter = RateLimiter(rate=1000.0, capacity=100)
+    upstream = DroppingUpstream(drop=["BBB"])
+    provider = RateLimitedProvider(upstream, limiter)
+
+    frames = split_by_ticker(provider.download(["AAA", "BBB"], period="1mo"), ["AAA", "BBB"])
+    assert set(frames) == {"AAA", "BBB"}
+    assert upstream.requests == [["AAA", "BBB"], ["BBB"]]
+    # Halved by the throttle, then one additive step back up for the successful retry
+    assert limiter.throttled == 1 and limiter.bucket.rate == 550.0
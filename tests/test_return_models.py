@@ -0,0 +1,70 @@
+"""
+Return models (utils.return_models) behind the Monte Carlo: each fits a price history and
+fills blocks of daily log returns whose mean is its declared mean_log_return.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.return_models import MODELS, BootstrapModel, GarchModel, JumpDiffusionModel, fit_model, log_returns
+
+
+def _prices(returns):
+    return pd.Series(100 * np.exp(np.cumsum(np.r_[0.0, returns])))
+
+
+@pytest.fixture(scope="module")
+def garch_close():
+    # GARCH(1,1) with omega=2e-6, alpha=0.08, beta=0.9
+    rng = np.random.default_rng(4)
+    n, var, r = 3000, 1e-4, []
+    for z in rng.standard_normal(n):
+        eps = np.sqrt(var) * z
+        r.append(0.0003 + eps)
+        var = 2e-6 + 0.08 * eps**2 + 0.9 * var
+    return _prices(np.array(r))
+
+
+@pytest.mark.parametrize("name", list(MODELS))
+def test_simulated_returns_have_the_declared_mean(garch_close, name):
+    model = fit_model(name, garch_close)
+    out = np.empty((20, 40_000), dtype=np.float32)
+    model.fill(out, np.random.default_rng(1))
+    assert np.isfinite(out).all()
+    per_day = out.mean(dtype=np.float64)
+    assert per_day == pytest.approx(model.mean_log_return, abs=5 * out.std() / np.sqrt(out.size))
+
+
+def test_bootstrap_replays_consecutive_historical_days():
+    # Day i returned i/1000, so every draw names the date it came from
+    close = _prices(np.arange(1, 51) / 1000)
+    model = BootstrapModel(block=5).fit(close)
+    out = np.empty((12, 200), dtype=np.float32)
+    model.fill(out, np.random.default_rng(0))
+    days = np.rint(out * 1000).astype(int) - 1
+    assert set(np.unique(days)) <= set(range(50))
+    # Inside a block the dates run on by one, wrapping around the history
+    steps = np.diff(days, axis=0) % 50
+    assert (steps[[0, 1, 2, 3, 5, 6, 7, 8, 10]] == 1).all()
+    assert model.mean_log_return == pytest.approx(log_returns(close).mean())
+
+
+def test_garch_recovers_the_persistence(garch_close):
+    model = GarchModel().fit(garch_close)
+    assert model.alpha + model.beta == pytest.approx(0.98, abs=0.03)
+    assert model.next_variance > 0 and model.mu == pytest.approx(0.0003, abs=0.0005)
+
+
+def test_jumps_are_separated_from_the_diffusion():
+    rng = np.random.default_rng(8)
+    r = 0.01 * rng.standard_normal(2000)
+    r[::100] += 0.15
+    model = JumpDiffusionModel().fit(_prices(r))
+    assert model.lam == pytest.approx(0.01, abs=0.003)
+    assert model.jump_mu == pytest.approx(0.15, abs=0.02)
+    assert model.scale == pytest.approx(0.01, rel=0.15)
+
+
+def test_unknown_models_are_rejected():
+    with pytest.raises(ValueError):
+        fit_model("heston", _prices(np.zeros(10)))
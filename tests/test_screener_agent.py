@@ -0,0 +1,76 @@
+"""
+ScreenerAgent (agents.screener_agent): one batched download for the universe, and screens
+that agree with checking every symbol one by one.
+"""
+import numpy as np
+import pytest
+
+from agents import screener_agent
+from agents.screener_agent import ScreenerAgent
+from utils.indicators import IndicatorEngine
+from utils.market_data import LocalPriceSource, MarketDataService
+
+SYMBOLS = [f"S{i:02d}" for i in range(60)]
+
+
+@pytest.fixture(scope="module")
+def loaded():
+    source = LocalPriceSource(end="2023-10-27")
+    service = MarketDataService(source=source)
+    patch = pytest.MonkeyPatch()
+    patch.setattr(screener_agent, "get_market_data_service", lambda: service)
+    agent = ScreenerAgent(symbols=SYMBOLS)
+    universe = agent.load_universe()
+    patch.undo()
+    return agent, universe, source, service
+
+
+def test_the_universe_is_one_batched_download(loaded):
+    _, universe, source, _ = loaded
+    assert len(source.calls) == 1 and set(source.calls[0][0]) == set(SYMBOLS)
+    assert universe.symbols == SYMBOLS
+
+
+def test_snapshot_rows_match_each_symbols_own_indicators(loaded):
+    _, universe, _, service = loaded
+    for symbol in SYMBOLS[:5]:
+        frame = service.get_ohlcv(symbol)
+        last = IndicatorEngine().run(frame).iloc[-1]
+        row = universe.snapshot.loc[symbol]
+        assert row["SMA_50"] == pytest.approx(last["SMA_50"], rel=1e-9)
+        assert row["RSI"] == pytest.approx(last["RSI"], rel=1e-9)
+        assert row["Dist_SMA_200"] == pytest.approx((frame["Close"].iloc[-1] / last["SMA_200"] - 1) * 100)
+        assert row["Return_21D"] == pytest.approx((frame["Close"].iloc[-1] / frame["Close"].iloc[-22] - 1) * 100)
+
+
+@pytest.mark.parametrize("preset", list(ScreenerAgent.PRESETS))
+def test_presets_agree_with_a_per_symbol_check(loaded, preset):
+    agent, universe, _, service = loaded
+    filter_formula, rank_formula, ascending = ScreenerAgent.PRESETS[preset]
+    result = agent.screen(universe, filter_formula, rank_formula, ascending=ascending)
+
+    expected = []
+    for symbol in SYMBOLS:
+        frame = service.get_ohlcv(symbol)
+        ind = IndicatorEngine().run(frame).iloc[-1]
+        close, volume = frame["Close"], frame["Volume"]
+        checks = {
+            "Oversold in uptrend": ind["RSI"] < 30 and close.iloc[-1] > ind["SMA_200"],
+            "Momentum leaders": close.iloc[-1] > ind["SMA_50"] and ind["SMA_50"] > ind["SMA_200"],
+            "Volume surge": volume.iloc[-1] > 2 * volume.iloc[-20:].mean(),
+            "Overbought": ind["RSI"] > 70,
+            "Below 200-day": close.iloc[-1] < ind["SMA_200"],
+        }
+        if checks[preset]:
+            expected.append(symbol)
+    assert expected and sorted(result.index) == expected
+    scores = result["Score"].to_numpy()
+    assert (np.diff(scores) >= 0).all() if ascending else (np.diff(scores) <= 0).all()
+
+
+def test_limit_keeps_the_best_ranked(loaded):
+    agent, universe, _, _ = loaded
+    everything = agent.screen(universe, "close > 0", "change(close, 21)")
+    top = agent.screen(universe, "close > 0", "change(close, 21)", limit=3)
+    assert len(everything) == len(SYMBOLS)
+    assert list(top.index) == list(everything.index[:3])
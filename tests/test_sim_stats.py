@@ -0,0 +1,91 @@
+"""
+Streaming simulation statistics (utils.sim_stats): summaries folded one block at a time
+must agree with statistics of the whole run, and merge across independent runs.
+"""
+import numpy as np
+import pytest
+
+from utils.sim_stats import PathSummary, QuantileSketch, RunningCovariance, RunningMoments
+
+
+@pytest.fixture(scope="module")
+def terminal():
+    return 100 * np.exp(np.random.default_rng(11).normal(0, 0.1, 200_000))
+
+
+def test_running_moments_match_the_full_array(terminal):
+    moments = RunningMoments()
+    for block in np.array_split(terminal, 7):
+        moments.update(block)
+    assert moments.count == len(terminal)
+    assert moments.mean == pytest.approx(terminal.mean(), rel=1e-12)
+    assert moments.std == pytest.approx(terminal.std(ddof=1), rel=1e-10)
+
+
+def test_running_covariance_merges_exactly():
+    rng = np.random.default_rng(2)
+    x = rng.normal(size=10_000)
+    y = 2 * x + rng.normal(size=10_000)
+    left, right = RunningCovariance(), RunningCovariance()
+    left.update(x[:3000], y[:3000])
+    right.update(x[3000:], y[3000:])
+    left.merge(right)
+    assert left.cxy / left.m2x == pytest.approx(np.cov(x, y)[0, 1] / x.var(ddof=1), rel=1e-10)
+
+
+def test_sketch_quantiles_are_within_the_relative_accuracy(terminal):
+    sketch = QuantileSketch(accuracy=0.001)
+    for block in np.array_split(terminal, 5):
+        sketch.add(block)
+    for q in (0.01, 0.05, 0.5, 0.95, 0.99):
+        exact = np.quantile(terminal, q)
+        assert abs(sketch.quantile(q) / exact - 1) <= 0.001
+
+
+def test_merged_sketches_equal_one_sketch_over_everything(terminal):
+    whole, left, right = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    whole.add(terminal)
+    left.add(terminal[:50_000])
+    right.add(terminal[50_000:])
+    left.merge(right)
+    np.testing.assert_array_equal(left.quantile([0.05, 0.5, 0.95]), whole.quantile([0.05, 0.5, 0.95]))
+    coarse = QuantileSketch(accuracy=0.01)
+    coarse.add(terminal[:10])
+    with pytest.raises(ValueError):
+        left.merge(coarse)
+
+
+def test_path_summary_stays_small_and_merges():
+    rng = np.random.default_rng(5)
+    blocks = [100 * np.exp(np.cumsum(np.r_[np.zeros((1, 4000)), rng.normal(0, 0.01, (10, 4000))], axis=0))
+              for _ in range(6)]
+    streamed = PathSummary(10, seed=1)
+    for block in blocks:
+        streamed.add(block)
+    full = np.concatenate(blocks, axis=1)
+    assert streamed.count == full.shape[1]
+    assert streamed.display.shape == (11, 50)
+    np.testing.assert_allclose(streamed.mean_path, full.mean(axis=1), rtol=1e-10)
+
+    first, second = PathSummary(10, seed=2), PathSummary(10, seed=3)
+    for block in blocks[:2]:
+        first.add(block)
+    for block in blocks[2:]:
+        second.add(block)
+    first.merge(second)
+    assert first.count == streamed.count and first.display.shape == (11, 50)
+    np.testing.assert_allclose(first.mean_path, streamed.mean_path, rtol=1e-12)
+    assert first.moments.mean == pytest.approx(streamed.moments.mean, rel=1e-12)
+    assert first.quantile(0.95) == streamed.quantile(0.95)
+
+
+def test_reservoir_keeps_every_path_equally_likely():
+    # Path i is its own index in every row; count how often each survives
+    kept = np.zeros(1000)
+    for seed in range(200):
+        summary = PathSummary(1, display_paths=50, seed=seed)
+        for start in range(0, 1000, 100):
+            summary.add(np.tile(np.arange(start, start + 100, dtype=np.float64), (2, 1)))
+        kept[summary.display[0].astype(int)] += 1
+    # Expected 200 * 50 / 1000 = 10 per path; early and late paths alike
+    assert kept[:500].sum() == pytest.approx(kept[500:].sum(), rel=0.1)
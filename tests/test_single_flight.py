@@ -0,0 +1,105 @@
+"""
+Request coalescing (utils.single_flight) and the provider wrapper built on it.
+"""
+import threading
+import time
+
+from utils.data_provider import LocalProvider, SingleFlightProvider
+from utils.single_flight import SingleFlight
+
+
+class SlowUpstream(LocalProvider):
+    """Blocks every call until released, so concurrent callers overlap."""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def _record(self, call):
+        with self._lock:
+            self.calls.append(call)
+        self.gate.wait(5)
+
+    def info(self, ticker):
+        self._record(("info", ticker))
+        return {"symbol": ticker}
+
+    def download(self, tickers, period="1y", interval="1d", start=None):
+        self._record(("prices", tuple(tickers), period))
+        return super().download(tickers, period=period, interval=interval, start=start)
+
+
+def _run_concurrently(n, fn):
+    results, errors = [None] * n, []
+
+    def one(i):
+        try:
+            results[i] = fn(i)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=one, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    return threads, results, errors
+
+
+def _wait_for_followers(flight, followers):
+    for _ in range(5000):
+        if flight.stats()["coalesced"] >= followers:
+            return
+        time.sleep(0.001)
+    raise AssertionError("callers never joined the flight")
+
+
+def test_concurrent_identical_calls_run_once():
+    flight, upstream = SingleFlight(), SlowUpstream()
+    provider = SingleFlightProvider(upstream, flight)
+    threads, results, errors = _run_concurrently(8, lambda i: provider.info("AAPL"))
+    _wait_for_followers(flight, 7)
+    upstream.gate.set()
+    for t in threads:
+        t.join(5)
+
+    assert not errors
+    assert upstream.calls == [("info", "AAPL")]
+    assert all(r == {"symbol": "AAPL"} for r in results)
+    assert flight.stats() == {"executed": 1, "coalesced": 7, "in_flight": 0}
+
+
+def test_different_keys_do_not_coalesce():
+    flight, upstream = SingleFlight(), SlowUpstream()
+    upstream.gate.set()
+    provider = SingleFlightProvider(upstream, flight)
+    provider.download(["AAA"], period="1y")
+    provider.download(["AAA"], period="6mo")
+    provider.info("AAA")
+    assert len(upstream.calls) == 3
+    assert flight.stats()["coalesced"] == 0
+
+
+def test_followers_share_the_leaders_exception():
+    flight = SingleFlight()
+    gate = threading.Event()
+
+    def fail():
+        gate.wait(5)
+        raise TimeoutError("upstream timed out")
+
+    threads, _, errors = _run_concurrently(4, lambda i: flight.do("k", fail))
+    _wait_for_followers(flight, 3)
+    gate.set()
+    for t in threads:
+        t.join(5)
+    assert len(errors) == 4 and all(isinstance(e, TimeoutError) for e in errors)
+    assert flight.stats()["executed"] == 1
+
+
+def test_a_finished_flight_does_not_serve_later_calls():
+    flight, calls = SingleFlight(), []
+    for _ in range(3):
+        flight.do("k", calls.append, 1)
+    assert len(calls) == 3
+    assert flight.stats() == {"executed": 3, "coalesced": 0, "in_flight": 0}
@@ -0,0 +1,100 @@
+"""
+Live quote pipeline (utils.streaming): bar aggregation on each symbol's trading calendar
+and running indicators that agree with the batch registry.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.bars import ALWAYS_OPEN, trading_calendar
+from utils.indicator_registry import IndicatorRegistry
+from utils.market_data import LocalPriceSource, split_by_ticker
+from utils.streaming import LIVE_COLUMNS, BarAggregator, QuoteStream, StreamingIndicators
+
+
+def _ts(stamp, tz="America/New_York"):
+    return pd.Timestamp(stamp, tz=tz).value // 1_000_000_000
+
+
+def _date(start):
+    return pd.Timestamp(start, unit="s").strftime("%Y-%m-%d")
+
+
+def test_equity_daily_bars_skip_weekends_holidays_and_off_hours():
+    agg = BarAggregator("1d", calendar=trading_calendar("AAPL"))
+    ticks = [
+        _ts("2024-07-03 10:00"), _ts("2024-07-03 15:59"),
+        _ts("2024-07-03 20:30"),    # after the close, already 2024-07-04 in UTC
+        _ts("2024-07-04 11:00"),    # Independence Day
+        _ts("2024-07-06 11:00"),    # Saturday
+        _ts("2024-07-08 09:30"),
+    ]
+    closed = [agg.on_tick(ts, 100.0 + i) for i, ts in enumerate(ticks)]
+    closed = [c for c in closed if c is not None]
+
+    assert [_date(start) for start, _ in closed] == ["2024-07-03"]
+    assert closed[0][1] == (100.0, 101.0, 100.0, 101.0, 0.0)
+    assert _date(agg.start) == "2024-07-08" and agg.forming[0] == 105.0
+    assert agg.skipped == 3
+
+
+def test_crypto_daily_bars_run_through_the_weekend():
+    agg = BarAggregator("1d", calendar=trading_calendar("BTC-USD"))
+    assert trading_calendar("BTC-USD") is ALWAYS_OPEN
+    days = ["2024-07-05 23:00", "2024-07-06 12:00", "2024-07-07 12:00", "2024-07-08 00:30"]
+    closed = [agg.on_tick(_ts(d, "UTC"), 1.0) for d in days]
+    assert [_date(c[0]) for c in closed if c] == ["2024-07-05", "2024-07-06", "2024-07-07"]
+    assert agg.skipped == 0
+
+
+def test_equity_hourly_bars_are_anchored_on_the_open():
+    agg = BarAggregator("1h", calendar=trading_calendar("AAPL"))
+    agg.on_tick(_ts("2024-07-08 09:45"), 1.0)
+    closed = agg.on_tick(_ts("2024-07-08 10:31"), 2.0)
+    local = pd.Timestamp(closed[0], unit="s", tz="UTC").tz_convert("America/New_York")
+    assert local.strftime("%H:%M") == "09:30"
+    assert pd.Timestamp(agg.start, unit="s", tz="UTC").tz_convert("America/New_York").strftime("%H:%M") == "10:30"
+
+
+class ReplayTicks:
+    def __init__(self, ticks):
+        self.ticks = ticks
+
+    def poll(self):
+        ticks, self.ticks = self.ticks, []
+        return ticks
+
+
+@pytest.fixture(scope="module")
+def history():
+    raw = LocalPriceSource(end="2024-06-28").download(["AAA"], period="1y")
+    return split_by_ticker(raw, ["AAA"])["AAA"]
+
+
+def test_stream_over_a_weekend_commits_only_session_days(history):
+    # History ends on Friday 2024-06-28; quote every 15 minutes through Tuesday
+    start = _ts("2024-06-28 09:30")
+    ticks = [(float(ts), 50.0, 100.0) for ts in range(start, _ts("2024-07-02 16:00"), 900)]
+    stream = QuoteStream("AAA", history, ReplayTicks(ticks))
+    committed = []
+    commit = stream.indicators.commit
+
+    def recording_commit(bar, session=None):
+        committed.append(session)
+        return commit(bar, session)
+
+    stream.indicators.commit = recording_commit
+    stream.pump()
+
+    dates = [pd.Timestamp(int(s), unit="D").strftime("%Y-%m-%d") for s in committed]
+    assert dates == ["2024-06-28", "2024-07-01"]
+    assert _date(stream.aggregator.start) == "2024-07-02"
+
+
+def test_streaming_indicators_match_the_registry(history):
+    streaming = StreamingIndicators(LIVE_COLUMNS)
+    streaming.seed(history.iloc[:-1])
+    live = streaming.peek(tuple(history.iloc[-1][["Open", "High", "Low", "Close", "Volume"]].astype(float)))
+    batch = IndicatorRegistry().compute("AAA", history, LIVE_COLUMNS).iloc[-1]
+    for col in LIVE_COLUMNS:
+        assert np.isclose(live[col], batch[col], rtol=1e-12, atol=0), col
@@ -0,0 +1,214 @@
+"""
+Stale-while-revalidate serving (utils.swr_cache) and its composition with the
+single-flight layer, as app.py's loaders use them. Time is driven by a fake clock.
+"""
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from agents.technical_agent import AnalysisContext
+from utils import swr_cache
+from utils.single_flight import SingleFlight
+from utils.swr_cache import StaleWhileRevalidateCache, get_swr_cache, swr_cached
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(swr_cache, "time", fake)
+    return fake
+
+
+class Loader:
+    """Returns "v1", "v2", ... and can be made to fail or block."""
+
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+        self.gate = None
+
+    def __call__(self, *args):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return f"v{self.calls}"
+
+
+def settle(cache, timeout=5):
+    """Waits for background refreshes to finish."""
+    deadline = time.monotonic() + timeout
+    while any(entry.refreshing for entry in cache._entries.values()):
+        assert time.monotonic() < deadline, "background refresh didn't finish"
+        time.sleep(0.001)
+
+
+def test_fresh_entries_are_served_without_calling_the_loader(clock):
+    cache, load = StaleWhileRevalidateCache(ttl=10, max_stale=100), Loader()
+    assert cache.get(("k",), load) == "v1"
+    clock.now += 9
+    assert cache.get(("k",), load) == "v1"
+    assert load.calls == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_stale_entry_is_served_at_once_and_refreshed_once_in_background(clock):
+    cache, load = StaleWhileRevalidateCache(ttl=10, max_stale=100), Loader()
+    cache.get(("k",), load)
+    clock.now += 11
+    load.gate = threading.Event()
+    # Every render inside the stale window gets the old value; only one refresh is queued
+    assert [cache.get(("k",), load) for _ in range(5)] == ["v1"] * 5
+    assert cache.age(("k",)) == (11, True, True)
+    load.gate.set()
+    settle(cache)
+    assert load.calls == 2
+    assert cache.get(("k",), load) == "v2"
+    age, stale, refreshing = cache.age(("k",))
+    assert not stale and not refreshing
+    assert cache.stats()["stale_hits"] == 5 and cache.stats()["refreshes"] == 1
+
+
+def test_failed_refresh_keeps_the_previous_value_and_retries(clock, capsys):
+    cache, load = StaleWhileRevalidateCache(ttl=10, max_stale=100), Loader()
+    cache.get(("k",), load)
+    clock.now += 11
+    load.fail = True
+    assert cache.get(("k",), load) == "v1"
+    settle(cache)
+    assert "Error refreshing k: upstream down" in capsys.readouterr().out
+    assert cache.age(("k",))[1:] == (True, False)
+    assert cache._entries[("k",)].error == "upstream down"
+
+    # Still served stale, and the next render schedules another attempt
+    load.fail = False
+    assert cache.get(("k",), load) == "v1"
+    settle(cache)
+    assert cache.get(("k",), load) == "v3"
+
+
+def test_entries_past_max_stale_are_refetched_in_the_caller(clock):
+    cache, load = StaleWhileRevalidateCache(ttl=10, max_stale=100), Loader()
+    cache.get(("k",), load)
+    clock.now += 101
+    assert cache.get(("k",), load) == "v2"
+    assert cache.stats()["misses"] == 2 and cache.stats()["stale_hits"] == 0
+
+
+def test_failed_miss_raises_and_caches_nothing(clock):
+    cache, load = StaleWhileRevalidateCache(ttl=10, max_stale=100), Loader()
+    load.fail = True
+    with pytest.raises(RuntimeError):
+        cache.get(("k",), load)
+    assert cache.age(("k",)) == (None, False, False)
+
+
+def test_decorated_loader_returns_copies_and_survives_reruns(clock):
+    source = Loader()
+
+    def define():
+        # What a Streamlit rerun does: execute the decorator again
+        @swr_cached(ttl=10, max_stale=100)
+        def load_rows(ticker):
+            return {"ticker": ticker, "rows": [source()]}
+        return load_rows
+
+    first = define()
+    first.clear()
+    rows = first("AAPL")
+    rows["rows"].append("mutated")
+    assert first("AAPL") == {"ticker": "AAPL", "rows": ["v1"]}
+    assert define().cache is first.cache
+    assert define()("AAPL") == {"ticker": "AAPL", "rows": ["v1"]}
+    assert first.age("AAPL")[0] == 0
+    assert source.calls == 1
+
+
+def test_get_swr_cache_updates_ttls_of_the_existing_store():
+    store = get_swr_cache("tests.ttl", ttl=5, max_stale=50)
+    assert get_swr_cache("tests.ttl", ttl=7, max_stale=70) is store
+    assert (store.ttl, store.max_stale) == (7, 70)
+
+
+def test_concurrent_cold_misses_coalesce_through_single_flight(clock):
+    # app.py: swr_cached loader -> SingleFlight.do -> upstream
+    cache, flight, load = StaleWhileRevalidateCache(ttl=10, max_stale=100), SingleFlight(), Loader()
+    load.gate = threading.Event()
+    results = []
+
+    def render():
+        results.append(cache.get(("k",), flight.do, ("fetch", "k"), load))
+
+    threads = [threading.Thread(target=render) for _ in range(8)]
+    for t in threads:
+        t.start()
+    while flight.stats()["coalesced"] < 7:
+        time.sleep(0.001)
+    load.gate.set()
+    for t in threads:
+        t.join(5)
+    assert results == ["v1"] * 8
+    assert load.calls == 1
+    assert flight.stats() == {"executed": 1, "coalesced": 7, "in_flight": 0}
+
+
+def test_single_flight_shares_the_leaders_exception():
+    flight, load = SingleFlight(), Loader()
+    load.fail, load.gate = True, threading.Event()
+    errors = []
+
+    def call():
+        try:
+            flight.do("k", load)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for t in threads:
+        t.start()
+    while flight.stats()["coalesced"] < 3:
+        time.sleep(0.001)
+    load.gate.set()
+    for t in threads:
+        t.join(5)
+    assert len(errors) == 4 and load.calls == 1
+
+
+def test_snapshot_replaces_the_deep_copy(clock):
+    frame = pd.DataFrame({"Close": [1.0, 2.0, 3.0]})
+
+    @swr_cached(ttl=10, max_stale=100, snapshot=AnalysisContext.snapshot)
+    def load_context(ticker):
+        return AnalysisContext(ticker, frame, {"current_price": 3.0}, version="v")
+
+    load_context.clear()
+    first = load_context("AAPL")
+    first.df["Close"] = 0.0
+    first.df["Extra"] = 1.0
+    first.summary["current_price"] = 0.0
+
+    second = load_context("AAPL")
+    assert second is not first
+    assert list(second.df.columns) == ["Close"] and second.df["Close"].tolist() == [1.0, 2.0, 3.0]
+    assert second.summary == {"current_price": 3.0}
+    assert frame["Close"].tolist() == [1.0, 2.0, 3.0]
+
+
+def test_snapshot_none_shares_the_cached_object(clock):
+    @swr_cached(ttl=10, max_stale=100, snapshot=None)
+    def load_shared(ticker):
+        return {"ticker": ticker}
+
+    load_shared.clear()
+    assert load_shared("AAPL") is load_shared("AAPL")
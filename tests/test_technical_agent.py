@@ -0,0 +1,54 @@
+"""
+TechnicalAnalyst.get_context (agents.technical_agent): one fetch and one indicator pass per
+data version, shared by every consumer.
+"""
+import pytest
+
+from agents import technical_agent
+from agents.technical_agent import TechnicalAnalyst
+from utils.indicator_registry import IndicatorRegistry
+from utils.market_data import LocalPriceSource, MarketDataService
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = MarketDataService(source=LocalPriceSource(end="2024-06-21"))
+    monkeypatch.setattr(technical_agent, "get_market_data_service", lambda: service)
+    monkeypatch.setattr(technical_agent, "_contexts", {})
+    return service
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = IndicatorRegistry()
+    monkeypatch.setattr(technical_agent, "get_indicator_registry", lambda: registry)
+    return registry
+
+
+def test_unchanged_bars_return_the_same_context(service, registry):
+    context = TechnicalAnalyst("AAA").get_context()
+    again = TechnicalAnalyst("AAA").get_context()
+    assert again is context
+    assert TechnicalAnalyst("AAA").get_summary() is context.summary
+    # One seed per summary column, nothing recomputed or even looked up afterwards
+    assert registry.stats == {"hit": 0, "update": 0, "seed": 4, "evicted": 0}
+    assert list(context.df.columns[5:]) == TechnicalAnalyst.SUMMARY_COLUMNS
+    assert context.summary["current_price"] == context.df["Close"].iloc[-1]
+
+
+def test_new_bars_build_a_new_context(service, registry):
+    context = TechnicalAnalyst("AAA").get_context()
+    service.source = LocalPriceSource(end="2024-06-28")
+    service.clear()
+    newer = TechnicalAnalyst("AAA").get_context()
+    assert newer is not context and newer.version != context.version
+    assert newer.df.index[-1] > context.df.index[-1]
+
+
+def test_snapshots_do_not_leak_writes_into_the_shared_context(service, registry):
+    context = TechnicalAnalyst("AAA").get_context()
+    copy = context.snapshot()
+    copy.df["Close"] = 0.0
+    copy.summary["sentiment"] = "edited"
+    assert (context.df["Close"] > 0).all()
+    assert context.summary["sentiment"] != "edited"
@@ -0,0 +1,39 @@
+"""
+Background warm-up (utils.warmup.WarmupScheduler): pass interval and visit priority.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from utils import warmup
+from utils.warmup import WarmupScheduler
+
+
+@pytest.fixture
+def service(monkeypatch):
+    fake = SimpleNamespace(ttl=900)
+    monkeypatch.setattr(warmup, "get_market_data_service", lambda: fake)
+    return fake
+
+
+def test_interval_follows_the_shortest_ttl_warmed(service):
+    scheduler = WarmupScheduler(["AAA"])
+    assert scheduler.pass_interval() == pytest.approx(0.8 * 900)
+    scheduler.register("fundamentals", lambda s: None, ttl=600)
+    scheduler.register("news", lambda s: None, ttl=1200)
+    assert scheduler.pass_interval() == pytest.approx(0.8 * 600)
+
+
+def test_fixed_interval_wins(service):
+    scheduler = WarmupScheduler(["AAA"], interval=30)
+    scheduler.register("fundamentals", lambda s: None, ttl=600)
+    assert scheduler.pass_interval() == 30
+
+
+def test_viewed_symbols_go_first(service):
+    scheduler = WarmupScheduler(["AAA", "BBB", "CCC"])
+    assert scheduler.priority_order() == ["AAA", "BBB", "CCC"]
+    scheduler.record_access("CCC")
+    scheduler.record_access("BBB")
+    scheduler.record_access("BBB")
+    assert scheduler.priority_order() == ["BBB", "CCC", "AAA"]
@@ -0,0 +1,268 @@
+import os
+import zlib
+import numpy as np
+import pandas as pd
+
+BAR_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Bar length in seconds for every timeframe the terminal understands
+INTERVAL_SECONDS = {
+    "1m": 60, "5m": 300, "15m": 900, "30m": 1800,
+    "1h": 3600, "4h": 4 * 3600, "1d": 86400
+}
+
+# Timeframes the upstream can serve directly and how far back it keeps them (yfinance limits:
+# 1m bars only for the last week per request, 5m-30m for 60 days, hourly for two years).
+# Anything else ("4h") only exists as a resample of a finer stored series.
+FETCH_LOOKBACK_DAYS = {"1m": 7, "5m": 60, "15m": 60, "30m": 60, "1h": 730}
+
+# How much intraday history the price store keeps per symbol; older bars are dropped on write
+RETENTION_DAYS = {"1m": 30, "5m": 60, "15m": 60, "30m": 60, "1h": 730, "4h": 730}
+_retention_cap = os.getenv("QA_INTRADAY_RETENTION_DAYS")
+if _retention_cap:
+    RETENTION_DAYS = {k: min(v, int(_retention_cap)) for k, v in RETENTION_DAYS.items()}
+
+_NS = 1_000_000_000
+_DAY_NS = 86400 * _NS
+
+
+def is_intraday(interval):
+    return interval in INTERVAL_SECONDS and interval != "1d"
+
+
+def finer_intervals(interval):
+    """Intraday intervals that tile `interval` exactly, finest first (excluding itself)."""
+    if interval not in INTERVAL_SECONDS:
+        return []
+    step = INTERVAL_SECONDS[interval]
+    return sorted((i for i, s in INTERVAL_SECONDS.items() if i != "1d" and s < step and step % s == 0),
+                  key=INTERVAL_SECONDS.get)
+
+
+def fetch_interval(interval, days):
+    """
+    Interval to download when `interval` over `days` isn't held yet: the interval itself
+    if upstream serves it that far back, otherwise the coarsest finer one that does.
+    """
+    if interval == "1d" or FETCH_LOOKBACK_DAYS.get(interval, 0) >= days:
+        return interval
+    servable = [i for i in finer_intervals(interval) if i in FETCH_LOOKBACK_DAYS]
+    covering = [i for i in servable if FETCH_LOOKBACK_DAYS[i] >= days]
+    if covering:
+        return covering[-1]
+    if interval in FETCH_LOOKBACK_DAYS or not servable:
+        return interval
+    return max(servable, key=FETCH_LOOKBACK_DAYS.get)
+
+
+def lookback_days(interval):
+    """Longest history that can exist for an interval (fetched directly or resampled)."""
+    if interval == "1d":
+        return None
+    options = [FETCH_LOOKBACK_DAYS[i] for i in [interval] + finer_intervals(interval) if i in FETCH_LOOKBACK_DAYS]
+    return max(options) if options else None
+
+
+def _wall_ns(index):
+    """Nanosecond wall-clock times; sessions are bucketed on exchange-local time."""
+    if getattr(index, "tz", None) is not None:
+        index = index.tz_localize(None)
+    return index.as_unit('ns').asi8
+
+
+def session_days(index):
+    """
+    Session key of each bar: its exchange-local calendar day (days since 1970-01-01, as
+    float). Session-anchored indicators (VWAP) restart when it changes.
+    """
+    return (_wall_ns(pd.DatetimeIndex(index)) // _DAY_NS).astype(float)
+
+
+class TradingCalendar:
+    """
+    When a symbol trades, for bucketing live quotes: session weekdays (Mon=0) minus
+    `holidays`, between `open` and `close` (seconds after local midnight; None = all day)
+    on the wall clock of `tz`. Daily bars are that local date; intraday bars are anchored
+    on the session open, like the exchange's own.
+    """
+
+    def __init__(self, tz="UTC", weekdays=range(7), holidays=(), open=None, close=None):
+        self.tz = tz
+        self.weekdays = frozenset(weekdays)
+        self.holidays = frozenset(int(pd.Timestamp(d).value // _DAY_NS) for d in holidays)
+        self.open = open
+        self.close = close
+        self._offset = (None, 0)   # (epoch hour, UTC offset in seconds), swapped in one piece
+
+    def _utc_offset(self, ts):
+        # Offsets only change on the hour (DST), so one lookup per hour of quotes
+        hour = int(ts // 3600)
+        cached, offset = self._offset
+        if hour != cached:
+            stamp = pd.Timestamp(hour * 3600, unit="s", tz="UTC").tz_convert(self.tz)
+            offset = int(stamp.utcoffset().total_seconds())
+            self._offset = (hour, offset)
+        return offset
+
+    def wall(self, ts):
+        """Epoch seconds -> seconds on the local wall clock (as if it were UTC)."""
+        return ts + self._utc_offset(ts)
+
+    def trades(self, ts):
+        """Is `ts` (epoch seconds) inside a session?"""
+        wall = self.wall(ts)
+        day = int(wall // 86400)
+        # 1970-01-01 was a Thursday (weekday 3)
+        if (day + 3) % 7 not in self.weekdays or day in self.holidays:
+            return False
+        return self.open is None or self.open <= wall - day * 86400 < self.close
+
+    def bucket(self, ts, step):
+        """
+        Start of the bar holding `ts`: for daily bars the local date as naive-UTC epoch
+        seconds (how daily history is indexed); intraday, epoch seconds of the bar start.
+        """
+        wall = self.wall(ts)
+        day = wall - wall % 86400
+        if step >= 86400:
+            return day
+        anchor = day + (self.open or 0)
+        return anchor + (wall - anchor) // step * step - (wall - ts)
+
+
+# Crypto trades around the clock; every other symbol follows the NYSE regular session
+ALWAYS_OPEN = TradingCalendar()
+
+
+def _nyse_holidays(start="1990-01-01", end="2100-12-31"):
+    from pandas.tseries.holiday import (AbstractHolidayCalendar, Holiday, GoodFriday, USMartinLutherKingJr,
+                                        USPresidentsDay, USMemorialDay, USLaborDay, USThanksgivingDay,
+                                        nearest_workday, sunday_to_monday)
+
+    class NYSEHolidays(AbstractHolidayCalendar):
+        rules = [
+            # A Saturday New Year's Day isn't moved to the Friday before
+            Holiday("New Year's Day", month=1, day=1, observance=sunday_to_monday),
+            USMartinLutherKingJr, USPresidentsDay, GoodFriday, USMemorialDay,
+            Holiday("Juneteenth", month=6, day=19, start_date="2022-01-01", observance=nearest_workday),
+            Holiday("Independence Day", month=7, day=4, observance=nearest_workday),
+            USLaborDay, USThanksgivingDay,
+            Holiday("Christmas", month=12, day=25, observance=nearest_workday),
+        ]
+
+    return NYSEHolidays().holidays(start, end)
+
+
+_calendars = {}
+
+
+def trading_calendar(symbol):
+    """TradingCalendar for a Yahoo symbol ("BTC-USD" and other -USD pairs are crypto)."""
+    kind = "crypto" if str(symbol).upper().endswith("-USD") else "equity"
+    if kind not in _calendars:
+        if kind == "crypto":
+            _calendars[kind] = ALWAYS_OPEN
+        else:
+            _calendars[kind] = TradingCalendar("America/New_York", weekdays=range(5), holidays=_nyse_holidays(),
+                                               open=9 * 3600 + 30 * 60, close=16 * 3600)
+    return _calendars[kind]
+
+
+def resample_bars(df, interval):
+    """
+    OHLCV bars -> coarser bars (open=first, high=max, low=min, close=last, volume=sum).
+    Intraday buckets are anchored on each day's first bar, so hourly bars from a 09:30 open
+    are 09:30-10:30 like the exchange's own; "1d" buckets by calendar date.
+    Expects sorted input; one numpy reduceat pass per field.
+    """
+    if df is None or df.empty:
+        return df
+    if interval not in INTERVAL_SECONDS:
+        raise ValueError(f"Unknown interval: {interval}")
+    ts = _wall_ns(df.index)
+    day = ts // _DAY_NS
+    if interval == "1d":
+        bucket = day * _DAY_NS
+    else:
+        step = INTERVAL_SECONDS[interval] * _NS
+        day_starts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]])
+        anchor = np.repeat(ts[day_starts], np.diff(np.r_[day_starts, len(ts)]))
+        bucket = anchor + (ts - anchor) // step * step
+
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(bucket)] - 1
+    out = {}
+    if 'Open' in df.columns:
+        out['Open'] = df['Open'].to_numpy()[starts]
+    if 'High' in df.columns:
+        out['High'] = np.maximum.reduceat(df['High'].to_numpy(), starts)
+    if 'Low' in df.columns:
+        out['Low'] = np.minimum.reduceat(df['Low'].to_numpy(), starts)
+    if 'Close' in df.columns:
+        out['Close'] = df['Close'].to_numpy()[ends]
+    if 'Volume' in df.columns:
+        out['Volume'] = np.add.reduceat(df['Volume'].to_numpy(), starts)
+
+    index = pd.to_datetime(bucket[starts], unit='ns')
+    tz = getattr(df.index, "tz", None)
+    if tz is not None:
+        index = index.tz_localize(tz, ambiguous='NaT', nonexistent='shift_forward')
+    return pd.DataFrame(out, index=index)
+
+
+def compact_bars(df, interval):
+    """
+    Storage form of intraday bars: the retention window only, float32 fields.
+    Halves the footprint of float64 frames (a month of minute bars is ~0.3 MB per symbol).
+    """
+    if df is None or df.empty or not is_intraday(interval):
+        return df
+    keep = RETENTION_DAYS.get(interval)
+    if keep:
+        df = df[df.index >= df.index[-1] - pd.Timedelta(days=keep)]
+    return df.astype({c: np.float32 for c in df.columns if c in BAR_FIELDS})
+
+
+def _checksum_bytes(values):
+    values = np.asarray(values)
+    if values.dtype.kind in "mM":
+        values = values.view("i8")
+    elif values.dtype.kind not in "biuf":
+        values = pd.util.hash_array(values.astype(object))
+    return np.ascontiguousarray(values)
+
+
+def content_version(df, columns=None):
+    """
+    Cheap identity of a bar or indicator frame (or Series): (rows, last timestamp, checksum).
+    The checksum is Adler-32 rolled over the index, the column names and the raw values,
+    so any changed bar or added column gives a new version; a year of daily bars takes
+    ~30 microseconds. `columns` limits it to those fields (in that order).
+    """
+    if isinstance(df, pd.Series):
+        df = df.to_frame()
+    names = list(df.columns)
+    columns = names if columns is None else [c for c in columns if c in names]
+    if len(df) == 0:
+        return (0, None, 0)
+    checksum = zlib.adler32(_checksum_bytes(df.index))
+    checksum = zlib.adler32("\x1f".join(map(str, columns)).encode(), checksum)
+    values = df.to_numpy()
+    if values.dtype.kind in "biuf":
+        # One block for numeric frames, column after column (pulling Series is ~20x slower)
+        if columns != names:
+            values = values[:, [names.index(c) for c in columns]]
+        values = values.T
+        checksum = zlib.adler32(np.ascontiguousarray(values), checksum)
+    else:
+        for col in columns:
+            checksum = zlib.adler32(_checksum_bytes(df[col]), checksum)
+    return (len(df), df.index[-1], checksum)
+
+
+def data_version(df, columns=None):
+    """
+    Cache key of a frame: always computed from its current content (content_version), so
+    derived frames (pct_change, arithmetic, edits in place) never share their source's key.
+    """
+    return content_version(df, columns)
@@ -0,0 +1,414 @@
+import os
+import re
+import abc
+import glob
+import pickle
+import threading
+import time
+import pandas as pd
+from utils.market_data import LocalPriceSource, split_by_ticker
+from utils.single_flight import get_single_flight
+from utils.rate_limiter import RateLimiter
+
+
+class DataProvider(abc.ABC):
+    """
+    Everything the terminal reads from upstream. Agents call these methods instead of yfinance.
+    """
+
+    @abc.abstractmethod
+    def download(self, tickers, period="1y", interval="1d", start=None):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def info(self, ticker):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def financials(self, ticker):
+        """Returns (income statement, balance sheet, cash flow)."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def news(self, ticker):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def major_holders(self, ticker):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def institutional_holders(self, ticker):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def recommendations(self, ticker):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def insider_transactions(self, ticker):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def calendar(self, ticker):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def dividends(self, ticker):
+        raise NotImplementedError
+
+
+class LiveProvider(DataProvider):
+    """yfinance-backed provider."""
+
+    def _ticker(self, ticker):
+        import yfinance as yf
+        return yf.Ticker(ticker)
+
+    def download(self, tickers, period="1y", interval="1d", start=None):
+        import yfinance as yf
+        if start is not None:
+            return yf.download(list(tickers), start=start, interval=interval, group_by='column', progress=False)
+        return yf.download(list(tickers), period=period, interval=interval, group_by='column', progress=False)
+
+    def info(self, ticker):
+        return self._ticker(ticker).info
+
+    def financials(self, ticker):
+        stock = self._ticker(ticker)
+        return stock.financials, stock.balance_sheet, stock.cashflow
+
+    def news(self, ticker):
+        return self._ticker(ticker).news
+
+    def major_holders(self, ticker):
+        return self._ticker(ticker).major_holders
+
+    def institutional_holders(self, ticker):
+        return self._ticker(ticker).institutional_holders
+
+    def recommendations(self, ticker):
+        return self._ticker(ticker).recommendations
+
+    def insider_transactions(self, ticker):
+        return self._ticker(ticker).insider_transactions
+
+    def calendar(self, ticker):
+        return self._ticker(ticker).calendar
+
+    def dividends(self, ticker):
+        return self._ticker(ticker).dividends
+
+
+class LocalProvider(DataProvider):
+    """
+    Offline provider: synthetic prices from LocalPriceSource, empty fundamentals.
+    """
+
+    def __init__(self):
+        self.prices = LocalPriceSource()
+
+    def download(self, tickers, period="1y", interval="1d", start=None):
+        return self.prices.download(tickers, period=period, interval=interval, start=start)
+
+    def info(self, ticker):
+        return {}
+
+    def financials(self, ticker):
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+
+    def news(self, ticker):
+        return []
+
+    def major_holders(self, ticker):
+        return pd.DataFrame()
+
+    def institutional_holders(self, ticker):
+        return pd.DataFrame()
+
+    def recommendations(self, ticker):
+        return pd.DataFrame()
+
+    def insider_transactions(self, ticker):
+        return pd.DataFrame()
+
+    def calendar(self, ticker):
+        return {}
+
+    def dividends(self, ticker):
+        return pd.Series(dtype=float)
+
+
+class RecordReplayProvider(DataProvider):
+    """
+    mode="record": forwards to `inner` and writes every response to disk.
+    mode="replay": serves recorded responses only, after a synthetic `latency` (seconds),
+    so runs are deterministic and need no network. Price misses fall back to `fallback`.
+    """
+
+    def __init__(self, root, mode="replay", inner=None, latency=0.0, fallback=None):
+        self.root = root
+        self.mode = mode
+        self.inner = inner or LiveProvider()
+        self.latency = latency
+        self.fallback = fallback or LocalProvider()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def _name(*key):
+        return "_".join(re.sub(r'[^A-Za-z0-9.\-]', '_', str(k)) for k in key)
+
+    def _path(self, kind, *key):
+        name = self._name(*key)
+        folder = os.path.join(self.root, kind)
+        os.makedirs(folder, exist_ok=True)
+        return os.path.join(folder, f"{name}.pkl")
+
+    def _write(self, path, value):
+        with self._lock:
+            with open(path, "wb") as f:
+                pickle.dump(value, f)
+
+    def _read(self, path):
+        if self.latency:
+            time.sleep(self.latency)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+        with open(path, "rb") as f:
+            self.hits += 1
+            return pickle.load(f)
+
+    def _call(self, kind, ticker, default):
+        path = self._path(kind, ticker)
+        if self.mode == "record":
+            value = getattr(self.inner, kind)(ticker)
+            self._write(path, value)
+            return value
+        value = self._read(path)
+        return default if value is None else value
+
+    def download(self, tickers, period="1y", interval="1d", start=None):
+        # Prices are stored per ticker so replay works whatever batches the caller forms
+        tickers = list(tickers)
+        window = start or period
+        if self.mode == "record":
+            raw = self.inner.download(tickers, period=period, interval=interval, start=start)
+            for t, frame in split_by_ticker(raw, tickers).items():
+                self._write(self._path("prices", t, window, interval), frame)
+            return raw
+
+        frames, missing = {}, []
+        for t in tickers:
+            frame = self._replay_prices(t, window, interval, start)
+            if frame is None:
+                missing.append(t)
+            else:
+                frames[t] = frame
+        if missing:
+            frames.update(split_by_ticker(
+                self.fallback.download(missing, period=period, interval=interval, start=start), missing))
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1).swaplevel(0, 1, axis=1).sort_index(axis=1)
+
+    def _replay_prices(self, ticker, window, interval, start):
+        """
+        The recorded frame for (ticker, window, interval). A `start=` request with no exact
+        recording (the PriceStore's delta refresh) is answered from the longest recording
+        of the ticker, sliced to `start`, so recorded history is never stitched to synthetic bars.
+        """
+        path = self._path("prices", ticker, window, interval)
+        if start is None or os.path.exists(path):
+            return self._read(path)
+        pattern = os.path.join(self.root, "prices", f"{glob.escape(self._name(ticker))}_*_{self._name(interval)}.pkl")
+        candidates = []
+        for candidate in glob.glob(pattern):
+            with open(candidate, "rb") as f:
+                candidates.append(pickle.load(f))
+        candidates = [c for c in candidates if c is not None and not c.empty]
+        if not candidates:
+            return self._read(path)
+        if self.latency:
+            time.sleep(self.latency)
+        self.hits += 1
+        frame = max(candidates, key=len)
+        first = pd.Timestamp(start)
+        if frame.index.tz is not None and first.tz is None:
+            first = first.tz_localize(frame.index.tz)
+        return frame[frame.index >= first]
+
+    def info(self, ticker):
+        return self._call("info", ticker, {})
+
+    def financials(self, ticker):
+        return self._call("financials", ticker, (pd.DataFrame(), pd.DataFrame(), pd.DataFrame()))
+
+    def news(self, ticker):
+        return self._call("news", ticker, [])
+
+    def major_holders(self, ticker):
+        return self._call("major_holders", ticker, pd.DataFrame())
+
+    def institutional_holders(self, ticker):
+        return self._call("institutional_holders", ticker, pd.DataFrame())
+
+    def recommendations(self, ticker):
+        return self._call("recommendations", ticker, pd.DataFrame())
+
+    def insider_transactions(self, ticker):
+        return self._call("insider_transactions", ticker, pd.DataFrame())
+
+    def calendar(self, ticker):
+        return self._call("calendar", ticker, {})
+
+    def dividends(self, ticker):
+        return self._call("dividends", ticker, pd.Series(dtype=float))
+
+
+class ProviderWrapper(DataProvider):
+    """
+    Base for providers that decorate another provider. Subclasses implement
+    _call(kind, ticker) and download().
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    def _call(self, kind, ticker):
+        return getattr(self.inner, kind)(ticker)
+
+    def download(self, tickers, period="1y", interval="1d", start=None):
+        return self.inner.download(tickers, period=period, interval=interval, start=start)
+
+    def info(self, ticker):
+        return self._call("info", ticker)
+
+    def financials(self, ticker):
+        return self._call("financials", ticker)
+
+    def news(self, ticker):
+        return self._call("news", ticker)
+
+    def major_holders(self, ticker):
+        return self._call("major_holders", ticker)
+
+    def institutional_holders(self, ticker):
+        return self._call("institutional_holders", ticker)
+
+    def recommendations(self, ticker):
+        return self._call("recommendations", ticker)
+
+    def insider_transactions(self, ticker):
+        return self._call("insider_transactions", ticker)
+
+    def calendar(self, ticker):
+        return self._call("calendar", ticker)
+
+    def dividends(self, ticker):
+        return self._call("dividends", ticker)
+
+
+class SingleFlightProvider(ProviderWrapper):
+    """
+    Wraps another provider so identical concurrent calls (same kind, ticker, period)
+    from different sessions share one upstream request.
+    """
+
+    def __init__(self, inner, flight=None):
+        super().__init__(inner)
+        self.flight = flight or get_single_flight()
+
+    def _call(self, kind, ticker):
+        return self.flight.do((kind, ticker), getattr(self.inner, kind), ticker)
+
+    def download(self, tickers, period="1y", interval="1d", start=None):
+        key = ("prices", tuple(tickers), start or period, interval)
+        return self.flight.do(key, self.inner.download, tickers, period=period, interval=interval, start=start)
+
+
+class RateLimitedProvider(ProviderWrapper):
+    """
+    Puts every upstream call behind the shared RateLimiter. Endpoint type = method name,
+    so e.g. a tripped 'news' breaker doesn't block price downloads.
+    """
+
+    def __init__(self, inner, limiter=None):
+        super().__init__(inner)
+        self.limiter = limiter or RateLimiter()
+
+    def _call(self, kind, ticker):
+        return self.limiter.call(kind, getattr(self.inner, kind), ticker)
+
+    def download(self, tickers, period="1y", interval="1d", start=None):
+        tickers = list(tickers)
+        raw = self.limiter.call("prices", self.inner.download, tickers, period=period, interval=interval, start=start)
+        # yf.download swallows 429s: throttled symbols just come back empty. Slow down and
+        # retry the missing ones once (a delisted symbol stays missing, at the cost of one retry).
+        frames = split_by_ticker(raw, tickers)
+        missing = [t for t in tickers if t not in frames]
+        if not missing:
+            return raw
+        self.limiter.throttle()
+        time.sleep(self.limiter.backoff(1))
+        retried = split_by_ticker(self.limiter.call(
+            "prices", self.inner.download, missing, period=period, interval=interval, start=start), missing)
+        if not retried:
+            return raw
+        frames.update(retried)
+        return pd.concat(frames, axis=1).swaplevel(0, 1, axis=1).sort_index(axis=1)
+
+
+_provider = None
+_provider_lock = threading.Lock()
+_limiter = None
+
+
+def get_rate_limiter():
+    """
+    Process-wide limiter for upstream calls; QA_RATE_LIMIT sets the steady rate (requests/sec).
+    """
+    global _limiter
+    with _provider_lock:
+        if _limiter is None:
+            rate = float(os.getenv("QA_RATE_LIMIT", "5"))
+            _limiter = RateLimiter(rate=rate, capacity=max(1, int(rate * 2)))
+        return _limiter
+
+
+def get_provider():
+    """
+    Process-wide provider chosen by QA_DATA_PROVIDER:
+      live (default) | local | record | replay
+    record/replay use QA_REPLAY_DIR; replay sleeps QA_REPLAY_LATENCY_MS per call.
+    Concurrent identical calls are coalesced through SingleFlightProvider, and every
+    call that reaches Yahoo goes through the shared RateLimiter.
+    """
+    global _provider
+    if _provider is not None:
+        return _provider
+    limiter = get_rate_limiter()
+    with _provider_lock:
+        if _provider is None:
+            mode = os.getenv("QA_DATA_PROVIDER", "live").lower()
+            live = RateLimitedProvider(LiveProvider(), limiter)
+            if mode == "local":
+                base = LocalProvider()
+            elif mode in ("record", "replay"):
+                root = os.getenv("QA_REPLAY_DIR", os.path.join(
+                    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".replay"))
+                latency = float(os.getenv("QA_REPLAY_LATENCY_MS", "0")) / 1000.0
+                base = RecordReplayProvider(root, mode=mode, inner=live, latency=latency)
+            else:
+                base = live
+            _provider = SingleFlightProvider(base)
+        return _provider
+
+
+def set_provider(provider):
+    global _provider
+    with _provider_lock:
+        _provider = provider
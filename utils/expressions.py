@@ -0,0 +1,248 @@
+import ast
+import re
+import functools
+import numpy as np
+from utils import panel_indicators as pi
+
+MAX_LENGTH = 500
+MAX_NODES = 200
+MAX_WINDOW = 5000
+
+
+class ExpressionError(ValueError):
+    pass
+
+
+def _number(value):
+    try:
+        return float(value)
+    except OverflowError:
+        raise ExpressionError(f"number {value} is too large") from None
+
+
+def _window(n):
+    if not isinstance(n, float) or n != int(n) or not 1 <= n <= MAX_WINDOW:
+        raise ExpressionError(f"window must be a whole number between 1 and {MAX_WINDOW}")
+    return int(n)
+
+
+def _shift(x, n):
+    out = np.full(x.shape, np.nan)
+    if n < x.shape[0]:
+        out[n:] = x[:x.shape[0] - n]
+    return out
+
+
+def _change(x, n):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (x / _shift(x, n) - 1) * 100
+
+
+def _rank_rows(x):
+    order = np.argsort(np.argsort(np.where(np.isnan(x), np.inf, x), axis=-1), axis=-1)
+    count = (~np.isnan(x)).sum(axis=-1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(np.isnan(x), np.nan, order / np.maximum(count - 1, 1) * 100)
+
+
+def _rank(x, counts=None):
+    """
+    Cross-sectional percentile rank (0-100) along the last axis; NaN stays NaN.
+    With `counts`, x is a packed panel (symbol j on rows 0..counts[j]-1, see
+    panel_indicators.pack_panel): each symbol's k-th latest value is ranked against the
+    others' k-th latest, so the last rows a screen reads are compared with each other
+    whatever the history lengths.
+    """
+    x = np.asarray(x, dtype=float)
+    if counts is None or x.ndim != 2 or x.shape[0] == 1:
+        return _rank_rows(x)
+    counts = np.asarray(counts)
+    rows = np.arange(x.shape[0])[:, None] - (x.shape[0] - counts)[None, :]
+    cols = np.broadcast_to(np.arange(x.shape[1]), rows.shape)
+    valid = rows >= 0
+    aligned = np.where(valid, x[np.maximum(rows, 0), cols], np.nan)
+    out = np.full(x.shape, np.nan)
+    out[rows[valid], cols[valid]] = _rank_rows(aligned)[valid]
+    return out
+
+
+# name -> (fn, argument kinds); "s" is a series/scalar argument, "n" a constant window length.
+# Rolling functions run along axis 0 (time), so they work on one symbol's column or on a
+# dates x symbols panel alike, but not on single values.
+FUNCTIONS = {
+    "avg": (pi.sma, "sn"), "sma": (pi.sma, "sn"), "ema": (pi.ema, "sn"),
+    "std": (pi.rolling_std, "sn"), "highest": (pi.rolling_max, "sn"), "lowest": (pi.rolling_min, "sn"),
+    "rsi": (pi.rsi, "sn"), "shift": (_shift, "sn"), "change": (_change, "sn"),
+    "abs": (np.abs, "s"), "log": (np.log, "s"), "sqrt": (np.sqrt, "s"), "rank": (_rank, "s"),
+    "max": (np.fmax, "ss"), "min": (np.fmin, "ss"),
+}
+# Functions whose first argument must be a series (1-D column or 2-D panel)
+SERIES_FUNCTIONS = {name for name, (_, kinds) in FUNCTIONS.items() if "n" in kinds} | {"rank"}
+# Functions comparing symbols with each other; they get the packed panel's row counts
+CROSS_SECTIONAL = {"rank"}
+
+_BINARY = {
+    ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.true_divide,
+    ast.Mod: np.mod, ast.Pow: np.power, ast.FloorDiv: np.floor_divide,
+}
+_COMPARE = {
+    ast.Lt: np.less, ast.LtE: np.less_equal, ast.Gt: np.greater, ast.GtE: np.greater_equal,
+    ast.Eq: np.equal, ast.NotEq: np.not_equal,
+}
+
+
+class Expression:
+    """
+    A validated formula compiled to a tree of NumPy calls. evaluate(data) looks series up by
+    name (case-insensitive) in any mapping of arrays: a DataFrame, a dict of panel arrays,
+    or a dict of scalars. For packed panels, `counts` (rows per symbol) lets cross-sectional
+    functions line symbols up by their latest rows.
+    """
+
+    def __init__(self, source, fn, names):
+        self.source = source
+        self.names = names
+        self._fn = fn
+
+    def evaluate(self, data, counts=None):
+        lookup = {str(k).lower(): k for k in data.keys()}
+        missing = [n for n in self.names if n not in lookup]
+        if missing:
+            raise ExpressionError(f"unknown series: {', '.join(missing)}")
+
+        def resolve(name):
+            value = data[lookup[name]]
+            return np.asarray(value, dtype=float)
+        resolve.counts = counts
+
+        with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+            return self._fn(resolve)
+
+    def __repr__(self):
+        return f"Expression({self.source!r})"
+
+
+class _Compiler:
+    def __init__(self):
+        self.names = []
+        self.nodes = 0
+
+    def compile(self, node):
+        self.nodes += 1
+        if self.nodes > MAX_NODES:
+            raise ExpressionError("expression is too long")
+        method = getattr(self, f"_{type(node).__name__}", None)
+        if method is None:
+            raise ExpressionError(f"'{type(node).__name__}' is not allowed")
+        return method(node)
+
+    def _Expression(self, node):
+        return self.compile(node.body)
+
+    def _Constant(self, node):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ExpressionError(f"unsupported constant {node.value!r}")
+        # Everything is float64: no Python big-int arithmetic
+        value = _number(node.value)
+        return lambda env: value
+
+    def _Name(self, node):
+        name = node.id.lower()
+        if name not in self.names:
+            self.names.append(name)
+        return lambda env: env(name)
+
+    def _BinOp(self, node):
+        op = _BINARY.get(type(node.op))
+        if op is None:
+            raise ExpressionError(f"operator {type(node.op).__name__} is not allowed")
+        left, right = self.compile(node.left), self.compile(node.right)
+        return lambda env: op(left(env), right(env))
+
+    def _UnaryOp(self, node):
+        operand = self.compile(node.operand)
+        if isinstance(node.op, ast.USub):
+            return lambda env: np.negative(operand(env))
+        if isinstance(node.op, ast.UAdd):
+            return operand
+        if isinstance(node.op, ast.Not):
+            return lambda env: np.logical_not(operand(env))
+        raise ExpressionError(f"operator {type(node.op).__name__} is not allowed")
+
+    def _BoolOp(self, node):
+        op = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        values = [self.compile(v) for v in node.values]
+        return lambda env: functools.reduce(op, (v(env) for v in values))
+
+    def _Compare(self, node):
+        # a < b < c -> (a < b) & (b < c)
+        operands = [self.compile(node.left)] + [self.compile(c) for c in node.comparators]
+        ops = [_COMPARE[type(op)] for op in node.ops if type(op) in _COMPARE]
+        if len(ops) != len(node.ops):
+            raise ExpressionError("only <, <=, >, >=, ==, != comparisons are allowed")
+
+        def compare(env):
+            values = [o(env) for o in operands]
+            result = ops[0](values[0], values[1])
+            for i in range(1, len(ops)):
+                result = np.logical_and(result, ops[i](values[i], values[i + 1]))
+            return result
+        return compare
+
+    def _Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.keywords:
+            raise ExpressionError("only plain calls like avg(volume, 20) are allowed")
+        name = node.func.id.lower()
+        if name not in FUNCTIONS:
+            raise ExpressionError(f"unknown function '{node.func.id}' (available: {', '.join(sorted(FUNCTIONS))})")
+        fn, kinds = FUNCTIONS[name]
+        if len(node.args) != len(kinds):
+            raise ExpressionError(f"{name}() takes {len(kinds)} argument(s)")
+        args = []
+        for kind, arg in zip(kinds, node.args):
+            if kind == "n":
+                if not isinstance(arg, ast.Constant):
+                    raise ExpressionError(f"{name}() window must be a number")
+                n = _window(_number(arg.value) if isinstance(arg.value, (int, float)) else arg.value)
+                args.append(lambda env, n=n: n)
+            else:
+                args.append(self.compile(arg))
+        if name not in SERIES_FUNCTIONS:
+            return lambda env: fn(*(a(env) for a in args))
+
+        def call(env):
+            values = [a(env) for a in args]
+            if np.ndim(values[0]) not in (1, 2):
+                raise ExpressionError(f"{name}() needs a series; only single values are available here")
+            if name in CROSS_SECTIONAL:
+                return fn(*values, counts=getattr(env, "counts", None))
+            return fn(*values)
+        return call
+
+
+# `&`, `|` and `~` read as logical operators, with the low precedence users expect:
+# "rsi < 30 & volume > x" means (rsi < 30) and (volume > x)
+_LOGICAL = [(re.compile(r'&&?'), ' and '), (re.compile(r'\|\|?'), ' or '), (re.compile(r'~|!(?!=)'), ' not ')]
+
+
+@functools.lru_cache(maxsize=256)
+def compile_expression(source):
+    """Parses, validates and compiles a formula; identical sources share one compiled object."""
+    if not isinstance(source, str) or not source.strip():
+        raise ExpressionError("empty expression")
+    if len(source) > MAX_LENGTH:
+        raise ExpressionError(f"expression is longer than {MAX_LENGTH} characters")
+    text = source.strip()
+    for pattern, replacement in _LOGICAL:
+        text = pattern.sub(replacement, text)
+    try:
+        tree = ast.parse(text, mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"syntax error: {e.msg}") from None
+    compiler = _Compiler()
+    fn = compiler.compile(tree)
+    return Expression(source, fn, tuple(compiler.names))
+
+
+def evaluate(source, data):
+    return compile_expression(source).evaluate(data)
@@ -0,0 +1,107 @@
+import threading
+import time
+from utils.data_provider import get_provider
+
+
+def _num(value):
+    """Coerce an info value to float; missing or non-numeric becomes None."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class FundamentalsSnapshot:
+    """
+    Typed view of a ticker's `info` blob. Fields are None when Yahoo doesn't report them;
+    consumers pick their own defaults.
+    """
+
+    # info key -> attribute
+    FIELDS = {
+        "currentPrice": "current_price",
+        "marketCap": "market_cap",
+        "trailingPE": "trailing_pe",
+        "forwardPE": "forward_pe",
+        "pegRatio": "peg_ratio",
+        "priceToBook": "price_to_book",
+        "returnOnEquity": "roe",
+        "profitMargins": "profit_margin",
+        "revenueGrowth": "revenue_growth",
+        "trailingEps": "eps",
+        "targetMeanPrice": "target_mean",
+        "targetHighPrice": "target_high",
+        "targetLowPrice": "target_low",
+        "numberOfAnalystOpinions": "num_analysts"
+    }
+
+    __slots__ = ("ticker", "fetched_at", "recommendation") + tuple(FIELDS.values())
+
+    def __init__(self, ticker, info, fetched_at=None):
+        info = info or {}
+        self.ticker = ticker
+        self.fetched_at = fetched_at or time.time()
+        self.recommendation = info.get("recommendationKey")
+        for key, attr in self.FIELDS.items():
+            setattr(self, attr, _num(info.get(key)))
+
+    def get(self, attr, default=0):
+        value = getattr(self, attr)
+        return default if value is None else value
+
+    @property
+    def is_empty(self):
+        return all(getattr(self, attr) is None for attr in self.FIELDS.values())
+
+    @property
+    def age(self):
+        return time.time() - self.fetched_at
+
+
+class FundamentalsCache:
+    """
+    Fetches each symbol's info dict once per TTL and hands the same snapshot
+    to Valuation, Ownership, Peer, Research, Chatbot and the PDF report.
+    """
+
+    def __init__(self, ttl=600):
+        self.ttl = ttl
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        self.fetches = 0
+        self.hits = 0
+
+    def get(self, ticker):
+        with self._lock:
+            snap = self._snapshots.get(ticker)
+            if snap is not None and snap.age < self.ttl:
+                self.hits += 1
+                return snap
+        info = get_provider().info(ticker)
+        snap = FundamentalsSnapshot(ticker, info)
+        with self._lock:
+            self.fetches += 1
+            # Don't pin an empty answer (throttled / failed call) for a whole TTL
+            if not snap.is_empty:
+                self._snapshots[ticker] = snap
+        return snap
+
+    def invalidate(self, ticker=None):
+        with self._lock:
+            if ticker is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(ticker, None)
+
+
+_cache = FundamentalsCache()
+
+
+def get_fundamentals_snapshot(ticker):
+    return _cache.get(ticker)
+
+
+def get_fundamentals_cache():
+    return _cache
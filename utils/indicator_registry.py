@@ -0,0 +1,326 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from utils.indicators import (SMAState, EMAState, StdState, RSIState, DonchianState,
+                              PSARState, VWAPState, IndicatorEngine)
+from utils.bars import data_version, session_days
+
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+DEFAULT_COLUMNS = list(IndicatorEngine.COLUMNS)
+
+
+class IndicatorSpec:
+    """
+    A catalog entry. Leaf indicators wrap a running state fed with `inputs` fields;
+    composite ones declare `depends(params) -> {name: (indicator, params)}` and build their
+    outputs from those results with `combine(results, params)`.
+    `ranges` bounds each parameter: {param: (min, max)}.
+    """
+
+    def __init__(self, name, inputs=(), state=None, depends=None, combine=None,
+                 outputs=("value",), defaults=None, ranges=None):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.state = state
+        self.depends = depends
+        self.combine = combine
+        self.outputs = tuple(outputs)
+        self.defaults = dict(defaults or {})
+        self.ranges = dict(ranges or {})
+
+    def resolve(self, params=None):
+        merged = dict(self.defaults)
+        merged.update(params or {})
+        unknown = set(merged) - set(self.defaults)
+        if unknown:
+            raise ValueError(f"{self.name} has no parameter(s) {sorted(unknown)}")
+        for key, (low, high) in self.ranges.items():
+            if not low <= merged[key] <= high:
+                raise ValueError(f"{self.name} {key}={merged[key]} outside [{low}, {high}]")
+        return merged
+
+
+INDICATORS = {}
+
+
+def register(name, **kwargs):
+    INDICATORS[name] = IndicatorSpec(name, **kwargs)
+    return INDICATORS[name]
+
+
+register("SMA", inputs=("Close",), state=SMAState, defaults={"length": 20}, ranges={"length": (1, 1000)})
+register("EMA", inputs=("Close",), state=EMAState, defaults={"length": 20}, ranges={"length": (1, 1000)})
+register("STDEV", inputs=("Close",), state=StdState, defaults={"length": 20, "ddof": 0},
+         ranges={"length": (2, 1000), "ddof": (0, 1)})
+register("RSI", inputs=("Close",), state=RSIState, defaults={"length": 14}, ranges={"length": (2, 500)})
+register("DONCHIAN", inputs=("High", "Low"), state=DonchianState, outputs=("upper", "lower"),
+         defaults={"length": 20}, ranges={"length": (1, 1000)})
+register("PSAR", inputs=("High", "Low", "Close"), state=PSARState,
+         defaults={"af0": 0.02, "max_af": 0.2}, ranges={"af0": (0.001, 1.0), "max_af": (0.001, 1.0)})
+# "Session" isn't a column: it is derived from the bar timestamps (see _input_frame)
+register("VWAP", inputs=("High", "Low", "Close", "Volume", "Session"), state=VWAPState)
+register(
+    "BBANDS",
+    depends=lambda p: {"mid": ("SMA", {"length": p["length"]}),
+                       "std": ("STDEV", {"length": p["length"], "ddof": 0})},
+    combine=lambda r, p: {"upper": r["mid"]["value"] + p["std"] * r["std"]["value"],
+                          "lower": r["mid"]["value"] - p["std"] * r["std"]["value"],
+                          "mid": r["mid"]["value"]},
+    outputs=("upper", "lower", "mid"),
+    defaults={"length": 20, "std": 2.0},
+    ranges={"length": (2, 1000), "std": (0.1, 10.0)}
+)
+
+
+# Column name grammar. Default parameters keep the names TechnicalAnalyst always produced
+# (SMA_20, BB_Upper, DC_Lower, RSI, PSAR); anything else carries its parameters in the name.
+_COLUMN_PATTERNS = [
+    (r'(SMA|EMA|STDEV)_(\d+)', lambda m: (m[1], {"length": int(m[2])}, "value")),
+    (r'RSI(?:_(\d+))?', lambda m: ("RSI", {"length": int(m[1])} if m[1] else {}, "value")),
+    (r'BB_(Upper|Lower|Mid)(?:_(\d+)_([\d.]+))?',
+     lambda m: ("BBANDS", {"length": int(m[2]), "std": float(m[3])} if m[2] else {}, m[1].lower())),
+    (r'DC_(Upper|Lower)(?:_(\d+))?',
+     lambda m: ("DONCHIAN", {"length": int(m[2])} if m[2] else {}, m[1].lower())),
+    (r'PSAR(?:_([\d.]+)_([\d.]+))?',
+     lambda m: ("PSAR", {"af0": float(m[1]), "max_af": float(m[2])} if m[1] else {}, "value")),
+    (r'VWAP', lambda m: ("VWAP", {}, "value")),
+]
+
+
+def column_spec(column):
+    """'SMA_50' -> ("SMA", {"length": 50}, "value"); raises KeyError for unknown columns."""
+    for pattern, build in _COLUMN_PATTERNS:
+        match = re.fullmatch(pattern, column)
+        if match:
+            return build(match)
+    raise KeyError(f"Unknown indicator column: {column}")
+
+
+def column_name(name, params=None, output="value"):
+    """Inverse of column_spec: column_name("BBANDS", {"length": 30}, "upper") -> 'BB_Upper_30_2'."""
+    spec = INDICATORS[name]
+    params = spec.resolve(params)
+    default = params == spec.defaults
+    if name in ("SMA", "EMA", "STDEV"):
+        return f"{name}_{params['length']}"
+    if name == "RSI":
+        return "RSI" if default else f"RSI_{params['length']}"
+    if name == "BBANDS":
+        base = f"BB_{output.capitalize()}"
+        return base if default else f"{base}_{params['length']}_{params['std']:g}"
+    if name == "DONCHIAN":
+        base = f"DC_{output.capitalize()}"
+        return base if default else f"{base}_{params['length']}"
+    if name == "PSAR":
+        return "PSAR" if default else f"PSAR_{params['af0']:g}_{params['max_af']:g}"
+    return name
+
+
+def _params_key(params):
+    return tuple(sorted(params.items()))
+
+
+def _input_frame(df, inputs):
+    """The fields a state reads, with "Session" computed from the index."""
+    if "Session" not in inputs:
+        return df[list(inputs)]
+    frame = df[[f for f in inputs if f != "Session"]]
+    return frame.assign(Session=session_days(df.index))[list(inputs)]
+
+
+class IndicatorNode:
+    """
+    Memoized output of one (symbol, indicator, params). Leaf nodes keep their running state
+    between calls: bars that are already committed aren't recomputed, the last (possibly
+    forming) bar is peeked, and an unchanged data version returns the cached arrays.
+    A rolling window (a 1y slice that gains a bar and drops its oldest one) keeps the state;
+    the committed outputs are sliced to the frame's first bar.
+    """
+
+    def __init__(self, spec, params):
+        self.spec = spec
+        self.params = params
+        self.version = None
+        self.result = None        # {output: np.ndarray}
+        self.state = None
+        self.last_ts = None
+        self.last_bar = None
+        self.count = 0
+        self.stamps = None        # committed bar timestamps (int64 ns), same layout as buffers
+        self.buffers = {}         # committed outputs, grown by doubling
+        self.lock = threading.Lock()
+
+    def _new_state(self):
+        return self.spec.state(**self.params)
+
+    def _unpack(self, raw):
+        return raw if len(self.spec.outputs) > 1 else (raw,)
+
+    def _append(self, ts, values):
+        if self.count == len(self.stamps):
+            grow = max(self.count, 64)
+            self.stamps = np.concatenate([self.stamps, np.empty(grow, dtype=np.int64)])
+            for o in self.buffers:
+                self.buffers[o] = np.concatenate([self.buffers[o], np.empty(grow)])
+        self.stamps[self.count] = ts.value
+        for o, v in zip(self.spec.outputs, values):
+            self.buffers[o][self.count] = v
+        self.count += 1
+
+    def _offset(self, frame):
+        """
+        Position of frame's first bar among the committed ones if frame continues this node's
+        history (None otherwise). The start may only move forward when new bars closed.
+        """
+        if self.state is None or not self.count or self.last_ts not in frame.index:
+            return None
+        last = frame.index.get_loc(self.last_ts)
+        if last >= len(frame) - 1:
+            return None
+        offset = int(np.searchsorted(self.stamps[:self.count], frame.index[0].value))
+        if offset >= self.count or self.stamps[offset] != frame.index[0].value:
+            return None
+        if offset and last >= len(frame) - 2:
+            return None
+        # Every committed bar from the frame's start to last_ts must still be there
+        if self.count - offset != last + 1:
+            return None
+        if tuple(float(v) for v in frame.iloc[last]) != self.last_bar:
+            return None
+        return offset
+
+    def evaluate_leaf(self, df, version):
+        if version == self.version:
+            return self.result, "hit"
+        df = _input_frame(df, self.spec.inputs)
+        offset = self._offset(df)
+        if offset is not None:
+            closed = df.iloc[df.index.get_loc(self.last_ts) + 1:-1]
+            kind = "update"
+        else:
+            self.state = self._new_state()
+            self.count = offset = 0
+            self.stamps = np.empty(max(len(df), 64), dtype=np.int64)
+            self.buffers = {o: np.empty(len(self.stamps)) for o in self.spec.outputs}
+            closed = df.iloc[:-1]
+            kind = "seed"
+        rows = closed.astype(float).itertuples(index=False, name=None)
+        for ts, row in zip(closed.index, rows):
+            self._append(ts, self._unpack(self.state.update(*row)))
+            self.last_ts = ts
+            self.last_bar = row
+        forming = tuple(float(v) for v in df.iloc[-1])
+        peeked = self._unpack(self.state.peek(*forming))
+        self.result = {o: np.append(self.buffers[o][offset:self.count], p)
+                       for o, p in zip(self.spec.outputs, peeked)}
+        self.version = version
+        return self.result, kind
+
+    def nbytes(self):
+        size = sum(b.nbytes for b in self.buffers.values())
+        if self.stamps is not None:
+            size += self.stamps.nbytes
+        if self.result:
+            size += sum(r.nbytes for r in self.result.values())
+        # Rolling windows hold up to `length` boxed floats
+        return size + 32 * int(self.params.get("length", 2))
+
+
+class IndicatorRegistry:
+    """
+    Demand-driven indicator computation over the catalog. compute() resolves requested
+    columns to (indicator, params) nodes plus their declared dependencies and only evaluates
+    what isn't already memoized for the frame's data version. Nodes are kept in LRU order
+    and evicted once their total size passes `max_bytes`.
+    """
+
+    def __init__(self, max_bytes=None):
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("QA_INDICATOR_CACHE_MB", "64")) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self._nodes = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hit": 0, "update": 0, "seed": 0, "evicted": 0}
+
+    def _node(self, key, name, params):
+        with self._lock:
+            node = self._nodes.get(key)
+            if node is None:
+                node = self._nodes[key] = IndicatorNode(INDICATORS[name], params)
+            self._nodes.move_to_end(key)
+            return node
+
+    def _account(self, key, node):
+        with self._lock:
+            if key not in self._nodes:
+                return
+            size = node.nbytes()
+            self._bytes += size - self._sizes.get(key, 0)
+            self._sizes[key] = size
+            # Never evict the node that was just computed
+            while self._bytes > self.max_bytes and len(self._nodes) > 1:
+                old_key, _ = self._nodes.popitem(last=False)
+                if old_key == key:
+                    self._nodes[key] = node
+                    continue
+                self._bytes -= self._sizes.pop(old_key, 0)
+                self.stats["evicted"] += 1
+
+    def evaluate(self, symbol, df, name, params=None, interval="1d", version=None):
+        """{output: np.ndarray aligned to df.index} for one indicator."""
+        spec = INDICATORS[name]
+        params = spec.resolve(params)
+        version = version if version is not None else data_version(df, OHLCV)
+        key = (symbol, interval, name, _params_key(params))
+        node = self._node(key, name, params)
+        # One evaluation per node at a time: concurrent callers for the same version wait
+        # and get a hit. Dependencies are other nodes, so their locks nest without cycles.
+        with node.lock:
+            if spec.depends is None:
+                result, kind = node.evaluate_leaf(df, version)
+            elif node.version == version:
+                result, kind = node.result, "hit"
+            else:
+                deps = {alias: self.evaluate(symbol, df, dep, dep_params, interval, version)
+                        for alias, (dep, dep_params) in spec.depends(params).items()}
+                node.result, node.version = spec.combine(deps, params), version
+                result, kind = node.result, "update"
+        with self._lock:
+            self.stats[kind] += 1
+        if kind != "hit":
+            self._account(key, node)
+        return result
+
+    def compute(self, symbol, df, columns=None, interval="1d"):
+        """DataFrame of the requested indicator columns (default: every TechnicalAnalyst column)."""
+        columns = DEFAULT_COLUMNS if columns is None else list(columns)
+        if df.empty or not columns:
+            return pd.DataFrame(index=df.index)
+        version = data_version(df, OHLCV)
+        out = {}
+        for col in columns:
+            name, params, output = column_spec(col)
+            out[col] = self.evaluate(symbol, df, name, params, interval, version)[output]
+        return pd.DataFrame(out, index=df.index)
+
+    def memory(self):
+        with self._lock:
+            return {"nodes": len(self._nodes), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+    def forget(self, symbol=None):
+        with self._lock:
+            for key in [k for k in self._nodes if symbol is None or k[0] == symbol]:
+                del self._nodes[key]
+                self._bytes -= self._sizes.pop(key, 0)
+
+
+_registry = IndicatorRegistry()
+
+
+def get_indicator_registry():
+    return _registry
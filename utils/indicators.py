@@ -0,0 +1,478 @@
+import math
+from collections import deque
+import numpy as np
+import pandas as pd
+from utils.bars import session_days
+
+NAN = float("nan")
+
+
+class SMAState:
+    """
+    Rolling mean with the same Kahan add/remove sequence pandas' rolling().mean() uses,
+    so results match ta.sma bit for bit.
+    """
+
+    def __init__(self, length):
+        self.length = length
+        self.window = deque()
+        self.nobs = 0
+        self.neg_ct = 0
+        self.sum_x = 0.0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.same = 0
+        self.prev = NAN
+
+    def _step(self, x):
+        nobs, neg_ct, sum_x = self.nobs, self.neg_ct, self.sum_x
+        comp_add, comp_remove, same, prev = self.comp_add, self.comp_remove, self.same, self.prev
+        # 1. Drop the value leaving the window
+        if len(self.window) == self.length:
+            old = self.window[0]
+            if old == old:
+                nobs -= 1
+                y = -old - comp_remove
+                t = sum_x + y
+                comp_remove = t - sum_x - y
+                sum_x = t
+                if math.copysign(1.0, old) < 0:
+                    neg_ct -= 1
+        # 2. Add the new one
+        if x == x:
+            nobs += 1
+            y = x - comp_add
+            t = sum_x + y
+            comp_add = t - sum_x - y
+            sum_x = t
+            if math.copysign(1.0, x) < 0:
+                neg_ct += 1
+            same = same + 1 if x == prev else 1
+            prev = x
+        # 3. Mean
+        if nobs >= self.length:
+            value = sum_x / nobs
+            if same >= nobs:
+                value = prev
+            elif neg_ct == 0 and value < 0:
+                value = 0.0
+            elif neg_ct == nobs and value > 0:
+                value = 0.0
+        else:
+            value = NAN
+        return value, (nobs, neg_ct, sum_x, comp_add, comp_remove, same, prev)
+
+    def update(self, x):
+        value, state = self._step(x)
+        self.nobs, self.neg_ct, self.sum_x, self.comp_add, self.comp_remove, self.same, self.prev = state
+        if len(self.window) == self.length:
+            self.window.popleft()
+        self.window.append(x)
+        return value
+
+    def peek(self, x):
+        return self._step(x)[0]
+
+
+class VarState:
+    """
+    Rolling variance via Welford with Kahan compensation (pandas' rolling().var() recurrence).
+    """
+
+    def __init__(self, length, ddof=0):
+        self.length = length
+        self.ddof = ddof
+        self.window = deque()
+        self.nobs = 0.0
+        self.mean_x = 0.0
+        self.ssqdm_x = 0.0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.same = 0
+        self.prev = NAN
+
+    def _step(self, x):
+        nobs, mean_x, ssqdm_x = self.nobs, self.mean_x, self.ssqdm_x
+        comp_add, comp_remove, same, prev = self.comp_add, self.comp_remove, self.same, self.prev
+        if len(self.window) == self.length:
+            old = self.window[0]
+            if old == old:
+                nobs -= 1
+                if nobs:
+                    prev_mean = mean_x - comp_remove
+                    y = old - comp_remove
+                    t = y - mean_x
+                    comp_remove = t + mean_x - y
+                    mean_x = mean_x - t / nobs
+                    ssqdm_x = ssqdm_x - (old - prev_mean) * (old - mean_x)
+                else:
+                    mean_x = 0.0
+                    ssqdm_x = 0.0
+        if x == x:
+            same = same + 1 if x == prev else 1
+            prev = x
+            nobs += 1
+            prev_mean = mean_x - comp_add
+            y = x - comp_add
+            t = y - mean_x
+            comp_add = t + mean_x - y
+            mean_x = mean_x + t / nobs
+            ssqdm_x = ssqdm_x + (x - prev_mean) * (x - mean_x)
+        if nobs >= self.length and nobs > self.ddof:
+            if nobs == 1 or same >= nobs:
+                value = 0.0
+            else:
+                value = max(0.0, ssqdm_x / (nobs - self.ddof))
+        else:
+            value = NAN
+        return value, (nobs, mean_x, ssqdm_x, comp_add, comp_remove, same, prev)
+
+    def update(self, x):
+        value, state = self._step(x)
+        self.nobs, self.mean_x, self.ssqdm_x, self.comp_add, self.comp_remove, self.same, self.prev = state
+        if len(self.window) == self.length:
+            self.window.popleft()
+        self.window.append(x)
+        return value
+
+    def peek(self, x):
+        return self._step(x)[0]
+
+
+class EWMState:
+    """
+    One step of pandas' ewm().mean() recurrence. adjust=True is the weighted form ta.rma uses;
+    adjust=False is the plain recursive form ta.ema uses. min_periods counts observations.
+    """
+
+    def __init__(self, alpha, adjust=True, min_periods=0):
+        self.old_wt_factor = 1.0 - alpha
+        self.new_wt = 1.0 if adjust else alpha
+        self.adjust = adjust
+        self.min_periods = min_periods
+        self.weighted = NAN
+        self.old_wt = 1.0
+        self.nobs = 0
+
+    def _step(self, x):
+        weighted, old_wt, nobs = self.weighted, self.old_wt, self.nobs
+        is_obs = x == x
+        nobs += is_obs
+        if weighted == weighted:
+            if is_obs:
+                old_wt *= self.old_wt_factor
+                if weighted != x:
+                    weighted = old_wt * weighted + self.new_wt * x
+                    weighted /= (old_wt + self.new_wt)
+                old_wt = old_wt + self.new_wt if self.adjust else 1.0
+        elif is_obs:
+            weighted = x
+        value = weighted if nobs >= max(self.min_periods, 1) else NAN
+        return value, (weighted, old_wt, nobs)
+
+    def update(self, x):
+        value, (self.weighted, self.old_wt, self.nobs) = self._step(x)
+        return value
+
+    def peek(self, x):
+        return self._step(x)[0]
+
+
+class EMAState:
+    """
+    ta.ema: NaN for the first length-1 bars, seeded with the SMA of the first `length`
+    closes, then ewm(span=length, adjust=False).
+    """
+
+    def __init__(self, length):
+        self.length = length
+        self.first = []           # the first `length` closes, for the seed
+        self.ewm = EWMState(2.0 / (length + 1), adjust=False)
+        self.count = 0
+
+    def _seed(self, x):
+        # ta.ema seeds with close[0:length].sum() / length: a NumPy sum over the block,
+        # which can differ from a running sum in the last bit
+        values = self.first + [x]
+        return float(np.nansum(values)) / self.length if len(values) == self.length else NAN
+
+    def _input(self, x, seed_value):
+        # What ta.ema feeds the ewm at this position
+        if self.count + 1 < self.length:
+            return NAN
+        if self.count + 1 == self.length:
+            return seed_value
+        return x
+
+    def update(self, x):
+        seed_value = NAN
+        if self.count < self.length:
+            seed_value = self._seed(x)
+            self.first.append(x)
+        value = self.ewm.update(self._input(x, seed_value))
+        self.count += 1
+        return value
+
+    def peek(self, x):
+        seed_value = self._seed(x) if self.count < self.length else NAN
+        return self.ewm.peek(self._input(x, seed_value))
+
+
+class RSIState:
+    """
+    ta.rsi: gains/losses from close.diff(), each smoothed with ta.rma
+    (ewm alpha=1/length, adjust=True, min_periods=length).
+    """
+
+    def __init__(self, length=14):
+        self.length = length
+        self.up = EWMState(1.0 / length, adjust=True, min_periods=length)
+        self.down = EWMState(1.0 / length, adjust=True, min_periods=length)
+        self.last_close = NAN
+
+    def _moves(self, x):
+        diff = x - self.last_close
+        if diff != diff:
+            return NAN, NAN
+        return (diff if diff > 0 else 0.0), (diff if diff < 0 else 0.0)
+
+    @staticmethod
+    def _rsi(up, down):
+        total = up + abs(down)
+        return 100 * up / total if total else NAN
+
+    def update(self, x):
+        gain, loss = self._moves(x)
+        value = self._rsi(self.up.update(gain), self.down.update(loss))
+        self.last_close = x
+        return value
+
+    def peek(self, x):
+        gain, loss = self._moves(x)
+        return self._rsi(self.up.peek(gain), self.down.peek(loss))
+
+
+class RollingExtremeState:
+    """
+    Rolling max (or min) over `length` bars with a monotonic deque: amortized O(1) update,
+    O(1) peek. NaN until the window is full, like rolling(length).max().
+    """
+
+    def __init__(self, length, mode="max"):
+        self.length = length
+        self.better = (lambda a, b: a >= b) if mode == "max" else (lambda a, b: a <= b)
+        self.pick = max if mode == "max" else min
+        self.items = deque()   # (position, value), values monotonic from the front
+        self.count = 0
+
+    def update(self, x):
+        while self.items and self.items[0][0] <= self.count - self.length:
+            self.items.popleft()
+        while self.items and self.better(x, self.items[-1][1]):
+            self.items.pop()
+        self.items.append((self.count, x))
+        self.count += 1
+        return self.items[0][1] if self.count >= self.length else NAN
+
+    def peek(self, x):
+        if self.count + 1 < self.length:
+            return NAN
+        # The front may be the bar about to leave the window; the next entry is then the extreme
+        expiring = self.count - self.length
+        if self.items[0][0] > expiring:
+            return self.pick(self.items[0][1], x)
+        return self.pick(self.items[1][1], x) if len(self.items) > 1 else x
+
+
+class PSARState:
+    """
+    Parabolic SAR following ta.psar's loop. The only difference: on the second bar ta.psar's
+    high.iloc[row - 2] wraps around to the last bar of the series, which a streaming
+    calculation can't know, so this uses the first bar alone there.
+    """
+
+    def __init__(self, af0=0.02, max_af=0.2):
+        self.af0 = af0
+        self.max_af = max_af
+        self.count = 0
+        self.bars = deque(maxlen=2)   # (high, low) of the previous two bars
+        self.state = None             # (falling, sar, ep, af)
+
+    def _step(self, high, low, close):
+        if self.count == 0:
+            return NAN, None
+        (h1, l1) = self.bars[-1]
+        (h2, l2) = self.bars[0] if len(self.bars) == 2 else self.bars[-1]
+        if self.state is None:
+            # Initial trend from the first two bars, SAR starts at the first close
+            up, dn = high - h1, l1 - low
+            falling = dn > up and dn > 0
+            sar, ep = self.first_close, (l1 if falling else h1)
+            af = self.af0
+        else:
+            falling, sar, ep, af = self.state
+        _sar = sar + af * (ep - sar)
+        if falling:
+            reverse = high > _sar
+            if low < ep:
+                ep = low
+                af = min(af + self.af0, self.max_af)
+            _sar = max(h1, h2, _sar)
+        else:
+            reverse = low < _sar
+            if high > ep:
+                ep = high
+                af = min(af + self.af0, self.max_af)
+            _sar = min(l1, l2, _sar)
+        if reverse:
+            _sar = ep
+            af = self.af0
+            falling = not falling
+            ep = low if falling else high
+        return _sar, (falling, _sar, ep, af)
+
+    def update(self, high, low, close):
+        if self.count == 0:
+            self.first_close = close
+        value, state = self._step(high, low, close)
+        if state is not None:
+            self.state = state
+        self.bars.append((high, low))
+        self.count += 1
+        return value
+
+    def peek(self, high, low, close):
+        if self.count == 0:
+            return NAN
+        return self._step(high, low, close)[0]
+
+
+class StdState:
+    """Rolling standard deviation (ta.stdev: sqrt of the rolling variance)."""
+
+    def __init__(self, length, ddof=0):
+        self.var = VarState(length, ddof)
+
+    @staticmethod
+    def _sqrt(var):
+        return math.sqrt(var) if var == var else NAN
+
+    def update(self, x):
+        return self._sqrt(self.var.update(x))
+
+    def peek(self, x):
+        return self._sqrt(self.var.peek(x))
+
+
+class DonchianState:
+    """ta.donchian upper/lower: rolling max of highs, rolling min of lows."""
+
+    def __init__(self, length=20):
+        self.upper = RollingExtremeState(length, "max")
+        self.lower = RollingExtremeState(length, "min")
+
+    def update(self, high, low):
+        return self.upper.update(high), self.lower.update(low)
+
+    def peek(self, high, low):
+        return self.upper.peek(high), self.lower.peek(low)
+
+
+class VWAPState:
+    """
+    ta.vwap with the daily anchor: cumulative typical price * volume over cumulative
+    volume, restarting when the bar's session (bars.session_days) changes. On daily bars
+    each session is a single bar, so this is the bar's typical price.
+    """
+
+    def __init__(self):
+        self.session = None
+        self.pv = 0.0
+        self.volume = 0.0
+
+    def _step(self, high, low, close, volume, session):
+        pv, total = (self.pv, self.volume) if session == self.session else (0.0, 0.0)
+        weighted = (high + low + close) / 3.0 * volume
+        if weighted != weighted:
+            return NAN, pv, total
+        pv += weighted
+        total += volume
+        return (pv / total if total else NAN), pv, total
+
+    def update(self, high, low, close, volume, session):
+        value, self.pv, self.volume = self._step(high, low, close, volume, session)
+        self.session = session
+        return value
+
+    def peek(self, high, low, close, volume, session):
+        return self._step(high, low, close, volume, session)[0]
+
+
+class IndicatorEngine:
+    """
+    Every TechnicalAnalyst column in one stateful object. update() commits a closed bar in
+    O(1); peek() evaluates a forming bar without committing it. run() is the batch path
+    and is just update() over every row, so incremental and batch output are identical.
+    """
+
+    COLUMNS = ['SMA_20', 'SMA_50', 'SMA_200', 'EMA_20', 'EMA_50', 'EMA_200',
+               'BB_Upper', 'BB_Lower', 'BB_Mid', 'PSAR', 'DC_Upper', 'DC_Lower', 'VWAP', 'RSI']
+
+    def __init__(self):
+        self.sma = {n: SMAState(n) for n in (20, 50, 200)}
+        self.ema = {n: EMAState(n) for n in (20, 50, 200)}
+        self.bb_std = StdState(20, ddof=0)
+        self.psar = PSARState()
+        self.donchian = DonchianState(20)
+        self.vwap = VWAPState()
+        self.rsi = RSIState(14)
+        self.index = []
+        self.columns = {c: [] for c in self.COLUMNS}
+
+    def _row(self, op, bar, session):
+        o, h, l, c, v = bar
+        row = {}
+        for n, state in self.sma.items():
+            row[f'SMA_{n}'] = getattr(state, op)(c)
+        for n, state in self.ema.items():
+            row[f'EMA_{n}'] = getattr(state, op)(c)
+        deviation = 2.0 * getattr(self.bb_std, op)(c)
+        row['BB_Mid'] = row['SMA_20']
+        row['BB_Upper'] = row['SMA_20'] + deviation
+        row['BB_Lower'] = row['SMA_20'] - deviation
+        row['PSAR'] = getattr(self.psar, op)(h, l, c)
+        row['DC_Upper'], row['DC_Lower'] = getattr(self.donchian, op)(h, l)
+        row['VWAP'] = getattr(self.vwap, op)(h, l, c, v, session)
+        row['RSI'] = getattr(self.rsi, op)(c)
+        return row
+
+    def update(self, ts, bar, session=None):
+        """`session` defaults to the calendar day of `ts` (bars.session_days)."""
+        if session is None:
+            session = session_days([ts])[0]
+        row = self._row("update", bar, session)
+        self.index.append(ts)
+        for col, value in row.items():
+            self.columns[col].append(value)
+        return row
+
+    def peek(self, bar, ts=None, session=None):
+        """
+        `session` defaults to the calendar day of `ts`, or without `ts` to the last
+        committed bar's (the forming bar continues its session).
+        """
+        if session is None:
+            session = self.vwap.session if ts is None else session_days([ts])[0]
+        return self._row("peek", bar, session)
+
+    def frame(self):
+        """Committed outputs as a DataFrame."""
+        return pd.DataFrame({c: np.asarray(self.columns[c], dtype=float) for c in self.COLUMNS},
+                            index=pd.Index(self.index))
+
+    def run(self, df):
+        """Batch path: every bar through update()."""
+        bars = df[['Open', 'High', 'Low', 'Close', 'Volume']].astype(float)
+        for ts, bar, session in zip(df.index, bars.itertuples(index=False, name=None), session_days(df.index)):
+            self.update(ts, bar, session)
+        return self.frame()
@@ -0,0 +1,386 @@
+import os
+import threading
+import time
+import zlib
+import numpy as np
+import pandas as pd
+from utils.bars import (is_intraday, finer_intervals, fetch_interval, lookback_days,
+                        resample_bars, compact_bars, FETCH_LOOKBACK_DAYS)
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Calendar days covered by each yfinance period string
+PERIOD_DAYS = {
+    "1d": 1, "5d": 5, "1mo": 31, "3mo": 92, "6mo": 183,
+    "1y": 366, "2y": 731, "5y": 1827, "10y": 3653, "max": 365 * 30
+}
+
+
+# Shortest daily history kept per symbol; shorter periods are sliced out of it
+CANONICAL_PERIOD = os.getenv("QA_CANONICAL_PERIOD", "1y")
+
+
+def period_to_days(period):
+    if period == "ytd":
+        today = pd.Timestamp.today()
+        return (today - pd.Timestamp(year=today.year, month=1, day=1)).days + 1
+    return PERIOD_DAYS.get(period, 366)
+
+
+def clamp_period(period, interval="1d"):
+    """
+    Longest period <= `period` that can exist at `interval` (1m bars only go back a week).
+    Daily periods pass through unchanged.
+    """
+    limit = lookback_days(interval)
+    if limit is None or period_to_days(period) <= limit:
+        return period
+    fitting = [p for p, d in PERIOD_DAYS.items() if d <= limit]
+    return max(fitting, key=PERIOD_DAYS.get) if fitting else "1d"
+
+
+def covered_days(df):
+    """
+    Longest period (in PERIOD_DAYS terms) a history can answer. Allows a few days of
+    slack at the start of the window for weekends and holidays.
+    """
+    if df is None or df.empty:
+        return 0
+    return (df.index[-1] - df.index[0]).days + 6
+
+
+def slice_period(df, period):
+    """The last `period` of a history, anchored on its latest bar."""
+    if df.empty:
+        return df
+    start = df.index[-1] - pd.Timedelta(days=period_to_days(period) - 1)
+    return df[df.index >= start.normalize()]
+
+
+def split_by_ticker(raw, tickers):
+    """
+    Splits a (possibly MultiIndex) yf.download result into {ticker: OHLCV frame}.
+    """
+    out = {}
+    if raw is None or raw.empty:
+        return out
+
+    if isinstance(raw.columns, pd.MultiIndex):
+        # group_by='column' puts tickers on level 1, group_by='ticker' on level 0
+        level = 1 if set(tickers) & set(raw.columns.get_level_values(1)) else 0
+        available = set(raw.columns.get_level_values(level))
+        for t in tickers:
+            if t not in available:
+                continue
+            sub = raw.xs(t, axis=1, level=level)
+            cols = [c for c in OHLCV_COLUMNS if c in sub.columns]
+            sub = sub[cols].dropna(how='all')
+            if not sub.empty:
+                out[t] = sub
+        return out
+
+    # Flat columns only happen for a single-ticker download
+    if len(tickers) == 1:
+        cols = [c for c in OHLCV_COLUMNS if c in raw.columns]
+        sub = raw[cols].dropna(how='all')
+        if not sub.empty:
+            out[tickers[0]] = sub
+    return out
+
+
+class LocalPriceSource:
+    """
+    Offline price stand-in for yfinance. Generates deterministic synthetic bars per ticker
+    (seeded from the symbol) in the same MultiIndex layout yf.download returns.
+    """
+
+    EPOCH = pd.Timestamp("1996-01-01")
+    # Intraday bars follow a regular US session in exchange time, like yfinance's
+    TZ = "America/New_York"
+    SESSION_OPEN = pd.Timedelta(hours=9, minutes=30)
+    SESSION_MINUTES = 390
+
+    def __init__(self, end=None):
+        self.end = pd.Timestamp(end).normalize() if end is not None else pd.Timestamp.today().normalize()
+        self.calls = []
+        # Shared by every symbol; bdate_range over 30 years is the slow part of a download
+        self.calendar = pd.bdate_range(start=self.EPOCH, end=self.end)
+
+    def _daily(self, ticker):
+        # Every bar is pinned to its date (not to the request), so any two downloads agree on overlaps
+        seed = zlib.crc32(ticker.encode())
+        calendar = self.calendar
+        n = len(calendar)
+        close = (20 + seed % 480) * np.exp(np.cumsum(np.random.default_rng([seed, 0]).normal(0.0001, 0.018, n)))
+        spread = np.abs(np.random.default_rng([seed, 1]).normal(0, 0.01, n))
+        volume = np.random.default_rng([seed, 2]).integers(1_000_000, 50_000_000, n).astype(float)
+        open_ = np.concatenate([[close[0]], close[:-1]])
+        df = pd.DataFrame({
+            'Open': open_,
+            'High': np.maximum(open_, close) * (1 + spread),
+            'Low': np.minimum(open_, close) * (1 - spread),
+            'Close': close,
+            'Volume': volume
+        }, index=calendar)
+        return df
+
+    def _minutes(self, ticker, daily):
+        """
+        Minute bars for each session in `daily`: a random walk seeded by (ticker, date) and
+        bridged from the day's open to its close, so resampled minutes agree with daily bars.
+        """
+        seed = zlib.crc32(ticker.encode())
+        n = self.SESSION_MINUTES
+        steps, wick, weights = (np.empty((len(daily), n)) for _ in range(3))
+        for i, day in enumerate(daily.index):
+            rng = np.random.default_rng([seed, 3, day.toordinal()])
+            steps[i] = rng.normal(0, 0.0008, n)
+            wick[i] = np.abs(rng.normal(0, 0.0004, n))
+            weights[i] = rng.random(n)
+        walk = np.cumsum(steps, axis=1)
+        drift = np.log(daily['Close'].to_numpy() / daily['Open'].to_numpy())[:, None]
+        walk -= np.arange(1, n + 1) / n * (walk[:, -1:] - drift)
+        close = daily['Open'].to_numpy()[:, None] * np.exp(walk)
+        open_ = np.concatenate([daily['Open'].to_numpy()[:, None], close[:, :-1]], axis=1)
+        volume = np.floor(daily['Volume'].to_numpy()[:, None] * weights / weights.sum(axis=1, keepdims=True))
+        offsets = self.SESSION_OPEN + pd.to_timedelta(np.arange(n), unit='min')
+        index = (daily.index.repeat(n) + np.tile(offsets, len(daily))).tz_localize(self.TZ)
+        return pd.DataFrame({
+            'Open': open_.ravel(),
+            'High': (np.maximum(open_, close) * (1 + wick)).ravel(),
+            'Low': (np.minimum(open_, close) * (1 - wick)).ravel(),
+            'Close': close.ravel(),
+            'Volume': volume.ravel()
+        }, index=index)
+
+    def _bars(self, ticker, period, interval, start=None):
+        df = self._daily(ticker)
+        if is_intraday(interval):
+            # Same lookback limits as upstream; finer bars are built first and resampled up
+            oldest = self.end - pd.Timedelta(days=FETCH_LOOKBACK_DAYS.get(interval, 730) - 1)
+            if start is None:
+                first = max(oldest, self.end - pd.Timedelta(days=period_to_days(period) - 1))
+            else:
+                first = max(oldest, pd.Timestamp(start).replace(tzinfo=None).normalize())
+            bars = self._minutes(ticker, df[df.index >= first])
+            return bars if interval == "1m" else resample_bars(bars, interval)
+        if start is None:
+            start = self.end - pd.Timedelta(days=period_to_days(period) - 1)
+        return df[df.index >= pd.Timestamp(start)]
+
+    def download(self, tickers, period="1y", interval="1d", start=None):
+        tickers = list(tickers)
+        self.calls.append((tuple(tickers), start or period, interval))
+        frames = {t: self._bars(t, period, interval, start) for t in tickers}
+        return pd.concat(frames, axis=1).swaplevel(0, 1, axis=1).sort_index(axis=1)
+
+
+class MarketDataService:
+    """
+    Keeps one canonical history per (interval, ticker) and answers every period by slicing it.
+    Tickers requested during a render are merged across periods and fetched in one batched
+    download per (period, interval); daily fetches are never shorter than CANONICAL_PERIOD,
+    so a later 1y request for a 1mo sparkline symbol is already covered.
+    Intraday timeframes are built from the finest fresh series already held (15m and 1h
+    charts come out of stored 5m bars) and only downloaded when nothing finer covers them.
+    """
+
+    def __init__(self, source=None, ttl=600, store=None, canonical_period=None):
+        if source is None:
+            from utils.data_provider import get_provider
+            source = get_provider()
+        self.source = source
+        self.ttl = ttl
+        self.store = store
+        self.canonical_period = canonical_period or CANONICAL_PERIOD
+        self.download_count = 0
+        self._pending = {}   # (period, interval) -> [tickers]
+        self._frames = {}    # (interval, ticker) -> (fetched_at, covered days, DataFrame)
+        self._derived = {}   # (interval, ticker) -> (source interval, source fetched_at)
+        self._lock = threading.RLock()
+
+    def _is_fresh(self, period, interval, ticker):
+        entry = self._frames.get((interval, ticker))
+        derived = self._derived.get((interval, ticker))
+        if derived is not None:
+            source = self._frames.get((derived[0], ticker))
+            if source is None or source[0] != derived[1]:
+                return False
+        return (entry is not None and (time.time() - entry[0]) < self.ttl
+                and entry[1] >= period_to_days(period))
+
+    def _derive(self, ticker, period, interval):
+        """
+        Resamples `interval` bars out of the finest fresh series that tiles it and covers
+        `period`. Returns False when nothing held can produce them.
+        """
+        if not is_intraday(interval):
+            return False
+        days = period_to_days(period)
+        now = time.time()
+        with self._lock:
+            for source in finer_intervals(interval):
+                entry = self._frames.get((source, ticker))
+                if entry is None or now - entry[0] >= self.ttl or entry[1] < days:
+                    continue
+                if self._derived.get((interval, ticker)) != (source, entry[0]):
+                    bars = resample_bars(entry[2], interval)
+                    self._frames[(interval, ticker)] = (entry[0], covered_days(bars), bars)
+                    self._derived[(interval, ticker)] = (source, entry[0])
+                return True
+        return False
+
+    def request(self, tickers, period="1y", interval="1d"):
+        """
+        Registers tickers needed for this render. Nothing is downloaded until flush().
+        """
+        if isinstance(tickers, str):
+            tickers = [tickers]
+        period = clamp_period(period, interval)
+        source = fetch_interval(interval, period_to_days(period))
+        with self._lock:
+            pending = self._pending.setdefault((period, source), [])
+            for t in tickers:
+                if t in pending or self._is_fresh(period, interval, t) or self._derive(t, period, interval):
+                    continue
+                pending.append(t)
+
+    def _plan(self, pending):
+        """
+        Merges pending requests: each ticker is fetched once per interval, for the longest
+        period anyone asked for (and at least the canonical period for daily bars).
+        Returns {(period, interval): [tickers]}.
+        """
+        longest = {}
+        for (period, interval), tickers in pending.items():
+            for t in tickers:
+                current = longest.get((interval, t))
+                if current is None or period_to_days(period) > period_to_days(current):
+                    longest[(interval, t)] = period
+        batches = {}
+        for (interval, t), period in longest.items():
+            if interval == "1d" and period_to_days(period) < period_to_days(self.canonical_period):
+                period = self.canonical_period
+            batches.setdefault((period, interval), []).append(t)
+        return batches
+
+    def _keep(self, ticker, interval, frame, now):
+        if frame is None or frame.empty:
+            return
+        frame = compact_bars(frame, interval)
+        with self._lock:
+            self._frames[(interval, ticker)] = (now, covered_days(frame), frame)
+            self._derived.pop((interval, ticker), None)
+
+    def flush(self):
+        """
+        Downloads every pending ticker list, one download per merged (period, interval).
+        """
+        with self._lock:
+            pending = {k: v for k, v in self._pending.items() if v}
+            self._pending = {}
+
+        for (period, interval), tickers in self._plan(pending).items():
+            if self.store is not None:
+                # Bars live in the persistent store; only the delta goes over the wire
+                self.store.refresh(tickers, period=period, interval=interval)
+                now = time.time()
+                for t in tickers:
+                    self._keep(t, interval, self.store.load(t, interval), now)
+                continue
+            try:
+                raw = self.source.download(tickers, period=period, interval=interval)
+                self.download_count += 1
+            except Exception as e:
+                print(f"Error fetching batch {tickers}: {e}")
+                continue
+            now = time.time()
+            for t, frame in split_by_ticker(raw, tickers).items():
+                self._keep(t, interval, frame, now)
+
+    def _slice(self, ticker, period, interval):
+        if not self._is_fresh(period, interval, ticker):
+            self._derive(ticker, period, interval)
+        entry = self._frames.get((interval, ticker))
+        if entry is None:
+            return None
+        return slice_period(entry[2], period)
+
+    def get_ohlcv(self, ticker, period="1y", interval="1d"):
+        """
+        Returns one ticker's OHLCV slice (empty DataFrame if unavailable).
+        A miss is fetched together with anything else still pending.
+        Intraday periods are clamped to what exists at that interval.
+        """
+        period = clamp_period(period, interval)
+        if not self._is_fresh(period, interval, ticker):
+            self.request([ticker], period, interval)
+            self.flush()
+        frame = self._slice(ticker, period, interval)
+        if frame is None:
+            return pd.DataFrame()
+        return frame.copy()
+
+    def get_close(self, tickers, period="1y", interval="1d"):
+        """
+        Returns a Close matrix with one column per ticker, in the requested order.
+        """
+        period = clamp_period(period, interval)
+        self.request(tickers, period, interval)
+        self.flush()
+        closes = {}
+        for t in tickers:
+            frame = self._slice(t, period, interval)
+            if frame is not None and 'Close' in frame.columns:
+                closes[t] = frame['Close']
+        if not closes:
+            return pd.DataFrame()
+        return pd.DataFrame(closes)
+
+    def clear(self):
+        with self._lock:
+            self._pending = {}
+            self._frames = {}
+            self._derived = {}
+
+    def memory(self):
+        """Bytes held per interval."""
+        usage = {}
+        with self._lock:
+            for (interval, _), (_, _, frame) in self._frames.items():
+                usage[interval] = usage.get(interval, 0) + int(frame.memory_usage(index=True).sum())
+        return usage
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_market_data_service():
+    """
+    Process-wide service on top of get_provider() (QA_DATA_PROVIDER=local runs offline).
+    Daily bars are persisted in the PriceStore (disable with QA_PRICE_STORE=off). Record and
+    replay runs skip it: the recordings are the store, and a store shared with live runs
+    would mix live bars into a replay.
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            from utils.data_provider import get_provider
+            from utils.price_store import PriceStore
+            source = get_provider()
+            store = None
+            replaying = os.getenv("QA_DATA_PROVIDER", "live").lower() in ("record", "replay")
+            if not replaying and os.getenv("QA_PRICE_STORE", "").lower() != "off":
+                try:
+                    store = PriceStore(source)
+                except Exception as e:
+                    print(f"Price store unavailable: {e}")
+            _service = MarketDataService(source=source, store=store)
+        return _service
+
+
+def set_market_data_service(service):
+    global _service
+    with _service_lock:
+        _service = service
@@ -0,0 +1,246 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from utils.bars import session_days
+
+PANEL_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def panel_from_frames(frames):
+    """
+    {ticker: OHLCV DataFrame} -> {field: DataFrame (dates x symbols)} on the union of dates.
+    Symbols that don't trade on a date (weekends for stocks, holidays) are NaN there.
+    """
+    frames = {t: f for t, f in frames.items() if f is not None and not f.empty}
+    if not frames:
+        return {}
+    # Aligning thousands of Series through the DataFrame constructor is slow; place each
+    # symbol's rows into preallocated arrays by position instead
+    symbols = list(frames)
+    first, *rest = frames.values()
+    index = first.index.append([f.index for f in rest]).unique().sort_values()
+    values = np.full((len(PANEL_FIELDS), len(index), len(symbols)), np.nan)
+    for j, f in enumerate(frames.values()):
+        rows = index.get_indexer(f.index)
+        if list(f.columns) != PANEL_FIELDS:
+            f = f.reindex(columns=PANEL_FIELDS)
+        values[:, rows, j] = f.to_numpy(dtype=float).T
+    return {field: pd.DataFrame(values[k], index=index, columns=symbols) for k, field in enumerate(PANEL_FIELDS)}
+
+
+def _compact(mask):
+    """
+    Row order that moves each column's valid rows to the top (stable). Every symbol then
+    starts at row 0 with no gaps, so windows and recursions run on its own trading days.
+    """
+    return np.argsort(~mask, axis=0, kind='stable')
+
+
+def _take(x, order):
+    return np.take_along_axis(x, order, axis=0)
+
+
+def _put(values, order, valid):
+    out = np.full(values.shape, np.nan)
+    np.put_along_axis(out, order, np.where(valid, values, np.nan), axis=0)
+    return out
+
+
+def _window(x, length, fn):
+    """fn over trailing windows along time; NaN until a full window (rolling(length) semantics)."""
+    out = np.full(x.shape, np.nan)
+    if x.shape[0] >= length:
+        out[length - 1:] = fn(sliding_window_view(x, length, axis=0), axis=-1)
+    return out
+
+
+def sma(x, length):
+    return _window(x, length, np.mean)
+
+
+def rolling_std(x, length, ddof=0):
+    return _window(x, length, lambda w, axis: np.std(w, axis=axis, ddof=ddof))
+
+
+def rolling_max(x, length):
+    return _window(x, length, np.max)
+
+
+def rolling_min(x, length):
+    return _window(x, length, np.min)
+
+
+def ema(x, length):
+    """pandas_ta ema: SMA seed at row length-1, then the recursive (adjust=False) form."""
+    out = np.full(x.shape, np.nan)
+    if x.shape[0] < length:
+        return out
+    alpha = 2.0 / (length + 1)
+    out[length - 1] = x[:length].mean(axis=0)
+    for t in range(length, x.shape[0]):
+        out[t] = (1 - alpha) * out[t - 1] + alpha * x[t]
+    return out
+
+
+def rma(x, length):
+    """pandas_ta rma: ewm(alpha=1/length, adjust=True, min_periods=length) from row 1."""
+    out = np.full(x.shape, np.nan)
+    decay = 1.0 - 1.0 / length
+    num = np.zeros(x.shape[1:])
+    den = np.zeros(x.shape[1:])
+    for t in range(1, x.shape[0]):
+        num = decay * num + x[t]
+        den = decay * den + 1.0
+        if t >= length:
+            out[t] = num / den
+    return out
+
+
+def rsi(close, length=14):
+    diff = np.full(close.shape, np.nan)
+    diff[1:] = np.diff(close, axis=0)
+    up = rma(np.where(diff > 0, diff, 0.0), length)
+    down = rma(np.where(diff < 0, diff, 0.0), length)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return 100 * up / (up + np.abs(down))
+
+
+def vwap(high, low, close, volume, session):
+    """
+    Same running sums as utils.indicators.VWAPState (typical price * volume over volume,
+    restarting when `session` changes), stepped for every symbol at once.
+    """
+    weighted = (high + low + close) / 3.0 * volume
+    valid = ~np.isnan(weighted)
+    out = np.full(weighted.shape, np.nan)
+    pv = np.zeros(weighted.shape[1:])
+    total = np.zeros(weighted.shape[1:])
+    for t in range(weighted.shape[0]):
+        if t:
+            new = session[t] != session[t - 1]
+            pv = np.where(new, 0.0, pv)
+            total = np.where(new, 0.0, total)
+        pv = np.where(valid[t], pv + weighted[t], pv)
+        total = np.where(valid[t], total + volume[t], total)
+        out[t] = np.where(valid[t] & (total != 0), pv / np.where(total != 0, total, 1.0), np.nan)
+    return out
+
+
+def psar(high, low, close, af0=0.02, max_af=0.2):
+    """Same loop as utils.indicators.PSARState, stepped for every symbol at once."""
+    n = high.shape[0]
+    out = np.full(high.shape, np.nan)
+    if n < 2:
+        return out
+    up, dn = high[1] - high[0], low[0] - low[1]
+    falling = (dn > up) & (dn > 0)
+    sar = close[0].copy()
+    ep = np.where(falling, low[0], high[0])
+    af = np.full(high.shape[1:], af0)
+    for t in range(1, n):
+        h, l = high[t], low[t]
+        h1, l1 = high[t - 1], low[t - 1]
+        h2, l2 = (high[t - 2], low[t - 2]) if t >= 2 else (h1, l1)
+        _sar = sar + af * (ep - sar)
+        reverse = np.where(falling, h > _sar, l < _sar)
+        new_ep = np.where(falling, l < ep, h > ep)
+        ep = np.where(new_ep, np.where(falling, l, h), ep)
+        af = np.where(new_ep, np.minimum(af + af0, max_af), af)
+        _sar = np.where(falling, np.maximum(np.maximum(h1, h2), _sar), np.minimum(np.minimum(l1, l2), _sar))
+        _sar = np.where(reverse, ep, _sar)
+        af = np.where(reverse, af0, af)
+        falling = np.where(reverse, ~falling, falling)
+        ep = np.where(reverse, np.where(falling, l, h), ep)
+        sar = _sar
+        out[t] = sar
+    return out
+
+
+def compute_panel_indicators(panel):
+    """
+    Every TechnicalAnalyst column for every symbol in one pass.
+    `panel` is {field: DataFrame (dates x symbols)}; returns {column: DataFrame (dates x symbols)}.
+    """
+    if not panel:
+        return {}
+    close_df = panel['Close']
+    index, symbols = close_df.index, close_df.columns
+    valid = close_df.notna().to_numpy()
+    order = _compact(valid)
+    packed_valid = _take(valid, order)
+    f = {field: _take(panel[field].reindex(index=index, columns=symbols).to_numpy(dtype=float), order)
+         for field in PANEL_FIELDS}
+    c = f['Close']
+
+    out = {}
+    for n in (20, 50, 200):
+        out[f'SMA_{n}'] = sma(c, n)
+        out[f'EMA_{n}'] = ema(c, n)
+    deviation = 2.0 * rolling_std(c, 20, ddof=0)
+    out['BB_Mid'] = out['SMA_20']
+    out['BB_Upper'] = out['SMA_20'] + deviation
+    out['BB_Lower'] = out['SMA_20'] - deviation
+    out['PSAR'] = psar(f['High'], f['Low'], c)
+    out['DC_Upper'] = rolling_max(f['High'], 20)
+    out['DC_Lower'] = rolling_min(f['Low'], 20)
+    # Each symbol's rows are compacted, so its sessions are taken along with them
+    session = _take(np.broadcast_to(session_days(index)[:, None], c.shape), order)
+    out['VWAP'] = vwap(f['High'], f['Low'], c, f['Volume'], session)
+    out['RSI'] = rsi(c, 14)
+
+    return {col: pd.DataFrame(_put(values, order, packed_valid), index=index, columns=symbols)
+            for col, values in out.items()}
+
+
+def latest_values(indicators, panel=None):
+    """
+    One row per symbol with each indicator's value on that symbol's last trading day
+    (plus OHLCV when the panel is given).
+    """
+    columns = dict(indicators)
+    if panel:
+        columns.update({field: panel[field] for field in PANEL_FIELDS if field in panel})
+    if not columns:
+        return pd.DataFrame()
+    return pd.DataFrame({name: df.ffill().iloc[-1] for name, df in columns.items()})
+
+
+def trailing_returns(close_df, lags=(1, 5, 21)):
+    """
+    {f'Return_{k}D': Series} - percent change over each symbol's own last k trading days
+    (NaN where a symbol has fewer than k+1 bars).
+    """
+    if close_df is None or close_df.empty:
+        return {}
+    values = close_df.to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    packed = _take(values, _compact(valid))
+    last = valid.sum(axis=0) - 1
+    cols = np.arange(values.shape[1])
+    latest = packed[np.maximum(last, 0), cols]
+    out = {}
+    for k in lags:
+        prior = packed[np.maximum(last - k, 0), cols]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            change = np.where(last >= k, (latest / prior - 1) * 100, np.nan)
+        out[f'Return_{k}D'] = pd.Series(change, index=close_df.columns)
+    return out
+
+
+def pack_panel(columns, valid):
+    """
+    {name: DataFrame (dates x symbols)} -> {name: ndarray} with each symbol's valid rows
+    moved to the top (see _compact), plus each symbol's row count. Time-window functions
+    applied to the packed arrays see a symbol's own trading days only.
+    """
+    valid = np.asarray(valid, dtype=bool)
+    order = _compact(valid)
+    packed = {name: _take(df.to_numpy(dtype=float), order) for name, df in columns.items()}
+    return packed, valid.sum(axis=0)
+
+
+def last_rows(values, counts):
+    """Each symbol's value on its last valid row of a packed array (NaN if it has none)."""
+    values = np.asarray(values, dtype=float)
+    cols = np.arange(values.shape[1])
+    return np.where(counts > 0, values[np.maximum(counts - 1, 0), cols], np.nan)
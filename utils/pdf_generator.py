@@ -2,12 +2,15 @@ from fpdf import FPDF
 import datetime
 import os
 import tempfile
+import threading
+from collections import OrderedDict
 import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import pandas as pd
 from agents.valuation_agent import ValuationAgent
 from agents.peer_agent import PeerAgent
+from utils.bars import data_version
 
 class PDFReport(FPDF):
     def header(self):
@@ -163,6 +166,30 @@ def _plot_trend_chart(df, path):
     fig.savefig(path, bbox_inches="tight", facecolor=fig.get_facecolor())
     plt.close(fig)
 
+# Rendered chart PNGs by (chart, content version of the frame): re-exporting a report for
+# unchanged data skips matplotlib entirely
+_CHART_CACHE_SIZE = 32
+_chart_cache = OrderedDict()
+_chart_lock = threading.Lock()
+
+def _render_chart(plot, df, path):
+    key = (plot.__name__, data_version(df))
+    with _chart_lock:
+        png = _chart_cache.get(key)
+        if png is not None:
+            _chart_cache.move_to_end(key)
+    if png is None:
+        plot(df, path)
+        with open(path, "rb") as f:
+            png = f.read()
+        with _chart_lock:
+            _chart_cache[key] = png
+            while len(_chart_cache) > _CHART_CACHE_SIZE:
+                _chart_cache.popitem(last=False)
+    else:
+        with open(path, "wb") as f:
+            f.write(png)
+
 def _add_table(pdf, headers, rows, col_widths):
     pdf.set_font('Arial', 'B', 9)
     pdf.set_fill_color(10, 18, 26)
@@ -246,7 +273,7 @@ def create_pdf(ticker, summary, analysis_text, filename="report.pdf", price_df=N
                 rsi_path = os.path.join(tmpdir, "rsi.png")
                 trend_path = os.path.join(tmpdir, "trend.png")
                 try:
-                    _plot_price_chart(price_df, price_path)
+                    _render_chart(_plot_price_chart, price_df, price_path)
                     pdf.image(price_path, x=12, w=186)
                     pdf.chart_caption("Figure 1. Price with 50/200-day averages (1M window).")
                     pdf.ln(6)
@@ -254,14 +281,14 @@ def create_pdf(ticker, summary, analysis_text, filename="report.pdf", price_df=N
                     pass
                 try:
                     if "RSI" in price_df.columns:
-                        _plot_rsi_chart(price_df, rsi_path)
+                        _render_chart(_plot_rsi_chart, price_df, rsi_path)
                         pdf.image(rsi_path, x=12, w=186)
                         pdf.chart_caption("Figure 2. RSI(14) with overbought/oversold bands.")
                         pdf.ln(6)
                 except Exception:
                     pass
                 try:
-                    _plot_trend_chart(price_df, trend_path)
+                    _render_chart(_plot_trend_chart, price_df, trend_path)
                     pdf.image(trend_path, x=12, w=186)
                     pdf.chart_caption("Figure 3. Normalized trend (base=100).")
                     pdf.ln(6)
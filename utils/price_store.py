@@ -0,0 +1,140 @@
+import os
+import re
+import time
+import threading
+import pandas as pd
+from utils.market_data import OHLCV_COLUMNS, covered_days, period_to_days, slice_period, split_by_ticker
+from utils.bars import is_intraday, compact_bars, FETCH_LOOKBACK_DAYS
+
+DEFAULT_STORE_DIR = os.getenv(
+    "QA_PRICE_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".price_store")
+)
+
+
+class PriceStore:
+    """
+    On-disk OHLCV history, one Parquet file per (symbol, interval).
+    Refreshes only download the bars after the last stored timestamp and append them.
+    Intraday series (1m/5m/15m/30m/1h) are kept compact: float32 fields, trimmed to
+    RETENTION_DAYS on every write, so a few weeks of minute bars accumulate across refreshes
+    even though upstream only serves the last week.
+    """
+
+    def __init__(self, source, root=None, ttl=600):
+        self.source = source
+        self.root = root or DEFAULT_STORE_DIR
+        self.ttl = ttl
+        self.delta_downloads = 0
+        self.full_downloads = 0
+        self._memory = {}    # (symbol, interval) -> DataFrame
+        self._refreshed_at = {}  # (symbol, interval) -> time of last successful refresh
+        self._lock = threading.RLock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, symbol, interval="1d"):
+        safe = re.sub(r'[^A-Za-z0-9.\-]', '_', symbol)
+        return os.path.join(self.root, f"{safe}_{interval}.parquet")
+
+    def load(self, symbol, interval="1d"):
+        """
+        Full stored history for a symbol (empty DataFrame if never fetched).
+        """
+        key = (symbol, interval)
+        with self._lock:
+            if key in self._memory:
+                return self._memory[key]
+        df = pd.DataFrame()
+        path = self.path(symbol, interval)
+        if os.path.exists(path):
+            try:
+                df = pd.read_parquet(path)
+            except Exception as e:
+                print(f"Error reading price store {path}: {e}")
+                df = pd.DataFrame()
+        with self._lock:
+            self._memory[key] = df
+        return df
+
+    def _save(self, symbol, interval, df):
+        df = compact_bars(df, interval)
+        with self._lock:
+            self._memory[(symbol, interval)] = df
+            self._refreshed_at[(symbol, interval)] = time.time()
+        try:
+            df.to_parquet(self.path(symbol, interval))
+        except Exception as e:
+            # Keep serving from memory even if the disk write fails
+            print(f"Error writing price store for {symbol}: {e}")
+
+    def _append(self, symbol, interval, new_bars):
+        current = self.load(symbol, interval)
+        if current.empty:
+            merged = new_bars
+        else:
+            # The last stored bar may still have been forming; the delta copy wins
+            merged = pd.concat([current[current.index < new_bars.index[0]], new_bars])
+            merged = merged[~merged.index.duplicated(keep='last')]
+        self._save(symbol, interval, merged.sort_index())
+
+    def covers(self, symbol, period="1y", interval="1d"):
+        return covered_days(self.load(symbol, interval)) >= period_to_days(period)
+
+    def refresh(self, symbols, period="1y", interval="1d"):
+        """
+        Brings every symbol up to date. Uncovered symbols get one batched full download;
+        stored symbols get one batched delta download per last-stored date.
+        """
+        full, deltas = [], {}
+        now = time.time()
+        for s in symbols:
+            if self.covers(s, period, interval):
+                if now - self._refreshed_at.get((s, interval), 0) < self.ttl:
+                    continue
+                start = pd.Timestamp(self.load(s, interval).index[-1])
+                if is_intraday(interval):
+                    # Upstream can't serve a delta older than its intraday lookback
+                    age = (pd.Timestamp.now(tz=start.tz) - start).days
+                    if age >= FETCH_LOOKBACK_DAYS.get(interval, 0):
+                        full.append(s)
+                        continue
+                deltas.setdefault(start.strftime('%Y-%m-%d'), []).append(s)
+            else:
+                full.append(s)
+
+        if full:
+            try:
+                raw = self.source.download(full, period=period, interval=interval)
+                self.full_downloads += 1
+                for s, bars in split_by_ticker(raw, full).items():
+                    bars = bars[[c for c in OHLCV_COLUMNS if c in bars.columns]].sort_index()
+                    if is_intraday(interval):
+                        # Keep the older stored bars the new window no longer reaches
+                        self._append(s, interval, bars)
+                    else:
+                        self._save(s, interval, bars)
+            except Exception as e:
+                print(f"Error fetching history for {full}: {e}")
+
+        for start, group in deltas.items():
+            try:
+                raw = self.source.download(group, interval=interval, start=start)
+                self.delta_downloads += 1
+                for s, bars in split_by_ticker(raw, group).items():
+                    self._append(s, interval, bars[[c for c in OHLCV_COLUMNS if c in bars.columns]])
+            except Exception as e:
+                print(f"Error fetching delta for {group}: {e}")
+
+    def memory(self):
+        """Bytes held in memory per interval."""
+        usage = {}
+        with self._lock:
+            for (_, interval), df in self._memory.items():
+                usage[interval] = usage.get(interval, 0) + int(df.memory_usage(index=True).sum())
+        return usage
+
+    def get(self, symbol, period="1y", interval="1d"):
+        """
+        Slices the requested period out of the stored history without touching the network.
+        """
+        return slice_period(self.load(symbol, interval), period).copy()
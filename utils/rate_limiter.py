@@ -0,0 +1,251 @@
+import random
+from collections import deque
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """Raised when an endpoint's breaker is open and calls are being shed."""
+
+
+def is_throttle_error(exc):
+    """
+    yfinance surfaces throttling as YFRateLimitError or as an HTTP 429 message.
+    """
+    name = type(exc).__name__.lower()
+    text = str(exc).lower()
+    return "ratelimit" in name or "429" in text or "too many requests" in text or "rate limit" in text
+
+
+# Transport-level failures by class name, so requests / urllib3 / curl_cffi errors are
+# recognised without importing them
+_TRANSPORT_ERRORS = ("timeout", "connectionerror", "curlerror", "requestexception", "requestserror",
+                     "protocolerror", "sslerror")
+
+
+def is_transport_error(exc):
+    """
+    The endpoint couldn't be reached or didn't answer (connection, timeout, TLS errors).
+    Errors the endpoint did answer with (unknown symbol, bad data) are not transport errors.
+    """
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    return any(cls.__name__.lower() in _TRANSPORT_ERRORS or "timeout" in cls.__name__.lower()
+               for cls in type(exc).__mro__)
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second, bursts up to `capacity`; FIFO waiters.
+    """
+
+    def __init__(self, rate=5.0, capacity=10):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._slowed_at = 0.0
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._queue = deque()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout=None, retry=False):
+        """
+        Blocks until a token is available, first-in first-out: only the caller at the head
+        of the queue may take a token, so a newcomer can't grab the one a waiter was
+        sleeping for. A `retry` already queued once and goes to the front.
+        Returns False as soon as the queue ahead can't clear before `timeout`.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        me = object()
+        with self._cond:
+            if retry:
+                self._queue.appendleft(me)
+            else:
+                self._queue.append(me)
+            try:
+                while True:
+                    self._refill()
+                    ahead = self._queue.index(me)
+                    wait = max(0.0, (ahead + 1 - self._tokens) / self.rate)
+                    if ahead == 0 and self._tokens >= 1:
+                        self._tokens -= 1
+                        return True
+                    if deadline is not None and time.monotonic() + wait > deadline:
+                        return False
+                    # Only the head sleeps on the refill; everyone else waits to move up
+                    self._cond.wait(wait if ahead == 0 else None)
+            finally:
+                self._queue.remove(me)
+                self._cond.notify_all()
+
+    def slow_down(self, factor=0.5, floor=0.5, cooldown=1.0):
+        """
+        Multiplicative decrease when upstream says we're going too fast. A burst of 429s
+        from concurrent callers counts once per `cooldown` seconds.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now - self._slowed_at < cooldown:
+                return
+            self._slowed_at = now
+            self.rate = max(floor, self.rate * factor)
+            # Upstream just refused us: the burst allowance is gone too
+            self._tokens = min(self._tokens, 0.0)
+
+    def speed_up(self, step=0.1, ceiling=None):
+        """Additive increase back towards the configured rate."""
+        with self._lock:
+            ceiling = self.rate + step if ceiling is None else ceiling
+            self.rate = min(ceiling, self.rate + step)
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures;
+    open -> half-open after `reset_timeout` seconds; one trial call decides.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self._opened_at >= self.reset_timeout:
+                    self.state = "half-open"
+                    return True
+                return False
+            # Half-open lets exactly one trial call through
+            return self.state == "closed"
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self.state = "closed"
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half-open" or self._failures >= self.failure_threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        """
+        A trial call ended without an outcome (e.g. it never got a token): back to open,
+        so the next call after the reset timeout gets to try again.
+        """
+        with self._lock:
+            if self.state == "half-open":
+                self.state = "open"
+
+
+class RateLimiter:
+    """
+    Adaptive limiter shared by every provider call: token bucket up front, jittered
+    exponential backoff on throttling (AIMD on the bucket rate), and one circuit
+    breaker per endpoint type.
+    """
+
+    def __init__(self, rate=5.0, capacity=10, max_retries=4, base_delay=0.25, max_delay=8.0,
+                 failure_threshold=5, reset_timeout=30.0, acquire_timeout=10.0):
+        self.bucket = TokenBucket(rate, capacity)
+        self.target_rate = rate
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.acquire_timeout = acquire_timeout
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.throttled = 0
+        self.retries = 0
+
+    def breaker(self, endpoint):
+        with self._lock:
+            if endpoint not in self._breakers:
+                self._breakers[endpoint] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._breakers[endpoint]
+
+    def backoff(self, attempt):
+        # "Full jitter": spreads retries out so sessions don't retry in lockstep
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def throttle(self):
+        """
+        Upstream pushed back: multiplicative decrease on the bucket. Also called for throttles
+        that don't raise, like the empty frames yf.download returns for rate-limited symbols.
+        """
+        self.bucket.slow_down()
+        with self._lock:
+            self.throttled += 1
+
+    def call(self, endpoint, fn, *args, **kwargs):
+        """
+        Only throttling (after retries) and transport errors count against the endpoint's
+        breaker; any answer from upstream, including an error like an unknown symbol,
+        shows the endpoint is up.
+        """
+        breaker = self.breaker(endpoint)
+        if not breaker.allow():
+            raise CircuitOpenError(f"{endpoint} circuit open")
+
+        recorded = False
+        try:
+            attempt = 0
+            while True:
+                if not self.bucket.acquire(timeout=self.acquire_timeout, retry=attempt > 0):
+                    raise CircuitOpenError(f"{endpoint} rate limit queue timed out")
+                with self._lock:
+                    self.calls += 1
+                try:
+                    result = fn(*args, **kwargs)
+                except Exception as e:
+                    if not is_throttle_error(e):
+                        recorded = True
+                        if is_transport_error(e):
+                            breaker.record_failure()
+                        else:
+                            breaker.record_success()
+                        raise
+                    self.throttle()
+                    if attempt >= self.max_retries:
+                        recorded = True
+                        breaker.record_failure()
+                        raise
+                    attempt += 1
+                    with self._lock:
+                        self.retries += 1
+                    time.sleep(self.backoff(attempt))
+                    continue
+                recorded = True
+                breaker.record_success()
+                self.bucket.speed_up(step=self.target_rate * 0.05, ceiling=self.target_rate)
+                return result
+        finally:
+            if not recorded:
+                breaker.release()
+
+    def stats(self):
+        with self._lock:
+            states = {k: b.state for k, b in self._breakers.items()}
+        return {
+            "calls": self.calls,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "rate": round(self.bucket.rate, 2),
+            "breakers": states
+        }
@@ -0,0 +1,226 @@
+import abc
+import numpy as np
+import pandas as pd
+from scipy import optimize, signal, stats
+
+
+def log_returns(close):
+    close = pd.to_numeric(pd.Series(close), errors="coerce").dropna()
+    return np.diff(np.log(close.to_numpy(dtype=np.float64)))
+
+
+class ReturnModel(abc.ABC):
+    """
+    Interface of the Monte Carlo return engines. fit(close) estimates the model from a
+    price history; fill(out, rng, shocks) writes a days x n block of daily log returns
+    into `out` (float32). Models with `uses_shocks` are driven by the standard-normal
+    `shocks` they're given (so antithetic and Sobol sampling apply); the others draw from
+    `rng`. mean_log_return is the expected daily log return, the control-variate mean.
+    """
+
+    name = None
+    uses_shocks = True
+
+    @abc.abstractmethod
+    def fit(self, close):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def fill(self, out, rng, shocks=None):
+        raise NotImplementedError
+
+    @property
+    @abc.abstractmethod
+    def mean_log_return(self):
+        raise NotImplementedError
+
+    @staticmethod
+    def _normals(out, rng, shocks):
+        if shocks is None:
+            rng.standard_normal(dtype=np.float32, out=out)
+        else:
+            out[:] = shocks
+
+
+class GBMModel(ReturnModel):
+    """Constant drift and volatility of simple returns (lognormal prices)."""
+
+    name = "gbm"
+
+    def __init__(self, mu=0.0, sigma=0.0):
+        self.mu = mu
+        self.sigma = sigma
+
+    def fit(self, close):
+        returns = pd.Series(close).pct_change().dropna()
+        self.mu, self.sigma = float(returns.mean()), float(returns.std())
+        return self
+
+    def fill(self, out, rng, shocks=None):
+        self._normals(out, rng, shocks)
+        out *= self.sigma
+        out += self.mean_log_return
+
+    @property
+    def mean_log_return(self):
+        return self.mu - 0.5 * self.sigma**2
+
+
+class BootstrapModel(ReturnModel):
+    """
+    Circular block bootstrap of historical log returns: each path is stitched from blocks
+    of `block` consecutive days starting at uniform random dates, which keeps short-range
+    autocorrelation and volatility clusters and the empirical tails.
+    """
+
+    name = "bootstrap"
+    uses_shocks = False
+
+    def __init__(self, block=10):
+        self.block = block
+        self.returns = np.zeros(1, dtype=np.float32)
+
+    def fit(self, close):
+        self.returns = log_returns(close).astype(np.float32)
+        return self
+
+    def fill(self, out, rng, shocks=None):
+        days, n = out.shape
+        blocks = -(-days // self.block)
+        starts = rng.integers(0, len(self.returns), (blocks, 1, n))
+        index = (starts + np.arange(self.block)[None, :, None]) % len(self.returns)
+        out[:] = self.returns[index.reshape(blocks * self.block, n)[:days]]
+
+    @property
+    def mean_log_return(self):
+        # Circular blocks draw every date equally often: the historical mean exactly
+        return float(self.returns.mean(dtype=np.float64))
+
+
+class GarchModel(ReturnModel):
+    """
+    GARCH(1,1) on demeaned log returns, fitted by Gaussian maximum likelihood:
+    var[t] = omega + alpha * eps[t-1]^2 + beta * var[t-1]. Paths start from the one-step
+    forecast after the last bar. The recursion is sequential in time but vectorized across
+    paths, so a block costs `days` array operations.
+    """
+
+    name = "garch"
+
+    def __init__(self):
+        self.mu = 0.0
+        self.omega, self.alpha, self.beta = 0.0, 0.0, 0.0
+        self.next_variance = 0.0
+
+    @staticmethod
+    def _variances(eps, omega, alpha, beta, initial):
+        # var[t] = omega + alpha * eps[t-1]^2 + beta * var[t-1] as one linear filter pass
+        drive = omega + alpha * eps[:-1] ** 2
+        tail = signal.lfilter([1.0], [1.0, -beta], drive, zi=[beta * initial])[0]
+        return np.r_[initial, tail]
+
+    def fit(self, close):
+        r = log_returns(close)
+        self.mu = float(r.mean())
+        eps = r - self.mu
+        initial = float(eps.var())
+
+        def nll(params):
+            w, alpha, beta = params
+            if alpha + beta >= 0.999:
+                return 1e10
+            var = self._variances(eps, w * initial, alpha, beta, initial)
+            return 0.5 * float(np.sum(np.log(var) + eps**2 / var))
+
+        # omega as a fraction of the sample variance keeps the three parameters on one scale
+        fit = optimize.minimize(nll, [0.05, 0.05, 0.9], method="L-BFGS-B",
+                                bounds=[(1e-6, 1.0), (0.0, 0.999), (0.0, 0.999)])
+        w, alpha, beta = fit.x if fit.success and fit.fun < 1e10 else (1.0, 0.0, 0.0)
+        self.omega, self.alpha, self.beta = w * initial, float(alpha), float(beta)
+        var = self._variances(eps, self.omega, self.alpha, self.beta, initial)
+        self.next_variance = self.omega + self.alpha * eps[-1] ** 2 + self.beta * var[-1]
+        return self
+
+    def fill(self, out, rng, shocks=None):
+        self._normals(out, rng, shocks)
+        var = np.full(out.shape[1], self.next_variance, dtype=np.float32)
+        for t in range(out.shape[0]):
+            row = out[t]
+            row *= np.sqrt(var)          # eps[t]
+            var *= self.beta
+            var += self.omega + self.alpha * row * row
+            row += self.mu
+
+    @property
+    def mean_log_return(self):
+        return self.mu
+
+
+class JumpDiffusionModel(ReturnModel):
+    """
+    Fat-tailed diffusion plus Poisson jumps: daily log return = loc + scale * t(nu) plus
+    N ~ Poisson(lam) jumps of Normal(jump_mu, jump_sigma). Returns more than `threshold`
+    robust standard deviations from the median are counted as jumps; the Student-t is
+    fitted to the rest. The normal shocks drive the t numerator.
+    """
+
+    name = "jump"
+
+    def __init__(self, threshold=4.0):
+        self.threshold = threshold
+        self.nu, self.loc, self.scale = 30.0, 0.0, 0.0
+        self.lam, self.jump_mu, self.jump_sigma = 0.0, 0.0, 0.0
+
+    def fit(self, close):
+        r = log_returns(close)
+        center = np.median(r)
+        spread = 1.4826 * np.median(np.abs(r - center))
+        jumps = np.abs(r - center) > self.threshold * spread if spread > 0 else np.zeros(len(r), bool)
+        if jumps.sum() >= 2:
+            self.lam = float(jumps.mean())
+            self.jump_mu, self.jump_sigma = float(r[jumps].mean()), float(r[jumps].std(ddof=1))
+        else:
+            jumps[:] = False
+        nu, self.loc, self.scale = stats.t.fit(r[~jumps])
+        # nu > 2 keeps the variance finite
+        self.nu = float(np.clip(nu, 2.5, 100.0))
+        return self
+
+    def fill(self, out, rng, shocks=None):
+        self._normals(out, rng, shocks)
+        out *= self.scale / np.sqrt(rng.chisquare(self.nu, out.shape).astype(np.float32) / self.nu)
+        out += self.loc
+        if self.lam > 0:
+            counts = rng.poisson(self.lam, out.shape)
+            hit = counts > 0
+            n = counts[hit]
+            out[hit] += n * self.jump_mu + np.sqrt(n) * self.jump_sigma * rng.standard_normal(len(n))
+
+    @property
+    def mean_log_return(self):
+        return self.loc + self.lam * self.jump_mu
+
+
+MODELS = {cls.name: cls for cls in (GBMModel, BootstrapModel, GarchModel, JumpDiffusionModel)}
+
+
+def fit_model(name, close):
+    if name not in MODELS:
+        raise ValueError(f"Unknown return model: {name} (available: {', '.join(MODELS)})")
+    return MODELS[name]().fit(close)
+
+
+def simulate_paths(model, start_price, days, simulations, rng=None, shocks=None):
+    """
+    (days + 1) x simulations float32 price paths from `model`, row 0 being start_price,
+    and each path's summed log return (float64) for the control variate.
+    """
+    paths = np.empty((days + 1, simulations), dtype=np.float32)
+    paths[0] = 0.0
+    returns = paths[1:]
+    model.fill(returns, np.random.default_rng(rng), shocks)
+    summed = returns.sum(axis=0, dtype=np.float64)
+    np.cumsum(returns, axis=0, out=returns)
+    np.exp(paths, out=paths)
+    paths *= start_price
+    return paths, summed
@@ -0,0 +1,220 @@
+import os
+import time
+import threading
+import numpy as np
+import pandas as pd
+from utils.bars import INTERVAL_SECONDS, ALWAYS_OPEN, session_days, trading_calendar
+from utils.indicator_registry import INDICATORS, column_spec
+
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+# What the summary cards show
+LIVE_COLUMNS = ('SMA_20', 'SMA_50', 'SMA_200', 'RSI')
+
+
+class BarAggregator:
+    """
+    Quotes -> OHLCV bars of one interval. Timestamps are epoch seconds, with naive bar
+    dates counted as UTC midnight. Bars follow the symbol's TradingCalendar: quotes
+    outside its sessions (an equity's weekends, holidays, pre/post market) are skipped,
+    and a daily bar is one exchange-local date. on_tick() is O(1): it either extends the
+    forming bar or closes it and opens the next one.
+    """
+
+    def __init__(self, interval="1d", start=None, bar=None, calendar=ALWAYS_OPEN):
+        self.step = INTERVAL_SECONDS[interval]
+        self.calendar = calendar
+        self.start = start      # bucket start of the forming bar (epoch seconds)
+        self.bar = list(bar) if bar is not None else None
+        self.skipped = 0
+
+    def bucket(self, ts):
+        return self.calendar.bucket(ts, self.step)
+
+    def on_tick(self, ts, price, size=0.0):
+        """Returns the bar that just closed as (start, (o, h, l, c, v)), else None."""
+        if not self.calendar.trades(ts):
+            self.skipped += 1
+            return None
+        start = self.bucket(ts)
+        if self.bar is not None and start <= self.start:
+            bar = self.bar
+            bar[1] = max(bar[1], price)
+            bar[2] = min(bar[2], price)
+            bar[3] = price
+            bar[4] += size
+            return None
+        closed = (self.start, tuple(self.bar)) if self.bar is not None else None
+        self.start = start
+        self.bar = [price, price, price, price, size]
+        return closed
+
+    @property
+    def forming(self):
+        return tuple(self.bar) if self.bar is not None else None
+
+
+class StreamingIndicators:
+    """
+    Running indicator states for a set of catalog columns. commit() feeds a closed bar and
+    peek() evaluates the forming one; both touch each (indicator, params) state once, so the
+    cost per call doesn't depend on how much history was seeded.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.specs = {col: column_spec(col) for col in self.columns}
+        self.states = {}        # (name, params key) -> running state
+
+    def _evaluate(self, op, bar, session, name, params, memo):
+        spec = INDICATORS[name]
+        params = spec.resolve(params)
+        key = (name, tuple(sorted(params.items())))
+        if key in memo:
+            return memo[key]
+        if spec.depends is not None:
+            deps = {alias: self._evaluate(op, bar, session, dep, dep_params, memo)
+                    for alias, (dep, dep_params) in spec.depends(params).items()}
+            result = spec.combine(deps, params)
+        else:
+            state = self.states.get(key)
+            if state is None:
+                state = self.states[key] = spec.state(**params)
+            raw = getattr(state, op)(*(session if field == "Session" else bar[OHLCV.index(field)]
+                                       for field in spec.inputs))
+            result = dict(zip(spec.outputs, raw if len(spec.outputs) > 1 else (raw,)))
+        memo[key] = result
+        return result
+
+    def _row(self, op, bar, session):
+        memo = {}
+        return {col: self._evaluate(op, bar, session, name, params, memo)[output]
+                for col, (name, params, output) in self.specs.items()}
+
+    def commit(self, bar, session=None):
+        """`session` is the bar's session key (bars.session_days), read by VWAP."""
+        return self._row("update", bar, session)
+
+    def peek(self, bar, session=None):
+        return self._row("peek", bar, session)
+
+    def seed(self, df):
+        """Feeds every row of an OHLCV frame as a closed bar (once, when a stream starts)."""
+        rows = df[OHLCV].astype(float).itertuples(index=False, name=None)
+        for bar, session in zip(rows, session_days(df.index)):
+            self.commit(bar, session)
+
+
+class SimulatedTickSource:
+    """
+    Local stand-in for a quote feed: a seeded random walk around `price` at `rate` quotes
+    per second. poll() returns the quotes generated since the previous poll (at most
+    `max_batch`; the rest come on the next poll).
+    """
+
+    def __init__(self, ticker, price, rate=4.0, volatility=0.0003, seed=None, clock=time.time, max_batch=500):
+        self.ticker = ticker
+        self.price = float(price)
+        self.rate = rate
+        self.volatility = volatility
+        self.clock = clock
+        self.max_batch = max_batch
+        self._rng = np.random.default_rng(seed)
+        self._last = clock()
+
+    def poll(self):
+        now = self.clock()
+        n = min(int((now - self._last) * self.rate), self.max_batch)
+        if n <= 0:
+            return []
+        ts = self._last + np.arange(1, n + 1) / self.rate
+        prices = self.price * np.exp(np.cumsum(self._rng.normal(0, self.volatility, n)))
+        sizes = self._rng.integers(1, 500, n).astype(float) * 100
+        self._last = float(ts[-1])
+        self.price = float(prices[-1])
+        return list(zip(ts.tolist(), prices.tolist(), sizes.tolist()))
+
+
+def _epoch(ts):
+    return pd.Timestamp(ts).value // 1_000_000_000
+
+
+class QuoteStream:
+    """
+    One symbol's live pipeline: quotes build the forming bar, closed bars are committed to
+    the indicator states and the forming bar is peeked for the latest values.
+    Seeded from a history whose last row is treated as the bar still forming.
+    """
+
+    def __init__(self, ticker, history, source, interval="1d", columns=LIVE_COLUMNS, version=None):
+        bars = history[OHLCV].astype(float)
+        self.ticker = ticker
+        self.source = source
+        self.version = version
+        self.tz = getattr(bars.index, "tz", None)
+        self.indicators = StreamingIndicators(columns)
+        self.indicators.seed(bars.iloc[:-1])
+        last = tuple(bars.iloc[-1])
+        self.aggregator = BarAggregator(interval, start=_epoch(bars.index[-1]), bar=last,
+                                        calendar=trading_calendar(ticker))
+        self.prev_close = float(bars['Close'].iloc[-2]) if len(bars) > 1 else last[3]
+        self.ticks = 0
+        self.closed_bars = 0
+        self.updated_at = None
+        self.values = self.indicators.peek(last, session_days(bars.index[-1:])[0])
+        self._lock = threading.Lock()
+
+    def _session(self, start):
+        """Session key of a bar starting at epoch seconds `start`, on the history's clock."""
+        stamp = pd.DatetimeIndex([pd.Timestamp(start, unit="s", tz="UTC")])
+        return session_days(stamp.tz_convert(self.tz) if self.tz is not None else stamp.tz_localize(None))[0]
+
+    def on_tick(self, ts, price, size=0.0):
+        closed = self.aggregator.on_tick(ts, price, size)
+        if closed is not None:
+            self.indicators.commit(closed[1], self._session(closed[0]))
+            self.prev_close = closed[1][3]
+            self.closed_bars += 1
+        self.values = self.indicators.peek(self.aggregator.forming, self._session(self.aggregator.start))
+        self.ticks += 1
+        self.updated_at = ts
+
+    def pump(self):
+        """Drains the source and returns the latest snapshot."""
+        with self._lock:
+            for tick in self.source.poll():
+                self.on_tick(*tick)
+            return self.snapshot()
+
+    def snapshot(self):
+        """Forming bar fields + indicator values, shaped like a row of the analysis frame."""
+        row = dict(zip(OHLCV, self.aggregator.forming))
+        row.update(self.values)
+        row['prev_close'] = self.prev_close
+        return row
+
+
+def quote_streaming_enabled():
+    """
+    QA_QUOTE_SOURCE=sim streams simulated quotes, off keeps page reloads. Defaults to sim
+    only for offline providers, so live Yahoo data is never mixed with synthetic quotes.
+    """
+    default = "sim" if os.getenv("QA_DATA_PROVIDER", "live").lower() in ("local", "replay") else "off"
+    return os.getenv("QA_QUOTE_SOURCE", default).lower() == "sim"
+
+
+_streams = {}
+_streams_lock = threading.Lock()
+
+
+def get_quote_stream(ticker, history, version=None, interval="1d", columns=LIVE_COLUMNS):
+    """
+    Process-wide stream per (ticker, interval). A new data version (fresh history) reseeds
+    it; otherwise every render keeps pumping the same stream.
+    """
+    key = (ticker, interval)
+    with _streams_lock:
+        stream = _streams.get(key)
+        if stream is None or (version is not None and stream.version != version):
+            source = SimulatedTickSource(ticker, float(history['Close'].iloc[-1]))
+            stream = _streams[key] = QuoteStream(ticker, history, source, interval, columns, version)
+        return stream
@@ -0,0 +1,163 @@
+import copy
+import time
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+
+class _Entry:
+    __slots__ = ("value", "fetched_at", "refreshing", "error")
+
+    def __init__(self, value, fetched_at):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.refreshing = False
+        self.error = None
+
+
+class StaleWhileRevalidateCache:
+    """
+    Serves the last good value immediately. Entries older than `ttl` are still returned,
+    but flagged stale and refreshed on a background worker; entries older than `max_stale`
+    are too old to show and are refetched in the caller's thread.
+    A failed background refresh keeps the previous value.
+    """
+
+    def __init__(self, ttl=600, max_stale=3600, max_workers=2):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="swr")
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def _refresh(self, key, fn, args, kwargs):
+        try:
+            value = fn(*args, **kwargs)
+        except Exception as e:
+            print(f"Error refreshing {key[0]}: {e}")
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.refreshing = False
+                    entry.error = str(e)
+            return
+        with self._lock:
+            self._entries[key] = _Entry(value, time.time())
+            self.refreshes += 1
+
+    def get(self, key, fn, *args, **kwargs):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry.fetched_at < self.max_stale:
+                if now - entry.fetched_at < self.ttl:
+                    self.hits += 1
+                else:
+                    self.stale_hits += 1
+                    if not entry.refreshing:
+                        # One background refresh per key, however many renders see it stale
+                        entry.refreshing = True
+                        self._pool.submit(self._refresh, key, fn, args, kwargs)
+                return entry.value
+            self.misses += 1
+
+        value = fn(*args, **kwargs)
+        with self._lock:
+            self._entries[key] = _Entry(value, time.time())
+        return value
+
+    def age(self, key):
+        """
+        (seconds since the value was fetched, is_stale, refresh in progress);
+        (None, False, False) if nothing is cached for the key.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False, False
+            age = time.time() - entry.fetched_at
+            return age, age >= self.ttl, entry.refreshing
+
+    def clear(self, prefix=None):
+        with self._lock:
+            if prefix is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == prefix]:
+                    del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes
+            }
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_swr_cache(name, ttl=600, max_stale=3600):
+    """
+    One cache per loader name for the life of the process. Streamlit re-executes app.py on
+    every rerun, so the decorator must find the existing store rather than build a new one.
+    """
+    with _stores_lock:
+        store = _stores.get(name)
+        if store is None:
+            store = _stores[name] = StaleWhileRevalidateCache(ttl=ttl, max_stale=max_stale)
+        else:
+            store.ttl, store.max_stale = ttl, max_stale
+        return store
+
+
+def swr_cached(ttl=600, max_stale=3600, snapshot=copy.deepcopy):
+    """
+    Decorator version for module-level loaders. Like st.cache_data, callers get a copy so
+    mutating a returned DataFrame can't corrupt the cached one. `snapshot` takes that copy
+    on every call: pass a cheaper one for large values callers only read (see
+    AnalysisContext.snapshot), or None to hand out the cached object itself.
+    The wrapper exposes .clear() and .age(*args) for the UI's freshness indicator.
+    """
+    def decorate(fn):
+        name = f"{fn.__module__}.{fn.__qualname__}"
+        store = get_swr_cache(name, ttl=ttl, max_stale=max_stale)
+
+        def key_for(args, kwargs):
+            return (name,) + tuple(args) + tuple(sorted(kwargs.items()))
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            value = store.get(key_for(args, kwargs), fn, *args, **kwargs)
+            return value if snapshot is None else snapshot(value)
+
+        wrapper.age = lambda *args, **kwargs: store.age(key_for(args, kwargs))
+        wrapper.clear = lambda: store.clear(name)
+        wrapper.cache = store
+        return wrapper
+    return decorate
+
+
+def format_age(age, stale=False, refreshing=False):
+    """Short label like '42s ago' / '3m ago (refreshing)' for captions."""
+    if age is None:
+        return "not loaded"
+    if age < 60:
+        label = f"{int(age)}s ago"
+    elif age < 3600:
+        label = f"{int(age // 60)}m ago"
+    else:
+        label = f"{age / 3600:.1f}h ago"
+    if refreshing:
+        label += " (refreshing)"
+    elif stale:
+        label += " (stale)"
+    return label
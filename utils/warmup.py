@@ -0,0 +1,181 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.market_data import get_market_data_service
+
+
+class WarmupScheduler:
+    """
+    Background prefetch over the sidebar universe. Each pass refreshes the price store in
+    one batched download, then runs the registered loaders (indicators, fundamentals, news...)
+    symbol by symbol, most recently/frequently viewed symbols first.
+    Without a fixed `interval`, passes run every REFRESH_FRACTION of the shortest TTL being
+    warmed (the price service's and each loader's), so nothing expires between passes.
+    """
+
+    REFRESH_FRACTION = 0.8
+    DEFAULT_INTERVAL = 900.0
+
+    def __init__(self, symbols, interval=None, period="1y", max_workers=3, decay=0.5):
+        self.symbols = list(dict.fromkeys(symbols))
+        self.interval = interval
+        self.period = period
+        self.max_workers = max_workers
+        self.decay = decay
+        self.loaders = {}        # stage name -> fn(symbol)
+        self.ttls = {}           # stage name -> seconds its results stay fresh
+        self.freshness = {}      # symbol -> {stage: time of last successful warm}
+        self.errors = {}         # symbol -> last error text
+        self.done = 0
+        self.total = 0
+        self.passes = 0
+        self.running = False
+        self.last_pass = None
+        self._access = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, stage, fn, ttl=None):
+        with self._lock:
+            self.loaders[stage] = fn
+            if ttl:
+                self.ttls[stage] = ttl
+
+    def pass_interval(self):
+        """Seconds between passes: the fixed interval, or a fraction of the shortest TTL."""
+        if self.interval is not None:
+            return self.interval
+        with self._lock:
+            ttls = list(self.ttls.values())
+        try:
+            ttls.append(get_market_data_service().ttl)
+        except Exception as e:
+            print(f"Error reading market data TTL: {e}")
+        return self.REFRESH_FRACTION * min(ttls) if ttls else self.DEFAULT_INTERVAL
+
+    def record_access(self, symbol):
+        with self._lock:
+            self._access[symbol] = self._access.get(symbol, 0.0) + 1.0
+
+    def priority_order(self):
+        """Symbols by decayed access count; never-viewed symbols keep universe order."""
+        with self._lock:
+            access = dict(self._access)
+        order = {s: i for i, s in enumerate(self.symbols)}
+        extra = [s for s in access if s not in order]
+        return sorted(self.symbols + extra, key=lambda s: (-access.get(s, 0.0), order.get(s, len(order))))
+
+    def _mark(self, symbol, stage):
+        with self._lock:
+            self.freshness.setdefault(symbol, {})[stage] = time.time()
+
+    def _warm_symbol(self, symbol):
+        with self._lock:
+            loaders = list(self.loaders.items())
+        for stage, fn in loaders:
+            if self._stop.is_set():
+                return
+            try:
+                fn(symbol)
+                self._mark(symbol, stage)
+            except Exception as e:
+                with self._lock:
+                    self.errors[symbol] = f"{stage}: {e}"
+        with self._lock:
+            self.done += 1
+
+    def run_once(self):
+        order = self.priority_order()
+        with self._lock:
+            self.running = True
+            self.done = 0
+            self.total = len(order)
+
+        # 1. Prices: one batched refresh of the store (delta downloads for stored symbols)
+        try:
+            service = get_market_data_service()
+            service.request(order, period=self.period)
+            service.flush()
+            now = time.time()
+            with self._lock:
+                for s in order:
+                    self.freshness.setdefault(s, {})["prices"] = now
+        except Exception as e:
+            print(f"Error warming price store: {e}")
+
+        # 2. Per-symbol loaders, submitted in priority order
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="warmup") as pool:
+            list(pool.map(self._warm_symbol, order))
+
+        with self._lock:
+            # Older views count for less on the next pass
+            self._access = {s: c * self.decay for s, c in self._access.items() if c * self.decay >= 0.01}
+            self.running = False
+            self.passes += 1
+            self.last_pass = time.time()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error in warm-up pass: {e}")
+                with self._lock:
+                    self.running = False
+            self._stop.wait(self.pass_interval())
+
+    def start(self):
+        """Starts the background loop once per process; later calls are no-ops."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="warmup-scheduler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        self._stop.set()
+
+    def progress(self):
+        with self._lock:
+            return {
+                "done": self.done,
+                "total": self.total,
+                "running": self.running,
+                "passes": self.passes,
+                "last_pass": self.last_pass
+            }
+
+    def symbol_freshness(self, symbol):
+        """Seconds since each stage was last warmed for `symbol`."""
+        now = time.time()
+        with self._lock:
+            return {stage: now - ts for stage, ts in self.freshness.get(symbol, {}).items()}
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_warmup_scheduler(symbols=None):
+    """
+    Process-wide scheduler. QA_WARMUP_INTERVAL fixes the seconds between passes
+    (default: derived from the TTLs being warmed, see WarmupScheduler).
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            if symbols is None:
+                from utils.ticker_data import ASSET_DATABASE
+                symbols = ASSET_DATABASE.values()
+            interval = os.getenv("QA_WARMUP_INTERVAL")
+            interval = float(interval) if interval else None
+            _scheduler = WarmupScheduler(symbols, interval=interval)
+        return _scheduler
+
+
+def warmup_enabled():
+    return os.getenv("QA_WARMUP", "on").lower() not in ("off", "0", "false")